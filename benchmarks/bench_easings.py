@@ -0,0 +1,40 @@
+import sys
+import timeit
+import numpy as np
+from ui.screens.easings import ARRAY_EASINGS, EASING_TABLE_RESOLUTION, EASING_TABLE_TOLERANCE, TABLE_EASINGS, build_easing_table
+
+# Checks that the easing tables and array forms match the analytic easings, and times them.
+# Speedup is the analytic call's time over the table's, below 1 the table is slower. easing_table()
+# only hands out the tables of TABLE_EASINGS, the ones that should come out above 1 here.
+#   python -m benchmarks.bench_easings [resolution]
+
+CHECK_POINTS = 100001
+CALLS = 100000
+
+def main(resolution=EASING_TABLE_RESOLUTION):
+    xs = np.linspace(0, 1, CHECK_POINTS)
+    x_list = xs.tolist()
+    calls = np.random.default_rng(0).random(CALLS).tolist()
+    failed = False
+
+    print(f'{"easing":<20}{"table err":>12}{"array err":>12}{"scalar ns":>12}{"table ns":>12}{"speedup":>10}{"array ns":>12}{"uses":>10}')
+    for easing, array_easing in ARRAY_EASINGS.items():
+        table = build_easing_table(easing, resolution)
+        exact = np.array([easing(x) for x in x_list])
+        table_error = np.max(np.abs(np.array([table(x) for x in x_list]) - exact))
+        array_error = np.max(np.abs(array_easing(xs) - exact))
+        failed |= table_error > EASING_TABLE_TOLERANCE or array_error > 1e-12
+
+        scalar_time = min(timeit.repeat(lambda: [easing(x) for x in calls], number=1, repeat=5))
+        table_time = min(timeit.repeat(lambda: [table(x) for x in calls], number=1, repeat=5))
+        array_time = min(timeit.repeat(lambda: array_easing(xs), number=1, repeat=5))
+        uses = 'table' if easing in TABLE_EASINGS else 'analytic'
+        print(f'{easing.__name__:<20}{table_error:>12.2e}{array_error:>12.2e}'
+              f'{scalar_time / CALLS * 1e9:>12.0f}{table_time / CALLS * 1e9:>12.0f}{scalar_time / table_time:>9.2f}x'
+              f'{array_time / CHECK_POINTS * 1e9:>12.1f}{uses:>10}')
+
+    print(f'Tolerance {EASING_TABLE_TOLERANCE:.0e} at resolution {resolution}: {"FAILED" if failed else "ok"}')
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else EASING_TABLE_RESOLUTION))
@@ -0,0 +1,179 @@
+import argparse
+import json
+import os
+import sys
+import time
+import numpy as np
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+from ui.ui_runner import UIRunner
+from wiimote.wiimote_state import BTN_A, BTN_B, WiimoteState
+
+# Runs the whole app headless through a scripted Wiimote session and times every frame, per
+# screen and per transition. Frames aren't capped: the clock hands every frame 1/60 s without
+# waiting, so the animations play out exactly as at 60 FPS as fast as the machine allows.
+#   python -m benchmarks.bench_flow [--runs 3] [--output results.json] [--baseline baseline.json] [--save-baseline]
+# Baselines are machine specific, so each machine saves its own before comparing changes against it.
+
+FPS = 60
+SAMPLES_PER_FRAME = 2 # Reports fed per frame, ~100 Hz like the remote
+TOLERANCE = 0.25 # How much slower than the baseline a screen's p50/p99 may get
+BASELINE_FILE = 'benchmarks/flow_baseline.json'
+
+STILL = (120, 130, 150)
+
+# (name, seconds, connected, buttons, moving)
+SCRIPT = (
+    ('connect', 5, True, 0, False),
+    ('press A+B', 1, True, BTN_A | BTN_B, False),
+    ('wait for pick up', 9.5, True, 0, False),
+    ('pick up', 0.5, True, 0, True),
+    ('hold still', 10, True, 0, False),
+    ('disconnect', 6, False, 0, False),
+    ('reconnect', 24, True, 0, False)
+)
+
+# The screens the script has to go through, or the timings aren't comparable
+EXPECTED_SCREENS = ('HOME_SCREEN', 'INTRO_PICKUP_SCREEN', 'CALIBRATION_SCREEN', 'HOME_SCREEN',
+                    'INTRO_CONNECT_SCREEN', 'CALIBRATION_SCREEN', 'HOME_SCREEN')
+
+# Hands out fixed frame times instead of limiting the frame rate
+class UncappedClock:
+    def __init__(self, fps=FPS):
+        self.frame_ms = 1000 / fps
+        self.last_tick = time.perf_counter()
+        self.fps = 0
+
+    def tick(self, framerate=0):
+        now = time.perf_counter()
+        self.fps = 1 / max(now - self.last_tick, 1e-9)
+        self.last_tick = now
+        return self.frame_ms
+
+    def get_fps(self):
+        return self.fps
+
+def script_frames(script=SCRIPT, fps=FPS):
+    for name, seconds, connected, buttons, moving in script:
+        for i in range(int(seconds * fps)):
+            acc = (STILL[0] + (i % 7) * 5, STILL[1], STILL[2]) if moving else STILL
+            yield name, connected, buttons, acc
+
+# Returns the screens visited, {key: [frame seconds]} keyed by screen or 'FROM -> TO', and the
+# runner's (from, to, seconds, preloaded) of every transition
+def run_flow(preload_screens=True):
+    # Every frame gets 1/60 s, so the frame rate isn't lowered when idle
+    runner = UIRunner(preload_screens=preload_screens, log_transitions=False, adaptive_fps=False)
+    runner.start()
+    runner.clock = UncappedClock()
+    wm_state = WiimoteState()
+    screens = [runner.curr_screen.screen_state.name]
+    frame_times = {}
+
+    t = 0
+    for _, connected, buttons, acc in script_frames():
+        t += 1 / FPS
+        wm_state.connected = connected
+        for i in range(SAMPLES_PER_FRAME):
+            wm_state.push_sample(acc, buttons, t - (SAMPLES_PER_FRAME - 1 - i) / (FPS * SAMPLES_PER_FRAME))
+
+        state = runner.curr_screen.screen_state.name
+        start = time.perf_counter()
+        runner.is_running()
+        runner.update(wm_state)
+        frame_time = time.perf_counter() - start
+
+        new_state = runner.curr_screen.screen_state.name
+        key = state if new_state == state else f'{state} -> {new_state}'
+        frame_times.setdefault(key, []).append(frame_time)
+        if new_state != state:
+            screens.append(new_state)
+
+    runner.quit()
+    return screens, frame_times, runner.transition_frame_times
+
+# Each metric is the median over the runs, to even out noise between runs
+def merge_runs(runs):
+    results = {}
+    for key in runs[0]:
+        results[key] = {metric: float(np.median([run[key][metric] for run in runs if key in run]))
+                        for metric in runs[0][key]}
+        results[key]['frames'] = runs[0][key]['frames']
+    return results
+
+def summarize(frame_times):
+    results = {}
+    for key, times in frame_times.items():
+        times = np.array(times) * 1000
+        p50, p90, p99 = np.percentile(times, (50, 90, 99))
+        results[key] = {
+            'frames': len(times),
+            'fps': float(len(times) / times.sum() * 1000),
+            'p50_ms': float(p50),
+            'p90_ms': float(p90),
+            'p99_ms': float(p99),
+            'max_ms': float(times.max())
+        }
+    return results
+
+# Returns the (key, metric, baseline, result) that got slower than the tolerance allows
+def compare(results, baseline, tolerance=TOLERANCE):
+    regressions = []
+    for key, result in results.items():
+        if key not in baseline or ' -> ' in key:
+            continue # Transitions are single frames, too noisy to gate on
+        for metric in ('p50_ms', 'p99_ms'):
+            if result[metric] > baseline[key][metric] * (1 + tolerance):
+                regressions.append((key, metric, baseline[key][metric], result[metric]))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Headless benchmark of the whole screen flow')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--baseline', default=BASELINE_FILE, help='JSON results to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='store these results as the baseline')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE)
+    parser.add_argument('--runs', type=int, default=1, help='run the flow this many times, reporting medians')
+    parser.add_argument('--no-preload', action='store_true', help="don't preload successor screens")
+    args = parser.parse_args()
+
+    runs = []
+    for _ in range(args.runs):
+        screens, frame_times, _ = run_flow(not args.no_preload)
+        if tuple(screens) != EXPECTED_SCREENS:
+            print(f'Flow went {" -> ".join(screens)}, expected {" -> ".join(EXPECTED_SCREENS)}')
+            return 1
+        runs.append(summarize(frame_times))
+    results = merge_runs(runs)
+
+    baseline = None
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+
+    print(f'{"screen":<48}{"frames":>8}{"fps":>10}{"p50 ms":>10}{"p90 ms":>10}{"p99 ms":>10}{"max ms":>10}{"base p99":>10}')
+    for key, result in results.items():
+        base = f'{baseline[key]["p99_ms"]:.2f}' if baseline is not None and key in baseline else '-'
+        print(f'{key:<48}{result["frames"]:>8}{result["fps"]:>10.0f}{result["p50_ms"]:>10.2f}'
+              f'{result["p90_ms"]:>10.2f}{result["p99_ms"]:>10.2f}{result["max_ms"]:>10.2f}{base:>10}')
+
+    for path in (args.output, args.baseline if args.save_baseline else None):
+        if path is not None:
+            with open(path, 'w') as file:
+                json.dump(results, file, indent=2)
+            print(f'Wrote {path}')
+
+    if baseline is None:
+        if not args.save_baseline:
+            print(f'No baseline at {args.baseline}, store one with --save-baseline')
+        return 0
+    regressions = compare(results, baseline, args.tolerance)
+    for key, metric, base, result in regressions:
+        print(f'REGRESSION {key} {metric}: {base:.2f} -> {result:.2f} ms')
+    print(f'Within {args.tolerance:.0%} of the baseline: {"no" if regressions else "ok"}')
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,77 @@
+import time
+START = time.monotonic() # Before any other import, for the child's own startup
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Times a cold start up to the first frame, phase by phase. Each run is a fresh interpreter,
+# since imports and asset caches would be warm in this one.
+#   python -m benchmarks.bench_startup [--runs 5]
+# Phases, each timed from the end of the previous one:
+#   interpreter  launching python up to the first line of this module
+#   imports      importing UIRunner (pygame and the screen framework)
+#   display      pygame.init() and opening the window
+#   splash       drawing the splash frame
+#   first_screen importing and building the first screen
+#   first_frame  updating and drawing the first frame
+
+RUNS = 5
+
+def child():
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    phases = [('interpreter', START)]
+    from ui.ui_runner import UIRunner
+    from wiimote.wiimote_state import WiimoteState
+    phases.append(('imports', time.monotonic()))
+
+    runner = UIRunner(log_transitions=False)
+    runner.update(WiimoteState())
+    phases += runner.startup_phases[1:]
+    loaded = [name for name in ('cv2', 'ui.screens.screen_states.calibration_screen') if name in sys.modules]
+    runner.quit()
+    print(json.dumps({'phases': phases, 'loaded': loaded}))
+
+def run_once():
+    launch = time.monotonic()
+    output = subprocess.run([sys.executable, '-m', 'benchmarks.bench_startup', '--child'],
+                            capture_output=True, text=True, check=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    durations = {}
+    last = launch
+    for phase, timestamp in result['phases']:
+        durations[phase] = timestamp - last
+        last = timestamp
+    return durations, result['loaded']
+
+def main():
+    parser = argparse.ArgumentParser(description='Time a cold start up to the first frame')
+    parser.add_argument('--runs', type=int, default=RUNS)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child()
+        return 0
+
+    runs = []
+    for _ in range(args.runs):
+        durations, loaded = run_once()
+        runs.append(durations)
+
+    phases = list(runs[0].keys())
+    medians = {phase: sorted(run[phase] for run in runs)[len(runs) // 2] for phase in phases}
+    print(f'{"phase":<16}{"median ms":>12}{"min ms":>10}{"max ms":>10}')
+    for phase in phases:
+        times = [run[phase] * 1000 for run in runs]
+        print(f'{phase:<16}{medians[phase] * 1000:>12.1f}{min(times):>10.1f}{max(times):>10.1f}')
+
+    to_splash = sum(medians[phase] for phase in phases[:phases.index('splash') + 1])
+    print(f'Time to splash: {to_splash * 1000:.0f} ms, to first frame: {sum(medians.values()) * 1000:.0f} ms')
+    print(f'Loaded by the first frame: {", ".join(loaded) if loaded else "no deferred modules"}')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,14 +1,32 @@
+import argparse
 import sys
 from ui.ui_runner import UIRunner
+from wiimote.simulated_wiimote import MOTION_PROFILES, SimulatedBackend
+from wiimote.wiimote_recording import WiimoteReplay
 from wiimote.wiimote_runner import WiimoteRunner
 
-ui_runner = UIRunner()
-wm_runner = WiimoteRunner()
+parser = argparse.ArgumentParser(description='Press Wii to Enter')
+parser.add_argument('--profile', action='store_true', help='time every frame, F3 shows the results and they are saved to profile.csv')
+parser.add_argument('--fixed-fps', action='store_true', help='render at 60 FPS even while nothing moves')
+parser.add_argument('--record', metavar='FILE', help='append everything the Wiimote sends to this recording (e.g. session.wmrec)')
+parser.add_argument('--replay', metavar='FILE', help='play this recording back instead of connecting to a Wiimote')
+parser.add_argument('--replay-speed', type=float, default=1, help='how many times faster than real time to replay')
+parser.add_argument('--simulate', choices=MOTION_PROFILES.keys(), help='use a simulated Wiimote moving like this instead of a real one')
+parser.add_argument('--players', type=int, default=1, help='how many Wiimotes to connect at once')
+parser.add_argument('--simulate-rate', type=float, default=100, help='reports per second from the simulated Wiimote')
+args = parser.parse_args()
+
+ui_runner = UIRunner(profile_csv='profile.csv' if args.profile else None, adaptive_fps=not args.fixed_fps)
+if args.replay is not None:
+    wm_runner = WiimoteReplay(args.replay, args.replay_speed)
+else:
+    backend = SimulatedBackend(args.simulate_rate, MOTION_PROFILES[args.simulate]) if args.simulate is not None else None
+    wm_runner = WiimoteRunner(backend=backend, record_path=args.record, players=args.players)
 
 breaking_exception = None
 try:
     while ui_runner.is_running():
-        ui_runner.update(wm_runner.wm_state)
+        ui_runner.update(wm_runner.poll_players())
 except KeyboardInterrupt:
     pass
 except Exception as e:
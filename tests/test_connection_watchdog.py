@@ -0,0 +1,151 @@
+import time
+import pytest
+from wiimote.connection_watchdog import ConnectionStates, ConnectionWatchdog
+from wiimote.simulated_wiimote import SimulatedBackend
+from wiimote.wiimote_runner import WiimoteRunner
+from wiimote.wiimote_state import WiimoteSharedBlock
+
+START = ConnectionWatchdog.ACTION_START_HANDLER
+STOP = ConnectionWatchdog.ACTION_STOP_HANDLER
+STEP = 0.125 # Like the runner's WATCHDOG_INTERVAL, but exact in binary so the made up clock is too
+
+# What a handler leaves in the shared block, stepped on a made up clock as the runner's watchdog
+# thread would see it
+class FakeRemote:
+    def __init__(self, now=100.0):
+        self.now = now
+        self.watchdog = ConnectionWatchdog(now)
+        self.status = WiimoteSharedBlock.STATUS_SEARCHING
+        self.count = 0
+
+    # Steps the watchdog for `seconds`, with a new sample every step while sending. Returns the
+    # (seconds in, action) of every action it took
+    def run(self, seconds, sending=False):
+        actions = []
+        start = self.now
+        for _ in range(int(round(seconds / STEP))):
+            self.now += STEP
+            if sending:
+                self.count += 1
+            action = self.watchdog.update(self.now, self.status, self.count)
+            if action is not None:
+                actions.append((self.now - start, action))
+                if action == STOP:
+                    self.status = WiimoteSharedBlock.STATUS_SEARCHING # terminate_handler()
+        return actions
+
+    def connect(self):
+        self.status = WiimoteSharedBlock.STATUS_CONNECTED
+        return self.run(0.5, sending=True)
+
+# Starts the first handler and connects, as the runner does at startup
+def connected_remote():
+    remote = FakeRemote()
+    assert remote.run(STEP) == [(STEP, START)]
+    remote.connect()
+    assert remote.watchdog.state == ConnectionStates.CONNECTED
+    return remote
+
+def test_startup_connects():
+    remote = FakeRemote()
+    assert remote.run(STEP) == [(STEP, START)]
+    assert remote.watchdog.state == ConnectionStates.DISCOVERING
+    # Searching for a remote is no failure, the same handler keeps at it
+    assert remote.run(60) == []
+    assert remote.watchdog.state == ConnectionStates.DISCOVERING
+
+    remote.status = WiimoteSharedBlock.STATUS_CONNECTED
+    remote.run(STEP)
+    assert remote.watchdog.state == ConnectionStates.CONNECTING
+    remote.run(STEP, sending=True)
+    assert remote.watchdog.state == ConnectionStates.CONNECTED
+    assert remote.watchdog.metrics(remote.now)['first_connect'] == 60 + 3 * STEP
+
+def test_short_stall_recovers_without_a_restart():
+    remote = connected_remote()
+    assert remote.run(0.75) == []
+    assert remote.watchdog.state == ConnectionStates.STALLED
+    assert remote.run(0.25, sending=True) == []
+    assert remote.watchdog.state == ConnectionStates.CONNECTED
+    metrics = remote.watchdog.metrics(remote.now)
+    assert metrics['stalls'] == 1
+    assert metrics['restarts'] == 0
+
+# A remote that goes silent stalls, is restarted once RESPONSE_TIMEOUT passes without a sample,
+# waits out the backoff, and counts the time from its last sample to the reconnect
+def test_stall_restarts_after_backoff():
+    remote = connected_remote()
+    assert remote.run(1.5) == [(1.125, STOP)]
+    watchdog = remote.watchdog
+    assert watchdog.state == ConnectionStates.BACKOFF
+    assert watchdog.backoff_until == remote.now - 0.375 + ConnectionWatchdog.BACKOFF_INITIAL
+
+    assert remote.run(0.5) == [(0.125, START)]
+    assert watchdog.state == ConnectionStates.DISCOVERING
+    remote.connect()
+    assert watchdog.state == ConnectionStates.CONNECTED
+    metrics = watchdog.metrics(remote.now)
+    assert (metrics['stalls'], metrics['restarts'], metrics['failures']) == (1, 1, 1)
+    # Silent for 1.125 s, 0.5 s of backoff, searching for 0.375 s, then the first sample
+    assert metrics['reconnect_times']['count'] == 1
+    assert metrics['reconnect_times']['max'] == 1.125 + 0.5 + 0.375 + 2 * STEP
+
+def test_backoff_doubles_up_to_the_maximum():
+    remote = connected_remote()
+    delays = []
+    for _ in range(9):
+        remote.status = WiimoteSharedBlock.STATUS_ERROR
+        assert remote.run(STEP) == [(STEP, STOP)]
+        delay = remote.watchdog.backoff_until - remote.now
+        delays.append(delay)
+        # Nothing starts until the backoff is over
+        assert remote.run(delay - STEP) == []
+        assert remote.run(STEP) == [(STEP, START)]
+        # The new handler connects but errors out again straight away
+        remote.status = WiimoteSharedBlock.STATUS_CONNECTED
+        remote.run(STEP)
+    assert delays == [0.5, 1, 2, 4, 8, 16, 30, 30, 30]
+
+def test_staying_connected_forgets_failures():
+    remote = connected_remote()
+    remote.status = WiimoteSharedBlock.STATUS_ERROR
+    remote.run(STEP)
+    remote.run(1)
+    remote.connect()
+    assert remote.watchdog.failures == 1
+    remote.run(ConnectionWatchdog.BACKOFF_RESET_TIME, sending=True)
+    assert remote.watchdog.failures == 0
+    assert remote.watchdog.metrics(remote.now)['next_backoff'] == ConnectionWatchdog.BACKOFF_INITIAL
+
+# Connected, but the first sample never comes
+def test_silent_connection_is_restarted():
+    remote = FakeRemote()
+    remote.run(STEP)
+    remote.status = WiimoteSharedBlock.STATUS_CONNECTED
+    assert remote.run(1.5) == [(1.25, STOP)]
+    assert remote.watchdog.metrics(remote.now)['restarts'] == 1
+
+def test_state_seconds_add_up():
+    remote = connected_remote()
+    remote.run(1.5)
+    remote.run(0.5)
+    remote.connect()
+    metrics = remote.watchdog.metrics(remote.now)
+    assert sum(metrics['state_seconds'].values()) == pytest.approx(remote.now - 100)
+    assert metrics['state_seconds']['BACKOFF'] == STEP + ConnectionWatchdog.BACKOFF_INITIAL
+
+# The same path with the real runner: the simulated remote hangs a second after connecting, the
+# handler is restarted after the backoff and the new one connects again (and hangs again)
+def test_runner_restarts_a_hung_remote():
+    runner = WiimoteRunner(backend=SimulatedBackend(hang_after=1))
+    try:
+        deadline = time.monotonic() + 10
+        while runner.get_metrics()['reconnect_times']['count'] == 0 and time.monotonic() < deadline:
+            runner.poll()
+            time.sleep(0.05)
+        metrics = runner.get_metrics()
+    finally:
+        runner.on_exit()
+    assert metrics['stalls'] >= 1
+    assert metrics['restarts'] >= 1
+    assert metrics['reconnect_times']['count'] == 1
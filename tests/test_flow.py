@@ -0,0 +1,62 @@
+import time
+from benchmarks import bench_flow
+from ui.ui_runner import UIRunner
+from wiimote.connection_watchdog import ConnectionStates
+from wiimote.simulated_wiimote import ScriptedMotion, ShakeMotion, SimulatedBackend, StillMotion
+from wiimote.wiimote_state import BTN_A, BTN_B
+from wiimote.wiimote_runner import WiimoteRunner
+
+# Runs the app as press_to_enter.py does, with a simulated remote in place of cwiid, in real
+# time: the handler process, shared memory and watchdog all run for real. Takes about 45 s, and
+# the benchmark's scripted session another 25 s.
+
+TIMEOUT = 60 # Seconds
+
+# Connects right away, presses A+B on the home screen, lies still until the pick up dialog is
+# up (it fades in ~14.5 s in), is picked up and then held still for calibration
+def visitor_motion():
+    return ScriptedMotion([
+        (5, StillMotion()),
+        (1, StillMotion(buttons=BTN_A | BTN_B)),
+        (11, StillMotion()),
+        (0.5, ShakeMotion()),
+        (10, StillMotion())
+    ], loop=False)
+
+# Runs the screens against a simulated remote until they've shown `count` screens, returns them
+def run_flow(backend, count):
+    ui_runner = UIRunner()
+    ui_runner.start()
+    # Started after the first screen is built, so the remote's script lines up with the screens
+    wm_runner = WiimoteRunner(backend=backend)
+    screens = [ui_runner.curr_screen.screen_state.name]
+    deadline = time.monotonic() + TIMEOUT
+    try:
+        while len(screens) < count and time.monotonic() < deadline:
+            assert ui_runner.is_running()
+            ui_runner.update(wm_runner.poll_players())
+            state = ui_runner.curr_screen.screen_state.name
+            if state != screens[-1]:
+                screens.append(state)
+        assert wm_runner.connection_state == ConnectionStates.CONNECTED
+    finally:
+        ui_runner.quit()
+        wm_runner.on_exit()
+    return screens
+
+def test_visitor_picks_up_the_remote():
+    screens = run_flow(SimulatedBackend(motion=visitor_motion), 4)
+    assert screens == ['HOME_SCREEN', 'INTRO_PICKUP_SCREEN', 'CALIBRATION_SCREEN', 'HOME_SCREEN']
+
+# The title is up ~3.5 s in, with nothing connected yet the home screen hands over to the
+# connect screen, which goes on to calibration as soon as the remote connects
+def test_remote_connects_late():
+    screens = run_flow(SimulatedBackend(motion=StillMotion, connect_delay=6), 4)
+    assert screens == ['HOME_SCREEN', 'INTRO_CONNECT_SCREEN', 'CALIBRATION_SCREEN', 'HOME_SCREEN']
+
+# Every screen is fully built in the background before the flow gets to it, including the
+# home screen, whose video takes longer to open than a frame has
+def test_successor_screens_are_preloaded():
+    screens, _, transitions = bench_flow.run_flow()
+    assert tuple(screens) == bench_flow.EXPECTED_SCREENS
+    assert [(prev.name, new.name) for prev, new, _, preloaded in transitions if not preloaded] == []
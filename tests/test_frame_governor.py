@@ -0,0 +1,57 @@
+import threading
+import time
+import pygame
+import pytest
+from ui.screens.frame_governor import FrameGovernor
+from wiimote.wiimote_state import WiimoteSharedBlock, WiimoteState
+
+STILL_ACC = (120, 130, 150)
+
+@pytest.fixture
+def shared_state():
+    pygame.init()
+    pygame.event.clear() # Device added events, which would end the first wait
+    block = WiimoteSharedBlock()
+    block.write(WiimoteSharedBlock.STATUS_CONNECTED, 0, STILL_ACC, time.monotonic())
+    wm_state = WiimoteState(block)
+    wm_state.refresh()
+    yield block, wm_state
+    block.close(unlink=True)
+    pygame.quit()
+
+# Runs idle frames until the governor drops to the idle rate
+def make_idle(governor, wm_state, clock):
+    for _ in range(100):
+        governor.end_frame(False, [], [wm_state], 0.001)
+        if governor.is_idle:
+            return
+        governor.wait(clock)
+    raise AssertionError('the governor never went idle')
+
+def test_idle_wait_runs_to_the_idle_frame(shared_state):
+    _, wm_state = shared_state
+    governor = FrameGovernor(idle_after=0)
+    clock = pygame.time.Clock()
+    make_idle(governor, wm_state, clock)
+    start = time.monotonic()
+    governor.wait(clock)
+    assert time.monotonic() - start > 0.5 / governor.idle_fps
+    assert governor.is_idle
+
+# The remote's input lives in shared memory, not pygame's queue, and still ends the wait
+def test_remote_input_ends_the_idle_wait(shared_state):
+    block, wm_state = shared_state
+    governor = FrameGovernor(idle_after=0)
+    clock = pygame.time.Clock()
+    make_idle(governor, wm_state, clock)
+    governor.wait(clock) # Starts the next wait a whole idle frame from the last one
+
+    press_delay = 0.02
+    press = threading.Timer(press_delay, lambda: block.write(WiimoteSharedBlock.STATUS_CONNECTED, 0x0008, STILL_ACC, time.monotonic()))
+    start = time.monotonic()
+    press.start()
+    governor.wait(clock)
+    waited = time.monotonic() - start
+    press.join()
+    assert waited < press_delay + 1 / governor.full_fps
+    assert not governor.is_idle
@@ -0,0 +1,81 @@
+import random
+from math import cos, pi, sin
+import pytest
+from wiimote.motion_detector import MotionDetector, MotionEvents
+from wiimote.wiimote_state import WiimoteState
+
+RATE = 100 # Reports per second, as the remote sends them
+FPS = 60 # update() calls per second, as the screens make them
+STILL_ACC = (120, 130, 150)
+
+# A remote lying on a table: the same reading plus up to `noise` counts per axis
+def still_trace(noise, seconds, seed=0):
+    rng = random.Random(seed)
+    return [(i / RATE, tuple(axis + rng.randint(-noise, noise) for axis in STILL_ACC))
+            for i in range(int(seconds * RATE))]
+
+# Lying flat until lift_time, then turned upright over 0.6 s while being lifted: `bump` counts
+# of upward acceleration for 0.15 s, then the same while slowing down
+def pickup_trace(bump, noise, lift_time=2, seconds=5, seed=0):
+    rng = random.Random(seed)
+    trace = []
+    for i in range(int(seconds * RATE)):
+        t = i / RATE
+        angle = min(max((t - lift_time) / 0.6, 0), 1) * pi / 2
+        acc = [120, 130 + 25 * sin(angle), 125 + 25 * cos(angle)]
+        if lift_time <= t < lift_time + 0.15:
+            acc[2] += bump
+        elif lift_time + 0.15 <= t < lift_time + 0.3:
+            acc[2] -= bump
+        trace.append((t, tuple(int(round(axis)) + rng.randint(-noise, noise) for axis in acc)))
+    return trace
+
+# Feeds the trace through a WiimoteState as the UI would see it, returns [(time, event)]
+def replay(trace, detector):
+    wm_state = WiimoteState()
+    events = []
+    i = 0
+    frame_time = 0
+    while i < len(trace):
+        frame_time += 1 / FPS
+        while i < len(trace) and trace[i][0] <= frame_time:
+            wm_state.push_sample(trace[i][1], 0, trace[i][0])
+            i += 1
+        events += [(frame_time, event) for event in detector.update(1 / FPS, wm_state)]
+    return events
+
+@pytest.mark.parametrize('noise', [1, 2, 3])
+def test_still_remote_is_never_picked_up(noise):
+    events = replay(still_trace(noise, 60, seed=noise), MotionDetector())
+    assert [t for t, event in events if event == MotionEvents.PICKED_UP] == []
+
+@pytest.mark.parametrize('noise', [1, 2, 3])
+def test_still_remote_stays_still(noise):
+    detector = MotionDetector(still_time=4)
+    events = replay(still_trace(noise, 60, seed=noise), detector)
+    assert [event for _, event in events] == [MotionEvents.STILL]
+    assert detector.is_still_for(59)
+
+@pytest.mark.parametrize('bump', [0, 3, 8])
+@pytest.mark.parametrize('noise', [1, 2])
+def test_pickup_fires_once(bump, noise):
+    events = replay(pickup_trace(bump, noise), MotionDetector())
+    pickups = [t for t, event in events if event == MotionEvents.PICKED_UP]
+    assert len(pickups) == 1
+    assert 2 < pickups[0] < 2.4
+
+def test_pickup_rearms_after_settling():
+    trace = pickup_trace(8, 1)
+    # Put it down again (|acc| hardly changes between the two orientations) and pick it up again
+    trace += [(t + 5, acc) for t, acc in still_trace(1, 2)]
+    trace += [(t + 7, acc) for t, acc in pickup_trace(8, 1)]
+    events = replay(trace, MotionDetector())
+    pickups = [t for t, event in events if event == MotionEvents.PICKED_UP]
+    assert len(pickups) == 2
+    assert 9 < pickups[1] < 9.4
+
+def test_moving_remote_is_not_still():
+    detector = MotionDetector(still_time=1)
+    events = replay(pickup_trace(8, 1, lift_time=0.5, seconds=1.2), detector)
+    assert MotionEvents.STILL not in [event for _, event in events]
+    assert not detector.is_still
@@ -0,0 +1,154 @@
+import time
+import pytest
+from wiimote.wiimote_recording import (MAGIC, RECORD_SAMPLE, RECORD_SESSION, RECORD_STATUS, TIME_UNIT, WiimoteRecorder,
+                                       WiimoteReplay, read_recording, read_varint, unzigzag, write_varint, zigzag)
+from wiimote.wiimote_state import BTN_A, BTN_B, WiimoteSharedBlock, WiimoteState
+
+CONNECTED = WiimoteSharedBlock.STATUS_CONNECTED
+SEARCHING = WiimoteSharedBlock.STATUS_SEARCHING
+
+# (timestamp, acc, buttons) at 100 Hz, swinging every axis up and down (negative deltas too,
+# including the biggest possible ones) and pressing and releasing buttons along the way
+def samples(count, start=1000.0):
+    trace = []
+    for i in range(count):
+        acc = ((i * 37) % 256, 255 - (i * 11) % 256, 0 if i % 2 else 255)
+        buttons = (BTN_A if i % 10 < 5 else 0) | (BTN_B if i % 7 == 0 else 0)
+        trace.append((start + i * 0.01, acc, buttons))
+    return trace
+
+# Records samples through a WiimoteState the way the runner does, `per_poll` samples a poll. The
+# recorder starts from the sample that's current when it first records, so that's the first one
+def record(path, trace, per_poll=3, status=CONNECTED):
+    wm_state = WiimoteState()
+    wm_state.status = status
+    recorder = WiimoteRecorder(path)
+    polls = [trace[:1]] + [trace[i:i + per_poll] for i in range(1, len(trace), per_poll)]
+    for poll in polls:
+        for timestamp, acc, buttons in poll:
+            wm_state.push_sample(acc, buttons, timestamp)
+        recorder.record(wm_state)
+    recorder.close()
+
+def recorded_statuses(records):
+    return [record[1:] for record in records if record[0] == RECORD_STATUS]
+
+def recorded_samples(records):
+    return [record[1:] for record in records if record[0] == RECORD_SAMPLE]
+
+def assert_same_samples(recorded, trace):
+    assert [(acc, buttons) for _, acc, buttons in recorded] == [(tuple(acc), buttons) for _, acc, buttons in trace]
+    for (recorded_time, _, _), (timestamp, _, _) in zip(recorded, trace):
+        assert recorded_time == pytest.approx(timestamp, abs=TIME_UNIT)
+
+@pytest.mark.parametrize('value', [0, 1, 127, 128, 300, 16383, 16384, 2 ** 32, 2 ** 63 - 1])
+def test_varint_round_trip(value):
+    out = bytearray()
+    write_varint(out, value)
+    assert read_varint(out + b'\xff', 0) == (value, len(out))
+
+@pytest.mark.parametrize('value', [0, 1, -1, 2, -2, 255, -255, 2 ** 40, -2 ** 40])
+def test_zigzag_round_trip(value):
+    assert zigzag(value) >= 0
+    assert unzigzag(zigzag(value)) == value
+
+def test_samples_round_trip(tmp_path):
+    path = tmp_path / 'session.wmrec'
+    trace = samples(500)
+    record(path, trace)
+    records = list(read_recording(path))
+    assert records[0][0] == RECORD_SESSION
+    assert records[0][1] == pytest.approx(trace[0][0])
+    assert recorded_statuses(records) == [(pytest.approx(trace[0][0], abs=TIME_UNIT), CONNECTED)]
+    assert_same_samples(recorded_samples(records), trace)
+
+# A second recorder on the same file appends a session, with deltas starting over from it
+def test_sessions_append(tmp_path):
+    path = tmp_path / 'session.wmrec'
+    first, second = samples(200), samples(150, start=5000.0)
+    record(path, first)
+    record(path, second)
+    assert path.read_bytes().count(MAGIC) == 1
+    records = list(read_recording(path))
+    sessions = [i for i, record in enumerate(records) if record[0] == RECORD_SESSION]
+    assert len(sessions) == 2
+    assert records[sessions[1]][1] == pytest.approx(second[0][0])
+    assert_same_samples(recorded_samples(records[:sessions[1]]), first)
+    assert_same_samples(recorded_samples(records[sessions[1]:]), second)
+
+# Status changes are only seen when polled, after samples that can be older than the poll. They
+# take the time of the latest sample, so the samples after them keep their own times
+def test_status_is_stamped_with_the_latest_sample(tmp_path):
+    path = tmp_path / 'session.wmrec'
+    wm_state = WiimoteState()
+    recorder = WiimoteRecorder(path)
+    wm_state.push_sample((1, 2, 3), 0, 10.0)
+    recorder.record(wm_state)
+    wm_state.status = CONNECTED
+    recorder.record(wm_state)
+    late = [(10.0 + i * 0.001, (1, 2, 3 + i), 0) for i in range(1, 6)]
+    for timestamp, acc, buttons in late:
+        wm_state.push_sample(acc, buttons, timestamp)
+    recorder.record(wm_state)
+    recorder.close()
+
+    records = list(read_recording(path))
+    assert recorded_statuses(records) == [(pytest.approx(10.0, abs=TIME_UNIT), SEARCHING),
+                                          (pytest.approx(10.0, abs=TIME_UNIT), CONNECTED)]
+    times = [record[1] for record in records]
+    assert times == sorted(times)
+    assert_same_samples(recorded_samples(records)[1:], late)
+
+def test_truncated_recording_ends_at_the_last_whole_record(tmp_path):
+    path = tmp_path / 'session.wmrec'
+    trace = samples(100)
+    record(path, trace)
+    path.write_bytes(path.read_bytes()[:-2])
+    assert_same_samples(recorded_samples(read_recording(path)), trace[:-1])
+
+def test_not_a_recording(tmp_path):
+    path = tmp_path / 'other.bin'
+    path.write_bytes(b'something else')
+    with pytest.raises(ValueError):
+        list(read_recording(path))
+
+# Plays `elapsed` seconds of real time into the replay in one poll
+def poll_at(replay, elapsed):
+    replay.start_time = time.monotonic() - elapsed
+    return replay.poll()
+
+def test_replay_plays_in_time(tmp_path):
+    path = tmp_path / 'session.wmrec'
+    trace = samples(300) # 3 s
+    record(path, trace, per_poll=1)
+    replay = WiimoteReplay(path, speed=2)
+
+    wm_state = poll_at(replay, 0.5) # 1 s into the recording
+    assert wm_state.connected
+    assert wm_state.history.count == 101
+    assert wm_state.acc == trace[100][1]
+    assert wm_state.buttons == trace[100][2]
+    assert not replay.finished
+
+    wm_state = poll_at(replay, 1.6)
+    assert wm_state.history.count == len(trace)
+    assert replay.finished
+
+# Sessions are played back to back, without the time between them: the second one starts where
+# the first one's last sample was
+def test_replay_joins_sessions(tmp_path):
+    path = tmp_path / 'session.wmrec'
+    first, second = samples(100), samples(100, start=5000.0)
+    record(path, first, per_poll=1)
+    record(path, second, per_poll=1)
+    replay = WiimoteReplay(path)
+
+    wm_state = poll_at(replay, 1.5)
+    assert wm_state.history.count == 100 + 52
+    times, acc, _ = wm_state.history.last(152)
+    assert times[0] == pytest.approx(0)
+    assert times[99] == pytest.approx(0.99)
+    assert times[100] == pytest.approx(0.99)
+    assert times[-1] == pytest.approx(1.5)
+    assert tuple(acc[100]) == second[0][1]
+    assert all(times[1:] >= times[:-1])
@@ -0,0 +1,59 @@
+import time
+import numpy as np
+from wiimote.connection_watchdog import ConnectionStates
+from wiimote.simulated_wiimote import SimulatedBackend, StillMotion
+from wiimote.wiimote_runner import WiimoteRunner
+
+# A resting position per remote, so every sample shows which remote it came from
+REMOTES = {
+    '00:19:1D:00:00:01': (100, 110, 120),
+    '00:19:1D:00:00:02': (200, 210, 220)
+}
+ADDRESSES = list(REMOTES)
+
+class AddressedBackend(SimulatedBackend):
+    def Wiimote(self, bdaddr=None):
+        self.motion_factory = lambda: StillMotion(acc=REMOTES[bdaddr], noise=0)
+        return super().Wiimote(bdaddr)
+
+def poll_until(runner, done, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        wm_states = runner.poll_players()
+        if done(wm_states):
+            return wm_states
+        time.sleep(0.02)
+    raise AssertionError('timed out')
+
+def test_player_record_paths():
+    assert WiimoteRunner.player_record_path('session.wmrec', 1) == 'session.wmrec'
+    assert WiimoteRunner.player_record_path('session.wmrec', 3) == 'session-p3.wmrec'
+
+def test_players_stay_separate():
+    runner = WiimoteRunner(backend=AddressedBackend(), players=2, addresses=ADDRESSES)
+    try:
+        wm_states = poll_until(runner, lambda wm_states: all(wm_state.history.count > 10 for wm_state in wm_states) and
+                               all(runner.get_connection_state(player) == ConnectionStates.CONNECTED for player in (1, 2)))
+        assert runner.poll() is wm_states[0]
+        assert wm_states[0].shared_block.shm.name != wm_states[1].shared_block.shm.name
+        for wm_state, address in zip(wm_states, ADDRESSES):
+            assert wm_state.connected
+            assert wm_state.acc == REMOTES[address]
+            _, acc, _ = wm_state.history.last(wm_state.history.count)
+            assert np.all(acc == REMOTES[address])
+
+        # Player 2's handler dies: only player 2 is restarted, player 1 keeps receiving
+        runner.workers[1].wm_process.kill()
+        count = wm_states[0].history.count
+        poll_until(runner, lambda wm_states: not wm_states[1].connected)
+        assert wm_states[0].connected
+        assert wm_states[0].history.count > count
+        assert runner.get_metrics(1)['restarts'] == 0
+        assert runner.get_metrics(2)['restarts'] == 1
+
+        # ...and connects to the same remote again after the backoff
+        poll_until(runner, lambda wm_states: wm_states[1].connected)
+        assert wm_states[1].acc == REMOTES[ADDRESSES[1]]
+        assert wm_states[0].acc == REMOTES[ADDRESSES[0]]
+    finally:
+        runner.on_exit()
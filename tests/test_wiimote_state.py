@@ -0,0 +1,38 @@
+import numpy as np
+from wiimote.wiimote_state import WiimoteHistory, WiimoteSharedBlock, WiimoteState
+
+CONNECTED = WiimoteSharedBlock.STATUS_CONNECTED
+
+def write_samples(block, start, count):
+    for i in range(start, start + count):
+        block.write(CONNECTED, 0, (i % 256, 0, 0), float(i))
+
+def test_history_wraps_around():
+    history = WiimoteHistory(capacity=64)
+    for i in range(200):
+        history.write(i, float(i), (i % 256, 0, 0), 0)
+        history.count = i + 1
+    times, acc, _ = history.last(10)
+    assert times.tolist() == [float(i) for i in range(190, 200)]
+    assert acc[:, 0].tolist() == list(range(190, 200))
+    assert len(history.last(1000)[0]) == history.max_read
+    assert history.since(195)[0].tolist() == [195.0, 196.0, 197.0, 198.0, 199.0]
+
+# The handler keeps writing after the UI took its snapshot of the block, overwriting the oldest
+# slots. Everything the UI can read from that snapshot stays as it was
+def test_reads_stay_clear_of_later_writes():
+    block = WiimoteSharedBlock()
+    try:
+        write_samples(block, 0, 3 * WiimoteHistory.CAPACITY + 17)
+        wm_state = WiimoteState(block)
+        wm_state.refresh()
+        times, acc, _ = wm_state.history.window(1e9)
+        before = times.copy(), acc.copy()
+
+        write_samples(block, wm_state.history.count, WiimoteHistory.WRITE_MARGIN)
+        assert np.array_equal(times, before[0])
+        assert np.array_equal(acc, before[1])
+        assert np.all(np.diff(times) > 0)
+        assert times[-1] == wm_state.history.count - 1
+    finally:
+        block.close(unlink=True)
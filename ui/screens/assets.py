@@ -0,0 +1,94 @@
+import pygame
+from collections import OrderedDict
+from ui.screens.constants import Constants
+
+# Every screen is rebuilt on each transition, so images are shared through this cache instead
+# of being decoded and rescaled in every constructor. Cached surfaces are shared between
+# objects, so never draw onto them or change their alpha; copy() them first if needed.
+
+PIXEL_FORMAT_ALPHA = 'alpha'
+PIXEL_FORMAT_OPAQUE = 'opaque'
+
+class AssetCache:
+    MAX_BYTES = 192 * 1024 * 1024
+
+    def __init__(self, max_bytes=MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.used_bytes = 0
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        surf = self.entries.get(key)
+        if surf is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return surf
+
+    def put(self, key, surf):
+        if key in self.entries:
+            self.used_bytes -= self.surface_bytes(self.entries.pop(key))
+        self.entries[key] = surf
+        self.used_bytes += self.surface_bytes(surf)
+        # Evict least recently used entries, but always keep the one we just added
+        while self.used_bytes > self.max_bytes and len(self.entries) > 1:
+            _, evicted = self.entries.popitem(last=False)
+            self.used_bytes -= self.surface_bytes(evicted)
+
+    def clear(self):
+        self.entries.clear()
+        self.used_bytes = 0
+
+    @staticmethod
+    def surface_bytes(surf):
+        w, h = surf.get_size()
+        return w * h * surf.get_bytesize()
+
+asset_cache = AssetCache()
+
+def load_image(path, size=None, pixel_format=PIXEL_FORMAT_ALPHA):
+    if size is not None:
+        # pygame truncates float sizes when scaling, so do the same for the key
+        size = (int(size[0]), int(size[1]))
+    key = (path, size, pixel_format)
+    surf = asset_cache.get(key)
+    if surf is None:
+        if size is None:
+            surf = pygame.image.load(path)
+            surf = surf.convert_alpha() if pixel_format == PIXEL_FORMAT_ALPHA else surf.convert()
+        else:
+            surf = pygame.transform.scale(load_image(path, None, pixel_format), size)
+        asset_cache.put(key, surf)
+    return surf
+
+def image_size(path):
+    return load_image(path).get_size()
+
+# Fonts by (path, size). path None is pygame's default font
+fonts = {}
+
+def load_font(path, size):
+    key = (path, int(size))
+    font = fonts.get(key)
+    if font is None:
+        font = pygame.font.Font(path, int(size))
+        fonts[key] = font
+    return font
+
+# Rendered text gets its own, smaller cache so it can't push images out
+TEXT_CACHE_BYTES = 16 * 1024 * 1024
+text_cache = AssetCache(TEXT_CACHE_BYTES)
+
+# For text that is rendered the same way every time a screen is built. Text that changes every
+# frame should be rendered with load_font() directly, or it would just churn the cache
+def render_text(text, size, color, antialias=True, path=Constants.FONT_FILE):
+    size = int(size)
+    key = (text, size, tuple(pygame.Color(color)), antialias, path)
+    surf = text_cache.get(key)
+    if surf is None:
+        surf = load_font(path, size).render(text, antialias, color).convert_alpha()
+        text_cache.put(key, surf)
+    return surf
@@ -1,5 +1,11 @@
+from ui.screens.event_bus import UIEvents
+
 class Constants():
+    DISPLAY_SIZE = (1720, 880)
+
     DIALOG_IMG_FILE = 'assets/images/dialog.png'
+    VIDEO_FILE = 'assets/video/wuhu-island.webm'
+    FONT_FILE = 'assets/fonts/contb.ttf'
 
     DIALOG_OFFSET = 50
 
@@ -9,15 +15,15 @@ class Constants():
     ##########################################
     #                UI EVENTS               #
     ##########################################
-    EVENT_KEYDOWN = 'keydown-'
-    EVENT_WIIMOTE_DISCONNECTED = 'wiimote-disconnected'
+    EVENT_KEYDOWN = UIEvents.KEYDOWN
+    EVENT_WIIMOTE_DISCONNECTED = UIEvents.WIIMOTE_DISCONNECTED
 
-    EVENT_FADED_IN = 'faded-in'
-    EVENT_FROM_DIALOG = 'from-dialog'
-    EVENT_FROM_WHITE_SCREEN = 'from-white-screen'
-    EVENT_FROM_BLACK_SCREEN = 'from-black-screen'
+    EVENT_FADED_IN = UIEvents.FADED_IN
+    EVENT_FROM_DIALOG = UIEvents.FROM_DIALOG
+    EVENT_FROM_WHITE_SCREEN = UIEvents.FROM_WHITE_SCREEN
+    EVENT_FROM_BLACK_SCREEN = UIEvents.FROM_BLACK_SCREEN
 
-    EVENT_CALIBRATION_EXITING = 'calibration-exiting'
-    EVENT_CALIBRATION_DONE = 'calibration-done'
+    EVENT_CALIBRATION_EXITING = UIEvents.CALIBRATION_EXITING
+    EVENT_CALIBRATION_DONE = UIEvents.CALIBRATION_DONE
 
-    EVENT_HOME_READY = 'home-ready'
\ No newline at end of file
+    EVENT_HOME_READY = UIEvents.HOME_READY
\ No newline at end of file
@@ -1,3 +1,4 @@
+import numpy as np
 from math import cos, sin, pi
 
 # God bless https://easings.net
@@ -5,50 +6,169 @@ from math import cos, sin, pi
 def clamp(value, lower, upper):
     return lower if value < lower else upper if value > upper else value
 
+# The easings are called several times a frame, so they clamp inline and multiply instead of
+# calling clamp() and pow(): a Python call costs about as much as the curve itself
+
 def ease_none(x):
-    x = clamp(x, 0, 1)
-    return x / 1
+    return 0.0 if x < 0 else 1.0 if x > 1 else x * 1.0
 
 def ease_in_sine(x):
-    x = clamp(x, 0, 1)
+    x = 0 if x < 0 else 1 if x > 1 else x
     return 1 - cos(x * pi / 2)
 
 def ease_out_sine(x):
-    x = clamp(x, 0, 1)
+    x = 0 if x < 0 else 1 if x > 1 else x
     return sin(x * pi / 2)
 
 def ease_in_out_quad(x):
-    x = clamp(x, 0, 1)
-    return 2 * pow(x, 2) if x < 0.5 else 1 - pow(-2 * x + 2, 2) / 2
+    x = 0 if x < 0 else 1 if x > 1 else x
+    if x < 0.5:
+        return 2 * x * x
+    y = -2 * x + 2
+    return 1 - y * y / 2
 
 def ease_out_cubic(x):
-    x = clamp(x, 0, 1)
-    return 1 - pow(1 - x, 3)
+    x = 0 if x < 0 else 1 if x > 1 else x
+    y = 1 - x
+    return 1 - y * y * y
 
 def ease_in_out_cubic(x):
-    x = clamp(x, 0, 1)
-    return 4 * pow(x, 3) if x < 0.5 else 1 - pow(-2 * x + 2, 3) / 2
+    x = 0 if x < 0 else 1 if x > 1 else x
+    if x < 0.5:
+        return 4 * x * x * x
+    y = -2 * x + 2
+    return 1 - y * y * y / 2
 
 def ease_in_out_quart(x):
-    x = clamp(x, 0, 1)
-    return 8 * pow(x, 4) if x < 0.5 else 1 - pow(-2 * x + 2, 4) / 2
+    x = 0 if x < 0 else 1 if x > 1 else x
+    if x < 0.5:
+        x2 = x * x
+        return 8 * x2 * x2
+    y = -2 * x + 2
+    y2 = y * y
+    return 1 - y2 * y2 / 2
 
 def ease_in_out_quint(x):
-    x = clamp(x, 0, 1)
-    return 16 * pow(x, 5) if x < 0.5 else 1 - pow(-2 * x + 2, 5) / 2
+    x = 0 if x < 0 else 1 if x > 1 else x
+    if x < 0.5:
+        x2 = x * x
+        return 16 * x2 * x2 * x
+    y = -2 * x + 2
+    y2 = y * y
+    return 1 - y2 * y2 * y / 2
 
 def ease_out_back(x):
-    x = clamp(x, 0, 1)
+    x = 0 if x < 0 else 1 if x > 1 else x
     c1 = 1.70158
     c3 = c1 + 1
-    return 1 + c3 * pow(x - 1, 3) + c1 * pow(x - 1, 2)
+    y = x - 1
+    y2 = y * y
+    return 1 + c3 * y2 * y + c1 * y2
 
 def ease_out_elastic(x):
-    x = clamp(x, 0, 1)
+    x = 0 if x < 0 else 1 if x > 1 else x
     c = (2 * pi) / 3
     if x == 0:
         return 0
     elif x == 1:
         return 1
     else:
-        return pow(2, -10 * x) * sin((x * 10 - 0.75) * c) + 1
\ No newline at end of file
+        return pow(2, -10 * x) * sin((x * 10 - 0.75) * c) + 1
+
+# NumPy forms of the easings above, evaluating a whole array of progress values in one call
+# (e.g. to bake an animation curve)
+
+def ease_none_array(x):
+    return np.clip(x, 0, 1)
+
+def ease_in_sine_array(x):
+    x = np.clip(x, 0, 1)
+    return 1 - np.cos(x * pi / 2)
+
+def ease_out_sine_array(x):
+    x = np.clip(x, 0, 1)
+    return np.sin(x * pi / 2)
+
+def ease_in_out_quad_array(x):
+    x = np.clip(x, 0, 1)
+    return np.where(x < 0.5, 2 * x ** 2, 1 - (-2 * x + 2) ** 2 / 2)
+
+def ease_out_cubic_array(x):
+    x = np.clip(x, 0, 1)
+    return 1 - (1 - x) ** 3
+
+def ease_in_out_cubic_array(x):
+    x = np.clip(x, 0, 1)
+    return np.where(x < 0.5, 4 * x ** 3, 1 - (-2 * x + 2) ** 3 / 2)
+
+def ease_in_out_quart_array(x):
+    x = np.clip(x, 0, 1)
+    return np.where(x < 0.5, 8 * x ** 4, 1 - (-2 * x + 2) ** 4 / 2)
+
+def ease_in_out_quint_array(x):
+    x = np.clip(x, 0, 1)
+    return np.where(x < 0.5, 16 * x ** 5, 1 - (-2 * x + 2) ** 5 / 2)
+
+def ease_out_back_array(x):
+    x = np.clip(x, 0, 1)
+    c1 = 1.70158
+    c3 = c1 + 1
+    return 1 + c3 * (x - 1) ** 3 + c1 * (x - 1) ** 2
+
+def ease_out_elastic_array(x):
+    x = np.clip(x, 0, 1)
+    c = (2 * pi) / 3
+    y = np.power(2.0, -10 * x) * np.sin((x * 10 - 0.75) * c) + 1
+    return np.where(x == 0, 0.0, np.where(x == 1, 1.0, y))
+
+ARRAY_EASINGS = {
+    ease_none: ease_none_array,
+    ease_in_sine: ease_in_sine_array,
+    ease_out_sine: ease_out_sine_array,
+    ease_in_out_quad: ease_in_out_quad_array,
+    ease_out_cubic: ease_out_cubic_array,
+    ease_in_out_cubic: ease_in_out_cubic_array,
+    ease_in_out_quart: ease_in_out_quart_array,
+    ease_in_out_quint: ease_in_out_quint_array,
+    ease_out_back: ease_out_back_array,
+    ease_out_elastic: ease_out_elastic_array,
+}
+
+# Builds a function that approximates easing from a table of it sampled at resolution + 1
+# evenly spaced points, interpolating linearly in between. That is off by at most
+# max|f''| / (8 * resolution^2), so at the default resolution every easing above stays within
+# EASING_TABLE_TOLERANCE of its analytic form (ease_out_elastic, by far the most curved, is the
+# one that sets it). Tables are built once per easing and resolution
+EASING_TABLE_RESOLUTION = 1024
+EASING_TABLE_TOLERANCE = 1e-4
+
+# A lookup costs about as much as the cheaper curves themselves, so only the easings whose
+# table benchmarks faster get one (python -m benchmarks.bench_easings)
+TABLE_EASINGS = (ease_out_elastic,)
+
+easing_tables = {}
+
+def build_easing_table(easing, resolution=EASING_TABLE_RESOLUTION):
+    key = (easing, resolution)
+    table = easing_tables.get(key)
+    if table is None:
+        array_easing = ARRAY_EASINGS[easing]
+        ys = array_easing(np.linspace(0, 1, resolution + 1))
+        # The last segment runs to the value just below 1, as ease_out_elastic snaps to exactly 1
+        ends = np.append(ys[1:-1], array_easing(np.nextafter(1.0, 0.0)))
+        # Plain lists index much faster than arrays for one value at a time
+        values = ys.tolist()
+        slopes = np.append(ends - ys[:-1], 0).tolist()
+
+        def table(x):
+            x = (0 if x < 0 else 1 if x > 1 else x) * resolution
+            i = int(x)
+            return values[i] + slopes[i] * (x - i)
+
+        table.__name__ = easing.__name__ + '_table'
+        easing_tables[key] = table
+    return table
+
+# The fastest scalar form of easing: its table for TABLE_EASINGS, otherwise easing itself
+def easing_table(easing, resolution=EASING_TABLE_RESOLUTION):
+    return build_easing_table(easing, resolution) if easing in TABLE_EASINGS else easing
@@ -0,0 +1,103 @@
+from enum import IntEnum
+
+class UIEvents(IntEnum):
+    KEYDOWN = 1 # Payload is the pygame key
+    WIIMOTE_DISCONNECTED = 2
+
+    FADED_IN = 3
+    FROM_DIALOG = 4
+    FROM_WHITE_SCREEN = 5
+    FROM_BLACK_SCREEN = 6
+
+    CALIBRATION_EXITING = 7
+    CALIBRATION_DONE = 8
+
+    HOME_READY = 9
+
+# Events waiting for one subscriber, in preallocated slots that are reused every frame.
+# Supports `event_id in queue`, which is how objects check their incoming events
+class EventQueue:
+    CAPACITY = 8
+
+    def __init__(self, capacity=CAPACITY):
+        self.ids = [0] * capacity
+        self.payloads = [None] * capacity
+        self.count = 0
+
+    def push(self, event_id, payload=None):
+        if self.count == len(self.ids):
+            self.ids += [0] * len(self.ids)
+            self.payloads += [None] * len(self.payloads)
+        self.ids[self.count] = event_id
+        self.payloads[self.count] = payload
+        self.count += 1
+
+    def __contains__(self, event_id):
+        return self.find(event_id) >= 0
+
+    def has(self, event_id, payload):
+        return self.find(event_id, payload) >= 0
+
+    # Index of the first matching event (with that payload, if one is given), or -1
+    def find(self, event_id, payload=None):
+        ids = self.ids
+        payloads = self.payloads
+        i = 0
+        while i < self.count:
+            if ids[i] == event_id and (payload is None or payloads[i] == payload):
+                return i
+            i += 1
+        return -1
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        while self.count > 0:
+            self.count -= 1
+            self.payloads[self.count] = None
+
+# What one object receives: `incoming` is read during this frame's update, `pending` collects
+# what is posted for the next frame
+class Subscription:
+    def __init__(self, subscriber_type, event_ids):
+        self.subscriber_type = subscriber_type
+        self.event_ids = tuple(event_ids)
+        self.incoming = EventQueue()
+        self.pending = EventQueue()
+
+    def swap(self):
+        self.incoming, self.pending = self.pending, self.incoming
+        self.pending.clear()
+
+# Routes events by ID straight to the queues of the objects that subscribed to them. Posting an
+# event a frame has no subscriber for costs one dict lookup, and nothing is allocated once the
+# queues have grown to the busiest frame
+class EventBus:
+    def __init__(self):
+        self.routes = {}
+        self.subscriptions = []
+
+    def subscribe(self, subscriber, event_ids):
+        subscription = Subscription(type(subscriber), event_ids)
+        for event_id in subscription.event_ids:
+            self.routes.setdefault(event_id, []).append(subscription)
+        self.subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        for event_id in subscription.event_ids:
+            self.routes[event_id].remove(subscription)
+        self.subscriptions.remove(subscription)
+
+    # target: only deliver to subscribers of this type. now: deliver to this frame's incoming
+    # events instead of the next frame's
+    def post(self, event_id, target=None, payload=None, now=False):
+        for subscription in self.routes.get(event_id, ()):
+            if target is None or subscription.subscriber_type is target:
+                (subscription.incoming if now else subscription.pending).push(event_id, payload)
+
+    # Starts a frame: what was posted last frame becomes incoming
+    def swap(self):
+        for subscription in self.subscriptions:
+            subscription.swap()
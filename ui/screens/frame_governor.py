@@ -0,0 +1,113 @@
+import time
+import pygame
+
+# Lowers the frame rate while nothing on screen moves. A frame is idle when nothing was redrawn,
+# no tween is running and neither pygame nor any Wiimote delivered input. After IDLE_AFTER
+# seconds of idle frames the runner renders at IDLE_FPS instead of FULL_FPS. The idle wait
+# blocks on pygame's event queue in WAKE_CHECK_TIME slices, checking the remotes' shared blocks
+# in between, so a key press or a remote moving ends it within a frame. The frame after it (and
+# every one after that, until things settle again) runs at the full rate.
+#   governor.end_frame(changed, pygame_events, wm_states, frame_work)
+#   dt = governor.wait(clock)
+# Objects timing themselves off dt rather than tweens still see the right dt.
+class FrameGovernor:
+    FULL_FPS = 60
+    IDLE_FPS = 10
+    IDLE_AFTER = 0.5 # Seconds of idle frames before dropping to the idle rate
+    ACC_THRESHOLD = 3 # Accelerometer change that counts as the remote moving, above sensor noise
+    WAKE_CHECK_TIME = 0.01 # Seconds between checks of the remotes during an idle wait
+
+    def __init__(self, full_fps=FULL_FPS, idle_fps=IDLE_FPS, idle_after=IDLE_AFTER):
+        self.full_fps = full_fps
+        self.idle_fps = idle_fps
+        self.idle_after = idle_after
+        self.idle_since = None # When the current run of idle frames started
+        self.is_idle = False
+        # (status, buttons, acc) of each remote when it last changed, for spotting the next change
+        self.wm_inputs = []
+        self.wm_states = () # The remotes of the last frame, checked while waiting
+        self.last_frame = time.monotonic()
+
+        self.idle_seconds = 0 # Time spent at the idle rate
+        self.idle_frames = 0
+        self.idle_frame_work = 0 # Seconds spent on the frames rendered at the idle rate
+
+    # The frame rate the runner is currently held to
+    @property
+    def fps(self):
+        return self.idle_fps if self.is_idle else self.full_fps
+
+    # True when a remote's status or buttons changed, or it moved more than ACC_THRESHOLD on any
+    # axis, since the last change. Remembers the new input when it did
+    def wm_changed(self, wm_states):
+        inputs = [wm_state.peek() for wm_state in wm_states]
+        if len(inputs) != len(self.wm_inputs):
+            self.wm_inputs = inputs
+            return True
+        changed = False
+        for i, (status, buttons, acc) in enumerate(inputs):
+            last_status, last_buttons, last_acc = self.wm_inputs[i]
+            if status != last_status or buttons != last_buttons or \
+                    max(abs(axis - last_axis) for axis, last_axis in zip(acc, last_acc)) > self.ACC_THRESHOLD:
+                self.wm_inputs[i] = inputs[i]
+                changed = True
+        return changed
+
+    # changed: whether the frame redrew anything or has a tween running
+    # frame_work: seconds the frame took to update and draw, not counting preloading
+    def end_frame(self, changed, pygame_events, wm_states, frame_work):
+        # Always check the remotes, so their last input is up to date when the frame is idle
+        self.wm_states = wm_states
+        wm_changed = self.wm_changed(wm_states)
+        if self.is_idle:
+            self.idle_frames += 1
+            self.idle_frame_work += frame_work
+
+        now = time.monotonic()
+        if changed or wm_changed or len(pygame_events) > 0:
+            self.idle_since = None
+        elif self.idle_since is None:
+            self.idle_since = now
+        self.is_idle = self.idle_since is not None and now - self.idle_since >= self.idle_after
+
+    # Waits for the next frame like clock.tick(), and returns the milliseconds since the last one
+    def wait(self, clock):
+        was_idle = self.is_idle
+        if not self.is_idle:
+            dt = clock.tick(self.full_fps)
+        else:
+            next_frame = self.last_frame + 1 / self.idle_fps
+            while True:
+                timeout = min(next_frame - time.monotonic(), self.WAKE_CHECK_TIME)
+                if timeout <= 0:
+                    break
+                # wait(0) would block until the next event
+                event = pygame.event.wait(max(int(timeout * 1000), 1))
+                if event.type != pygame.NOEVENT:
+                    pygame.event.post(event) # Left for the runner's event loop
+                    break
+                if self.wm_changed(self.wm_states):
+                    # Back to the full rate from the next frame, which the input makes busy anyway
+                    self.idle_since = None
+                    self.is_idle = False
+                    break
+            dt = clock.tick()
+        now = time.monotonic()
+        if was_idle:
+            self.idle_seconds += now - self.last_frame
+        self.last_frame = now
+        return dt
+
+    # The frames the idle rate skipped, and the CPU time that saved: what rendering them would
+    # have cost at the measured cost of an idle frame
+    def metrics(self):
+        skipped = max(self.idle_seconds * self.full_fps - self.idle_frames, 0)
+        frame_work = self.idle_frame_work / self.idle_frames if self.idle_frames > 0 else 0
+        return {
+            'fps': self.fps,
+            'idle': self.is_idle,
+            'idle_seconds': self.idle_seconds,
+            'idle_frames': self.idle_frames,
+            'frames_skipped': int(skipped),
+            'cpu_saved': skipped * frame_work
+        }
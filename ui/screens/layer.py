@@ -0,0 +1,51 @@
+import pygame
+
+# A surface composited from named children that is only redrawn when one of them changes, and
+# faded by setting its alpha at blit time. Children are drawn in the order they were first set.
+# A child is an image or another Layer. Images are only blitted, never changed, so cached assets
+# can be used directly.
+class Layer:
+    def __init__(self, size, alpha=255):
+        self.surf = pygame.Surface(size, pygame.SRCALPHA).convert_alpha()
+        self.children = {}
+        self.alpha = int(alpha)
+        self.dirty = True # The contents need redrawing
+        self.changed = True # Looks different from the last time it was drawn (contents or alpha)
+
+    def get_size(self):
+        return self.surf.get_size()
+
+    # image None hides the child but keeps its place in the drawing order
+    def set(self, name, image, pos=(0, 0)):
+        child = self.children.get(name)
+        if child is None or child[0] is not image or child[1] != pos:
+            self.children[name] = (image, pos)
+            self.dirty = True
+            self.changed = True
+
+    def set_alpha(self, alpha):
+        alpha = int(alpha)
+        if alpha != self.alpha:
+            self.alpha = alpha
+            self.changed = True
+
+    def is_dirty(self):
+        return self.dirty or any(isinstance(image, Layer) and image.changed for image, _ in self.children.values())
+
+    def rebuild(self):
+        self.surf.fill((0, 0, 0, 0))
+        for image, pos in self.children.values():
+            if isinstance(image, Layer):
+                image.draw(self.surf, pos)
+            elif image is not None:
+                self.surf.blit(image, pos)
+        self.dirty = False
+
+    def draw(self, target, pos):
+        if self.is_dirty():
+            self.rebuild()
+        self.changed = False
+        if self.alpha <= 0:
+            return
+        self.surf.set_alpha(self.alpha)
+        target.blit(self.surf, pos)
@@ -0,0 +1,142 @@
+import csv
+import os
+import time
+import numpy as np
+import pygame
+from ui.screens.assets import load_font
+
+# Opt-in frame profiler. Screens and the runner time their sections with add(), samples are
+# summed per frame (a screen draws once per dirty rect) and end_frame() stores each total in a
+# rolling window, from which the overlay and the CSV report p50/p99. Screens skip all of this
+# when their profiler is None.
+#   profiler.add('update', 'UIObjTitle', seconds)
+# Sections are 'update' and 'draw' named by UIObject class, and 'runner' for the rest of the
+# frame (fill, display_update, clock_wait, ...).
+
+class SampleWindow:
+    def __init__(self, size):
+        self.samples = np.zeros(size)
+        self.index = 0
+        self.count = 0
+
+    def push(self, value):
+        self.samples[self.index] = value
+        self.index = (self.index + 1) % len(self.samples)
+        if self.count < len(self.samples):
+            self.count += 1
+
+    # (p50, p99, mean, max) in seconds
+    def stats(self):
+        samples = self.samples[:self.count]
+        p50, p99 = np.percentile(samples, (50, 99))
+        return p50, p99, samples.mean(), samples.max()
+
+class FrameProfiler:
+    WINDOW = 600 # Frames, 10 seconds at 60 FPS
+    CSV_INTERVAL = 10 # Seconds between CSV writes
+    OVERLAY_KEY = pygame.K_F3
+    OVERLAY_REFRESH = 0.5 # Seconds between overlay redraws
+    OVERLAY_ROWS = 16
+    OVERLAY_FONT_SIZE = 20
+    OVERLAY_POS = (10, 10)
+
+    CSV_HEADER = ('time', 'section', 'name', 'p50_ms', 'p99_ms', 'mean_ms', 'max_ms', 'frames')
+
+    def __init__(self, window=WINDOW, csv_path=None, csv_interval=CSV_INTERVAL, show_overlay=False):
+        self.window = window
+        self.windows = {}
+        self.frame = {}
+        self.frames = 0
+
+        self.csv_path = csv_path
+        self.csv_interval = csv_interval
+        self.start_time = time.perf_counter()
+        self.last_csv_time = self.start_time
+
+        self.show_overlay = show_overlay
+        self.overlay = None
+        self.overlay_time = 0
+        self.font = None
+
+    def add(self, section, name, seconds):
+        key = (section, name)
+        self.frame[key] = self.frame.get(key, 0) + seconds
+
+    def end_frame(self):
+        windows = self.windows
+        for key, seconds in self.frame.items():
+            window = windows.get(key)
+            if window is None:
+                window = SampleWindow(self.window)
+                windows[key] = window
+            window.push(seconds)
+        self.frame.clear()
+        self.frames += 1
+
+        if self.csv_path is not None and time.perf_counter() - self.last_csv_time >= self.csv_interval:
+            self.write_csv()
+
+    # Rows of (section, name, p50, p99, mean, max, frames), slowest p99 first
+    def stats(self):
+        rows = [key + window.stats() + (window.count,) for key, window in self.windows.items()]
+        rows.sort(key=lambda row: row[3], reverse=True)
+        return rows
+
+    # Appends the current stats to the CSV, one row per section
+    def write_csv(self):
+        now = time.perf_counter()
+        self.last_csv_time = now
+        new_file = not os.path.exists(self.csv_path)
+        with open(self.csv_path, 'a', newline='') as file:
+            writer = csv.writer(file)
+            if new_file:
+                writer.writerow(self.CSV_HEADER)
+            elapsed = f'{now - self.start_time:.3f}'
+            for section, name, p50, p99, mean, max_time, frames in self.stats():
+                writer.writerow((elapsed, section, name, f'{p50 * 1000:.4f}', f'{p99 * 1000:.4f}',
+                                 f'{mean * 1000:.4f}', f'{max_time * 1000:.4f}', frames))
+
+    # Returns True if the overlay was turned off, so the screen under it needs redrawing
+    def handle_events(self, pygame_events):
+        for event in pygame_events:
+            if event.type == pygame.KEYDOWN and event.key == self.OVERLAY_KEY:
+                self.show_overlay = not self.show_overlay
+                self.overlay = None
+                if not self.show_overlay:
+                    return True
+        return False
+
+    def render_overlay(self, fps):
+        if self.font is None:
+            self.font = load_font(None, self.OVERLAY_FONT_SIZE)
+        rows = [(f'{fps:.1f} FPS', 'p50 ms', 'p99 ms')]
+        for section, name, p50, p99, _, _, _ in self.stats()[:self.OVERLAY_ROWS]:
+            rows.append((f'{section} {name}', f'{p50 * 1000:.2f}', f'{p99 * 1000:.2f}'))
+        renders = [[self.font.render(text, True, 'white') for text in row] for row in rows]
+
+        # Name column as wide as the longest name, numbers right-aligned in their columns
+        name_width = max(row[0].get_width() for row in renders) + 16
+        number_width = max(render.get_width() for row in renders for render in row[1:]) + 16
+        line_height = self.font.get_linesize()
+        self.overlay = pygame.Surface((name_width + number_width * 2 + 12, line_height * len(rows) + 12))
+        self.overlay.fill((20, 20, 20))
+        for i, (name, *numbers) in enumerate(renders):
+            y = 6 + i * line_height
+            self.overlay.blit(name, (6, y))
+            for j, number in enumerate(numbers):
+                self.overlay.blit(number, (6 + name_width + number_width * (j + 1) - number.get_width(), y))
+
+    # Draws the overlay on top of the frame and returns the area it covers, or None when hidden.
+    # The text is only re-rendered every OVERLAY_REFRESH seconds
+    def draw_overlay(self, display, fps):
+        if not self.show_overlay:
+            return None
+        now = time.perf_counter()
+        if self.overlay is None or now - self.overlay_time >= self.OVERLAY_REFRESH:
+            self.render_overlay(fps)
+            self.overlay_time = now
+        return display.blit(self.overlay, self.OVERLAY_POS)
+
+    def close(self):
+        if self.csv_path is not None and self.frames > 0:
+            self.write_csv()
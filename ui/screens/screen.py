@@ -1,4 +1,9 @@
+import pygame
+import time
 from enum import Enum
+from ui.screens.constants import Constants
+from ui.screens.event_bus import EventBus
+from ui.screens.timeline import Timeline
 
 class ScreenStates(Enum):
     INTRO_CONNECT_SCREEN = 1
@@ -7,6 +12,10 @@ class ScreenStates(Enum):
     HOME_SCREEN = 4
 
 class Screen:
+    # Past this many separate areas, or this share of the display, just redraw everything
+    MAX_DIRTY_RECTS = 8
+    MAX_DIRTY_AREA = 0.5
+
     @property
     def screen_state(self):
         return None
@@ -15,38 +24,144 @@ class Screen:
     def background_color(self):
         return 'black'
 
-    def __init__(self, display, init_events):
+    # build=False leaves the objects to build_step(), so a preloaded screen can be built a piece
+    # at a time
+    def __init__(self, display, init_events, build=True):
         self.display = display
         self.display_size = display.get_size()
         self.active_objs = []
-        self.events = {}
+        self.redraw_all = True
+        # Objects declare their fades and moves here, it's advanced once per frame before them
+        self.timeline = Timeline()
+        # Events objects return are delivered on the next frame to objects of the class they name
+        self.bus = EventBus()
+        self.subscribed = False
+        # A FrameProfiler set by the runner to time each object, None when not profiling
+        self.profiler = None
+        self.pending_objs = self.build_objs(init_events)
+        self.build_steps = 0 # build_step() calls so far
+        if build:
+            self.finish_build()
+
+    # Screens yield their objects in draw order, each one is created when the previous is built
+    def build_objs(self, init_events):
+        return iter(())
+
+    # Creates the next object. Returns False once every object is built
+    def build_step(self):
+        if self.pending_objs is None:
+            return False
+        self.build_steps += 1
+        obj = next(self.pending_objs, None)
+        if obj is None:
+            self.pending_objs = None
+            return False
+        self.active_objs.append(obj)
+        return True
+
+    def finish_build(self):
+        while self.build_step():
+            pass
+
+    @property
+    def built(self):
+        return self.pending_objs is None
+
+    def subscribe_objs(self):
+        for obj in self.active_objs:
+            if obj.subscription is None:
+                obj.subscription = self.bus.subscribe(obj, obj.SUBSCRIBES_TO)
+        self.subscribed = True
 
-    def update(self, dt, pygame_events, wm_state):
-        upcoming_events = {}
+    # wm_states holds each remote's WiimoteState by player slot (index 0 is player 1), every
+    # object gets the state of its own slot
+    def update(self, dt, pygame_events, wm_states):
+        if not self.subscribed:
+            self.subscribe_objs()
+        bus = self.bus
+        bus.swap()
+        for event in pygame_events:
+            if event.type == pygame.KEYDOWN:
+                bus.post(Constants.EVENT_KEYDOWN, payload=event.key, now=True)
+        for event_class, event in self.timeline.update(dt):
+            bus.post(event, event_class, now=True)
+
+        profiler = self.profiler
         for obj in self.active_objs:
-            obj_events = []
-            obj_events += pygame_events
-            if type(obj) in self.events:
-                obj_events += [self.events[type(obj)]]
-            new_events = obj.update(dt, obj_events, wm_state)
-            if new_events is not None:
-                if isinstance(new_events, ScreenStates) or (len(new_events) > 0 and isinstance(new_events[0], ScreenStates)):
+            wm_state = wm_states[obj.player - 1]
+            if profiler is None:
+                new_events = obj.update(dt, obj.subscription.incoming, wm_state)
+            else:
+                start = time.perf_counter()
+                new_events = obj.update(dt, obj.subscription.incoming, wm_state)
+                profiler.add('update', type(obj).__name__, time.perf_counter() - start)
+            if new_events:
+                if isinstance(new_events, ScreenStates) or isinstance(new_events[0], ScreenStates):
                     return new_events
-                else:
-                    for new_event in new_events:
-                        event_class = new_event[0]
-                        if event_class in upcoming_events:
-                            upcoming_events[event_class] += new_event[1]
-                        else:
-                            upcoming_events[event_class] = new_event[1]
-        self.events = upcoming_events
+                for event_class, event in new_events:
+                    bus.post(event, event_class)
+
+    # Returns the merged areas to redraw this frame, [] if nothing changed, or None to redraw
+    # the whole display
+    def get_dirty_rects(self):
+        if self.redraw_all:
+            return None
+        rects = []
+        for obj in self.active_objs:
+            obj_rects = obj.get_dirty_rects()
+            if obj_rects is None:
+                return None
+            rects += obj_rects
+        return self.merge_dirty_rects(rects)
+
+    def merge_dirty_rects(self, rects):
+        display_rect = self.display.get_rect()
+        merged = []
+        for rect in rects:
+            # Positions are often fractional, so grow each rect to cover rounding on either side
+            rect = rect.inflate(4, 4).clip(display_rect)
+            if rect.width == 0 or rect.height == 0:
+                continue
+            i = rect.collidelist(merged)
+            while i != -1:
+                rect.union_ip(merged.pop(i))
+                i = rect.collidelist(merged)
+            merged.append(rect)
+
+        if len(merged) > self.MAX_DIRTY_RECTS:
+            merged = [merged[0].unionall(merged[1:])]
+        if sum(rect.width * rect.height for rect in merged) > display_rect.width * display_rect.height * self.MAX_DIRTY_AREA:
+            return None
+        return merged
 
     def draw(self):
+        profiler = self.profiler
         for obj in self.active_objs:
-            obj.draw(self.display)
+            if profiler is None:
+                obj.draw(self.display)
+            else:
+                start = time.perf_counter()
+                obj.draw(self.display)
+                profiler.add('draw', type(obj).__name__, time.perf_counter() - start)
 
     def clean(self):
+        self.redraw_all = False
         for i in range(len(self.active_objs) - 1, -1, -1):
             obj = self.active_objs[i]
+            obj.clear_dirty_rects()
             if obj.is_complete:
-                self.active_objs.pop(i)
\ No newline at end of file
+                self.active_objs.pop(i)
+                if obj.subscription is not None:
+                    self.bus.unsubscribe(obj.subscription)
+                obj.destroy()
+                # Whatever it covered needs repainting
+                self.redraw_all = True
+
+    def destroy(self):
+        if self.pending_objs is not None:
+            self.pending_objs.close()
+            self.pending_objs = None
+        for obj in self.active_objs:
+            obj.destroy()
+        self.active_objs = []
+        self.timeline.clear()
\ No newline at end of file
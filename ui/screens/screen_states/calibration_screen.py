@@ -1,9 +1,14 @@
+import os
 import pygame
 from enum import Enum
+from ui.screens.assets import load_image, image_size, render_text
 from ui.screens.constants import Constants
-from ui.screens.easings import ease_in_out_cubic, ease_in_out_quad, ease_out_sine, ease_out_elastic, ease_none
+from ui.screens.easings import ease_in_out_cubic, ease_in_out_quad, ease_out_sine, ease_out_elastic, ease_none, easing_table
+from ui.screens.layer import Layer
 from ui.screens.screen import Screen, ScreenStates
+from ui.screens.transform_cache import load_rotations, load_scales
 from ui.screens.ui_object import UIObject
+from wiimote.motion_detector import MotionDetector
 
 
 ######################################################
@@ -12,29 +17,30 @@ from ui.screens.ui_object import UIObject
 
 
 class UIObjFadeOut(UIObject):
+    TRACKS_DIRTY_RECTS = True
+    SUBSCRIBES_TO = (Constants.EVENT_CALIBRATION_DONE,)
+
     FADE_LENGTH = 1.5
 
-    def __init__(self, display_size):
+    def __init__(self, display_size, timeline):
         super().__init__()
         self.surf = pygame.Surface(display_size)
         self.surf.fill('#ffffff')
         self.surf.set_alpha(0)
-        self.fading = False
-        self.time = 0
+        self.timeline = timeline
+        self.fade = None
 
     def update(self, dt, incoming_events, wm_state):
-        if self.fading:
-            self.time += dt
-            progress = min(self.time / self.FADE_LENGTH, 1)
-            a = int(255 * ease_none(progress))
-            self.surf.set_alpha(a)
-            if progress >= 1:
+        if self.fade is not None:
+            self.surf.set_alpha(int(self.fade.value))
+            self.mark_dirty()
+            if self.fade.done:
                 if wm_state.connected:
                     return ScreenStates.HOME_SCREEN
                 else:
                     return (ScreenStates.INTRO_CONNECT_SCREEN, Constants.EVENT_FROM_WHITE_SCREEN)
         elif Constants.EVENT_CALIBRATION_DONE in incoming_events:
-            self.fading = True
+            self.fade = self.timeline.tween(self.FADE_LENGTH, 0, 255, ease_none)
         return []
 
     def draw(self, display):
@@ -54,14 +60,17 @@ class WiimotePlayerUI(UIObject):
     CALIBRATION_TEXT_ALPHA_TIME = 0.6
 
     WIIMOTE_ROTATION_SCALAR = 3
+    WIIMOTE_ROTATION_STEP = 1
     WIIMOTE_ROTATION_LERP = 0.9
 
-    CALIBRATION_ROT_THRESHOLD = 3
+    CALIBRATION_STILL_THRESHOLD = MotionDetector.STILL_THRESHOLD
     CALIBRATION_TIME = 4
 
     CALIBRATION_DONE_MOVE_TIME = 0.6
     CALIBRATION_DONE_WAIT_TIME = 1
 
+    PLAYER_IMG_FILE = 'assets/images/calibration/wiimote-player-{}.png'
+
     def pop_ease(self, pop_time):
         if pop_time > self.POP_TIME:
             pop_time = self.POP_TIME
@@ -72,47 +81,53 @@ class WiimotePlayerUI(UIObject):
         else:
             return ((1 - ease_out_sine((pop_time - grow_threshold) / (self.POP_TIME - grow_threshold))) * (self.POP_SCALE - 1)) + 1
 
-    def __init__(self, base_scale):
+    def __init__(self, base_scale, player=1):
         super().__init__()
+        self.player = player
         self.state = WiimotePlayerStates.ENTERING
 
         self.surf_size = (326 * base_scale, 252 * base_scale)
-        self.surf = pygame.Surface(self.surf_size, pygame.SRCALPHA)
-
-        player_one_img = pygame.image.load('assets/images/calibration/wiimote-player-1.png').convert_alpha()
-        self.player_one_size = player_one_img.get_size()
-        self.player_one_size = (self.player_one_size[0] * base_scale, self.player_one_size[1] * base_scale)
-        self.player_one_img = pygame.transform.scale(player_one_img, self.player_one_size)
-        self.player_one_pos = self.player_one_img.get_rect(centerx=self.surf_size[0] * 0.5, centery=5 + (self.player_one_size[1] * 0.5))
-
-        calibrating_dark_img = pygame.image.load('assets/images/calibration/calibrating-dark.png').convert_alpha()
-        calibrating_bright_img = pygame.image.load('assets/images/calibration/calibrating-bright.png').convert_alpha()
-        calibrating_ok_img = pygame.image.load('assets/images/calibration/calibrating-ok.png').convert_alpha()
-
-        calibrating_text_size = calibrating_dark_img.get_size() # All calibrating images should have the same size and the same position
+        self.layer = Layer(self.surf_size)
+
+        player_img_file = self.PLAYER_IMG_FILE.format(player)
+        if not os.path.exists(player_img_file):
+            player_img_file = self.PLAYER_IMG_FILE.format(1) # No badge drawn for this slot yet
+        self.player_size = image_size(player_img_file)
+        self.player_size = (self.player_size[0] * base_scale, self.player_size[1] * base_scale)
+        self.player_img = load_image(player_img_file, self.player_size)
+        self.player_pos = self.player_img.get_rect(centerx=self.surf_size[0] * 0.5, centery=5 + (self.player_size[1] * 0.5))
+        self.layer.set('player', self.player_img, self.player_pos)
+
+        calibrating_dark_img_file = 'assets/images/calibration/calibrating-dark.png'
+        calibrating_bright_img_file = 'assets/images/calibration/calibrating-bright.png'
+        calibrating_ok_img_file = 'assets/images/calibration/calibrating-ok.png'
+
+        calibrating_text_size = image_size(calibrating_dark_img_file) # All calibrating images should have the same size and the same position
         calibrating_text_size = (calibrating_text_size[0] * base_scale, calibrating_text_size[1] * base_scale)
         self.calibrating_text_pos = (10 * base_scale, 60 * base_scale)
 
-        self.calibrating_dark_img = pygame.transform.scale(calibrating_dark_img, calibrating_text_size)
+        self.calibrating_dark_img = load_image(calibrating_dark_img_file, calibrating_text_size)
 
-        self.calibrating_alpha_surf = pygame.Surface(calibrating_text_size, pygame.SRCALPHA).convert()
-        self.calibrating_alpha_surf_alpha = 0
-        self.calibrating_bright_img = pygame.transform.scale(calibrating_bright_img, calibrating_text_size)
+        self.calibrating_bright_img = load_image(calibrating_bright_img_file, calibrating_text_size)
+        self.calibrating_bright_layer = Layer(calibrating_text_size, 0)
+        self.calibrating_bright_layer.set('bright', self.calibrating_bright_img)
         self.calibrating_alpha_time = 0
 
-        self.calibrating_ok_img = pygame.transform.scale(calibrating_ok_img, calibrating_text_size)
+        self.calibrating_ok_img = load_image(calibrating_ok_img_file, calibrating_text_size)
+        self.layer.set('calibrating', self.calibrating_dark_img, self.calibrating_text_pos)
+        self.layer.set('calibrating_bright', self.calibrating_bright_layer, self.calibrating_text_pos)
 
-        wiimote_img = pygame.image.load('assets/images/calibration/wiimote.png').convert_alpha()
-        self.wiimote_size = wiimote_img.get_size()
+        wiimote_img_file = 'assets/images/calibration/wiimote.png'
+        self.wiimote_size = image_size(wiimote_img_file)
         self.wiimote_size = (self.wiimote_size[0] * base_scale, self.wiimote_size[1] * base_scale)
-        self.wiimote_orig_img = pygame.transform.scale(wiimote_img, self.wiimote_size)
+        self.wiimote_rotations = load_rotations(wiimote_img_file, self.wiimote_size, self.WIIMOTE_ROTATION_STEP)
         self.rotate_wiimote(0)
         self.wiimote_rot = 0
         self.wiimote_rot_target = 0
 
-        self.calibration_time = 0
-        self.last_wm_acc = None
+        self.motion = MotionDetector(still_threshold=self.CALIBRATION_STILL_THRESHOLD)
         self.wiimote_done_time = 0
+        self.wiimote_done_easing = easing_table(ease_out_elastic) # Eased every frame of the settle
 
     def calibration_bar_done_entering(self):
         self.state = WiimotePlayerStates.CALIBRATING
@@ -126,37 +141,30 @@ class WiimotePlayerUI(UIObject):
                 alpha_time_phase_idx = self.calibrating_alpha_time // self.CALIBRATION_TEXT_ALPHA_TIME
                 brightening = alpha_time_phase_idx % 2 == 0
                 x = self.calibrating_alpha_time % self.CALIBRATION_TEXT_ALPHA_TIME
-                self.calibrating_alpha_surf_alpha = int(ease_in_out_quad(x if brightening else (1 - x)) * 255)
+                self.calibrating_bright_layer.set_alpha(ease_in_out_quad(x if brightening else (1 - x)) * 255)
 
-                rot_delta = 0
-                if self.last_wm_acc is not None:
-                    for i in range(len(wm_state.acc)):
-                        rot_delta += abs(wm_state.acc[i] - self.last_wm_acc[i])
-                    self.wiimote_rot_target += rot_delta * self.WIIMOTE_ROTATION_SCALAR
-                    self.wiimote_rot = ((self.wiimote_rot_target - self.wiimote_rot) * (self.WIIMOTE_ROTATION_LERP * dt)) + self.wiimote_rot
-                self.last_wm_acc = wm_state.acc
+                self.motion.update(dt, wm_state)
+                self.wiimote_rot_target += self.motion.take_travel() * self.WIIMOTE_ROTATION_SCALAR
+                self.wiimote_rot = ((self.wiimote_rot_target - self.wiimote_rot) * (self.WIIMOTE_ROTATION_LERP * dt)) + self.wiimote_rot
 
                 if self.wiimote_rot != self.wiimote_rot_target:
-                    self.wiimote_img = pygame.transform.rotate(self.wiimote_orig_img.copy(), self.wiimote_rot)
-                    self.wiimote_pos = self.wiimote_img.get_rect(centerx=self.surf_size[0] * 0.5, centery=45 + (self.surf_size[1] * 0.5))
-
-                if rot_delta < self.CALIBRATION_ROT_THRESHOLD:
-                    self.calibration_time += dt
-                    if self.calibration_time >= self.CALIBRATION_TIME:
-                        self.wiimote_rot = self.wiimote_rot % 360
-                        if self.wiimote_rot < 0: self.wiimote_rot += 360
-                        if self.wiimote_rot > 180: self.wiimote_rot -= 360
-                        self.wiimote_rot_target = 0
-                        self.state = WiimotePlayerStates.CALIBRATING_DONE
-                        return [(UIObjInfoDialog, Constants.EVENT_CALIBRATION_DONE)]
-                else:
-                    self.calibration_time = 0
+                    self.rotate_wiimote(self.wiimote_rot)
+
+                if self.motion.is_still_for(self.CALIBRATION_TIME):
+                    self.wiimote_rot = self.wiimote_rot % 360
+                    if self.wiimote_rot < 0: self.wiimote_rot += 360
+                    if self.wiimote_rot > 180: self.wiimote_rot -= 360
+                    self.wiimote_rot_target = 0
+                    self.state = WiimotePlayerStates.CALIBRATING_DONE
+                    self.layer.set('calibrating', self.calibrating_ok_img, self.calibrating_text_pos)
+                    self.layer.set('calibrating_bright', None, self.calibrating_text_pos)
+                    return [(UIObjInfoDialog, Constants.EVENT_CALIBRATION_DONE)]
 
             case WiimotePlayerStates.CALIBRATING_DONE:
                 self.wiimote_done_time += dt
                 rot_x = self.wiimote_done_time / self.CALIBRATION_DONE_MOVE_TIME
                 if rot_x <= 1:
-                    wiimote_rot = ((self.wiimote_rot_target - self.wiimote_rot) * ease_out_elastic(rot_x)) + self.wiimote_rot
+                    wiimote_rot = ((self.wiimote_rot_target - self.wiimote_rot) * self.wiimote_done_easing(rot_x)) + self.wiimote_rot
                     self.rotate_wiimote(wiimote_rot)
                 elif self.wiimote_done_time / (self.CALIBRATION_DONE_MOVE_TIME + self.CALIBRATION_DONE_WAIT_TIME) >= 1:
                     self.is_complete = True
@@ -165,25 +173,9 @@ class WiimotePlayerUI(UIObject):
         return []
 
     def rotate_wiimote(self, rot):
-        self.wiimote_img = pygame.transform.rotate(self.wiimote_orig_img.copy(), rot)
+        self.wiimote_img = self.wiimote_rotations.get(rot)
         self.wiimote_pos = self.wiimote_img.get_rect(centerx=self.surf_size[0] * 0.5, centery=45 + (self.surf_size[1] * 0.5))
-
-    def create_draw(self):
-        self.surf.fill((0, 0, 0, 0))
-        self.surf.blit(self.player_one_img, self.player_one_pos)
-        if self.state != WiimotePlayerStates.CALIBRATING_DONE:
-            self.surf.blit(self.calibrating_dark_img, self.calibrating_text_pos)
-
-            if self.calibrating_alpha_surf_alpha >= 0:
-                self.calibrating_alpha_surf.fill((0, 0, 0, 0))
-                self.calibrating_alpha_surf.blit(self.calibrating_bright_img, (0, 0))
-                temp_surf = self.calibrating_alpha_surf.copy()
-                temp_surf.set_alpha(self.calibrating_alpha_surf_alpha)
-                self.surf.blit(temp_surf, self.calibrating_text_pos)
-        else:
-            self.surf.blit(self.calibrating_ok_img, self.calibrating_text_pos)
-        self.surf.blit(self.wiimote_img, self.wiimote_pos)
-        return self.surf
+        self.layer.set('wiimote', self.wiimote_img, self.wiimote_pos)
 
 ######################################################
 
@@ -193,32 +185,47 @@ class CalibrationBarStates(Enum):
     EXITING = 3
 
 class UIObjCalibrationBar(UIObject):
+    TRACKS_DIRTY_RECTS = True
+    SUBSCRIBES_TO = (Constants.EVENT_CALIBRATION_EXITING,)
+
     CALIBRATION_BAR_TOP_PERCENT = 0.623148148
 
-    def __init__(self, display_size):
+    # player: the slot of the remote being calibrated
+    def __init__(self, display_size, timeline, player=1):
         super().__init__()
+        self.player = player
         self.state = CalibrationBarStates.ENTERING
+        self.timeline = timeline
 
         self.calibration_bar_top_pos = display_size[1] * self.CALIBRATION_BAR_TOP_PERCENT
-        calibration_bar_img = pygame.image.load('assets/images/calibration/calibration-bar.png').convert_alpha()
-        calibration_bar_size = calibration_bar_img.get_size()
+        calibration_bar_img_file = 'assets/images/calibration/calibration-bar.png'
+        calibration_bar_size = image_size(calibration_bar_img_file)
         calibration_bar_height = display_size[1] - self.calibration_bar_top_pos
         scale = calibration_bar_height / calibration_bar_size[1]
         calibration_bar_size = (calibration_bar_size[0] * scale, calibration_bar_size[1] * scale)
-        self.calibration_bar_img = pygame.transform.scale(calibration_bar_img, calibration_bar_size)
+        self.calibration_bar_img = load_image(calibration_bar_img_file, calibration_bar_size)
         self.calibration_bar_start = display_size[1]
-        self.move_distance = abs(self.calibration_bar_start - self.calibration_bar_top_pos)
         self.calibration_bar_pos = self.calibration_bar_img.get_rect(centerx=display_size[0] * 0.5, top=self.calibration_bar_start)
-
-        self.move_time = 0
+        self.move = timeline.tween(Constants.CALIBRATION_ENTER_TIME, self.calibration_bar_start, self.calibration_bar_top_pos, ease_in_out_cubic)
 
         self.wiimote_pos = (784 * scale, 4 * scale)
-        self.wiimote = WiimotePlayerUI(scale)
+        self.wiimote = WiimotePlayerUI(scale, player)
+
+    def get_drawn_rects(self):
+        wiimote_rect = pygame.Rect((self.calibration_bar_pos[0] + self.wiimote_pos[0], self.calibration_bar_pos[1] + self.wiimote_pos[1]), self.wiimote.surf_size)
+        return [pygame.Rect(self.calibration_bar_pos), wiimote_rect]
 
     def update(self, dt, incoming_events, wm_state):
-        if Constants.EVENT_CALIBRATION_EXITING in incoming_events:
+        if Constants.EVENT_CALIBRATION_EXITING in incoming_events and self.state != CalibrationBarStates.EXITING:
+            self.move.cancel()
+            self.move = self.timeline.tween(Constants.CALIBRATION_EXIT_TIME, self.calibration_bar_pos[1], self.calibration_bar_start, ease_in_out_cubic)
             self.state = CalibrationBarStates.EXITING
 
+        # Covers where the bar was, the moving bar and the animating Wiimote
+        if self.state != CalibrationBarStates.IDLE or not self.wiimote.is_complete:
+            for rect in self.get_drawn_rects():
+                self.mark_dirty(rect)
+
         if self.state != CalibrationBarStates.EXITING and not self.wiimote.is_complete:
             wiimote_events = self.wiimote.update(dt, incoming_events, wm_state)
             if len(wiimote_events) > 0:
@@ -226,26 +233,25 @@ class UIObjCalibrationBar(UIObject):
 
         match self.state:
             case CalibrationBarStates.ENTERING:
-                self.move_time += dt
-                new_y = self.calibration_bar_start - (ease_in_out_cubic(self.move_time / Constants.CALIBRATION_ENTER_TIME) * self.move_distance)
-                self.calibration_bar_pos[1] = max(new_y, self.calibration_bar_top_pos)
-                if self.calibration_bar_pos[1] <= self.calibration_bar_top_pos:
-                    self.move_time = 0
+                self.calibration_bar_pos[1] = self.move.value
+                if self.move.done:
                     self.wiimote.calibration_bar_done_entering()
                     self.state = CalibrationBarStates.IDLE
             case CalibrationBarStates.IDLE:
                 pass
             case CalibrationBarStates.EXITING:
-                self.move_time += dt
-                new_y = self.calibration_bar_top_pos + (ease_in_out_cubic(self.move_time / Constants.CALIBRATION_EXIT_TIME) * self.move_distance)
-                self.calibration_bar_pos[1] = min(new_y, self.calibration_bar_start)
-                if self.calibration_bar_pos[1] >= self.calibration_bar_start:
+                self.calibration_bar_pos[1] = self.move.value
+                if self.move.done:
                     self.is_complete = True
+
+        if self.state != CalibrationBarStates.IDLE:
+            for rect in self.get_drawn_rects():
+                self.mark_dirty(rect)
         return []
 
     def draw(self, display):
         display.blit(self.calibration_bar_img, self.calibration_bar_pos)
-        display.blit(self.wiimote.create_draw(), (self.calibration_bar_pos[0] + self.wiimote_pos[0], self.calibration_bar_pos[1] + self.wiimote_pos[1]))
+        self.wiimote.layer.draw(display, (self.calibration_bar_pos[0] + self.wiimote_pos[0], self.calibration_bar_pos[1] + self.wiimote_pos[1]))
 
 ######################################################
 
@@ -257,19 +263,23 @@ class InfoDialogStates(Enum):
     GROWING = 5
 
 class UIObjInfoDialog(UIObject):
+    TRACKS_DIRTY_RECTS = True
+    SUBSCRIBES_TO = (Constants.EVENT_CALIBRATION_DONE,)
+
     FADE_IN_TIME = 1
     FADE_OUT_TIME = 0.3
 
     DIALOG_END_OFFSET_PERCENT = 0.037962963
     DIALOG_END_BOTTOM_PERCENT = 0.61944444
+    DIALOG_SCALE_STEPS = 16 # ~51 MB of frames between the full and the shrunk dialog
 
-    def __init__(self, display_size):
+    def __init__(self, display_size, timeline):
         super().__init__()
         self.state = InfoDialogStates.SHRINKING
+        self.timeline = timeline
 
-        dialog_img = pygame.image.load(Constants.DIALOG_IMG_FILE).convert_alpha()
-        self.orig_dialog_img = dialog_img
-        dialog_size = dialog_img.get_size()
+        self.orig_dialog_img = load_image(Constants.DIALOG_IMG_FILE)
+        dialog_size = self.orig_dialog_img.get_size()
         x_scale = (display_size[0] - (Constants.DIALOG_OFFSET * 2)) / dialog_size[0]
         y_scale = (display_size[1] - (Constants.DIALOG_OFFSET * 2)) / dialog_size[1]
         scale = min(x_scale, y_scale)
@@ -281,29 +291,38 @@ class UIObjInfoDialog(UIObject):
         self.end_dialog_size = (int(dialog_size[0] * end_scale), int(dialog_size[1] * end_scale))
         self.end_dialog_pos = ((display_size[0] - self.end_dialog_size[0]) / 2, display_size[1] * self.DIALOG_END_OFFSET_PERCENT)
 
-        self.dialog_img = pygame.transform.scale(dialog_img, self.start_dialog_size)
+        self.dialog_img = load_image(Constants.DIALOG_IMG_FILE, self.start_dialog_size)
+        # Shared by the shrink and the grow, which run between the same two sizes
+        self.dialog_scales = load_scales(Constants.DIALOG_IMG_FILE, self.start_dialog_size, self.end_dialog_size, self.DIALOG_SCALE_STEPS)
         self.dialog_pos = self.start_dialog_pos
+        # The cached frames are the sizes at the nearest of DIALOG_SCALE_STEPS, so the dialog moves
+        # by its centre: its edges stay within a quarter step of the exact size's and move together,
+        # instead of the right and bottom edges jumping a whole step
+        self.start_dialog_center = (self.start_dialog_pos[0] + self.start_dialog_size[0] / 2, self.start_dialog_pos[1] + self.start_dialog_size[1] / 2)
+        self.end_dialog_center = (self.end_dialog_pos[0] + self.end_dialog_size[0] / 2, self.end_dialog_pos[1] + self.end_dialog_size[1] / 2)
 
-        self.scale_time = 0
+        # How far the dialog is from its start (0) to its end (1) size and position
+        self.shrink = timeline.tween(Constants.CALIBRATION_ENTER_TIME, 0, 1, ease_in_out_cubic)
 
         self.alpha = 0
-        self.alpha_time = 0
-        self.alpha_surf = pygame.Surface(self.end_dialog_size, pygame.SRCALPHA)
-        self.alpha_surf.convert()
+        self.fade = None
+        self.layer = Layer(self.end_dialog_size, self.alpha)
 
-        lay_flat_img = pygame.image.load('assets/images/calibration/lay-flat_upscaled.png').convert_alpha()
-        lay_flat_size = lay_flat_img.get_size()
+        lay_flat_img_file = 'assets/images/calibration/lay-flat_upscaled.png'
+        lay_flat_size = image_size(lay_flat_img_file)
         lay_flat_size = (int(lay_flat_size[0] * end_scale * 0.5), int(lay_flat_size[1] * end_scale * 0.5))
         lay_flat_img_offset = (334, 37)
         self.lay_flat_pos = (lay_flat_img_offset[0] * end_scale, lay_flat_img_offset[1] * end_scale)
-        self.lay_flat_img_orig = pygame.transform.scale(lay_flat_img, lay_flat_size)
+        self.lay_flat_img_orig = load_image(lay_flat_img_file, lay_flat_size)
+        self.layer.set('lay_flat', self.lay_flat_img_orig, self.lay_flat_pos)
 
         font_size = int(72 * end_scale)
-        font = pygame.font.Font('assets/fonts/contb.ttf', font_size)
-        self.text1 = font.render('Place the Wii Remote on a', True, '#888888')
+        self.text1 = render_text('Place the Wii Remote on a', font_size, '#888888')
         self.text1_pos = self.text1.get_rect(centerx=self.end_dialog_size[0] * 0.5, centery=self.end_dialog_size[1] * 0.69)
-        self.text2 = font.render('flat surface and keep it still.', True, '#888888')
+        self.text2 = render_text('flat surface and keep it still.', font_size, '#888888')
         self.text2_pos = self.text2.get_rect(centerx=self.end_dialog_size[0] * 0.5, top=self.text1_pos[1] + font_size)
+        self.layer.set('text1', self.text1, self.text1_pos)
+        self.layer.set('text2', self.text2, self.text2_pos)
 
         self.calibrated = False
 
@@ -311,28 +330,27 @@ class UIObjInfoDialog(UIObject):
         if self.calibrated:
             return []
 
+        prev_state = self.state
+        prev_rect = pygame.Rect(self.dialog_pos, self.dialog_img.get_size())
+        new_events = self.update_dialog(dt, incoming_events, wm_state)
+        if prev_state != InfoDialogStates.IDLE or self.state != InfoDialogStates.IDLE:
+            self.mark_dirty(prev_rect)
+            self.mark_dirty(pygame.Rect(self.dialog_pos, self.dialog_img.get_size()))
+        return new_events
+
+    def update_dialog(self, dt, incoming_events, wm_state):
         match self.state:
             case InfoDialogStates.SHRINKING:
-                self.scale_time += dt
-                x = ease_in_out_cubic(self.scale_time / Constants.CALIBRATION_ENTER_TIME)
-                dialog_size = ((self.end_dialog_size[0] - self.start_dialog_size[0]) * x + self.start_dialog_size[0],
-                               (self.end_dialog_size[1] - self.start_dialog_size[1]) * x + self.start_dialog_size[1])
-                self.dialog_img = self.orig_dialog_img.copy()
-                self.dialog_img = pygame.transform.scale(self.dialog_img, dialog_size)
-                self.dialog_pos = ((self.end_dialog_pos[0] - self.start_dialog_pos[0]) * x + self.start_dialog_pos[0],
-                                   (self.end_dialog_pos[1] - self.start_dialog_pos[1]) * x + self.start_dialog_pos[1])
-                if x >= 1:
-                    self.scale_time = 0
+                self.set_dialog_shrink(self.shrink.value)
+                if self.shrink.done:
                     if wm_state.connected:
+                        self.fade = self.timeline.tween(self.FADE_IN_TIME, 0, 255)
                         self.state = InfoDialogStates.FADING_IN
                     else:
-                        self.state = InfoDialogStates.GROWING
-                        return [(UIObjCalibrationBar, Constants.EVENT_CALIBRATION_EXITING)]
+                        return self.grow()
             case InfoDialogStates.FADING_IN:
-                self.alpha_time += dt
-                self.alpha = min((self.alpha_time / self.FADE_IN_TIME) * 255, 255)
-                if self.alpha == 255:
-                    self.alpha_time = 0
+                self.alpha = self.fade.value
+                if self.fade.done:
                     self.state = InfoDialogStates.IDLE
             case InfoDialogStates.IDLE:
                 if Constants.EVENT_CALIBRATION_DONE in incoming_events:
@@ -340,37 +358,35 @@ class UIObjInfoDialog(UIObject):
                     return []
 
                 if not wm_state.connected:
+                    self.fade = self.timeline.tween(self.FADE_OUT_TIME, 255, 0)
                     self.state = InfoDialogStates.FADING_OUT
             case InfoDialogStates.FADING_OUT:
-                self.alpha_time += dt
-                self.alpha = max(((self.FADE_OUT_TIME - self.alpha_time) / self.FADE_OUT_TIME) * 255, 0)
-                if self.alpha == 0:
-                    self.state = InfoDialogStates.GROWING
-                    return [(UIObjCalibrationBar, Constants.EVENT_CALIBRATION_EXITING)]
+                self.alpha = self.fade.value
+                if self.fade.done:
+                    return self.grow()
             case InfoDialogStates.GROWING:
-                self.scale_time += dt
-                x = ease_in_out_cubic(self.scale_time / Constants.CALIBRATION_EXIT_TIME)
-                dialog_size = ((self.start_dialog_size[0] - self.end_dialog_size[0]) * x + self.end_dialog_size[0],
-                               (self.start_dialog_size[1] - self.end_dialog_size[1]) * x + self.end_dialog_size[1])
-                self.dialog_img = self.orig_dialog_img.copy()
-                self.dialog_img = pygame.transform.scale(self.dialog_img, dialog_size)
-                self.dialog_pos = ((self.start_dialog_pos[0] - self.end_dialog_pos[0]) * x + self.end_dialog_pos[0],
-                                   (self.start_dialog_pos[1] - self.end_dialog_pos[1]) * x + self.end_dialog_pos[1])
-                if x >= 1:
+                self.set_dialog_shrink(self.shrink.value)
+                if self.shrink.done:
                     return (ScreenStates.INTRO_CONNECT_SCREEN, Constants.EVENT_FROM_DIALOG)
         return []
 
+    def grow(self):
+        self.shrink = self.timeline.tween(Constants.CALIBRATION_EXIT_TIME, 1, 0, ease_in_out_cubic)
+        self.state = InfoDialogStates.GROWING
+        return [(UIObjCalibrationBar, Constants.EVENT_CALIBRATION_EXITING)]
+
+    def set_dialog_shrink(self, x):
+        self.dialog_img = self.dialog_scales.get(x)
+        img_size = self.dialog_img.get_size()
+        center = ((self.end_dialog_center[0] - self.start_dialog_center[0]) * x + self.start_dialog_center[0],
+                  (self.end_dialog_center[1] - self.start_dialog_center[1]) * x + self.start_dialog_center[1])
+        self.dialog_pos = (center[0] - img_size[0] / 2, center[1] - img_size[1] / 2)
+
     def draw(self, display):
         display.blit(self.dialog_img, self.dialog_pos)
 
-        if self.alpha >= 0:
-            self.alpha_surf.fill((0, 0, 0, 0))
-            self.alpha_surf.blit(self.lay_flat_img_orig, self.lay_flat_pos)
-            self.alpha_surf.blit(self.text1, self.text1_pos)
-            self.alpha_surf.blit(self.text2, self.text2_pos)
-            temp_surf = self.alpha_surf.copy()
-            temp_surf.set_alpha(self.alpha)
-            display.blit(temp_surf, self.dialog_pos)
+        self.layer.set_alpha(self.alpha)
+        self.layer.draw(display, self.dialog_pos)
 
 
 
@@ -388,10 +404,7 @@ class CalibrationScreen(Screen):
     def background_color(self):
         return '#525252'
 
-    def __init__(self, display, init_events):
-        super().__init__(display, init_events)
-        self.active_objs = [
-            UIObjInfoDialog(self.display_size),
-            UIObjCalibrationBar(self.display_size),
-            UIObjFadeOut(self.display_size)
-        ]
\ No newline at end of file
+    def build_objs(self, init_events):
+        yield UIObjInfoDialog(self.display_size, self.timeline)
+        yield UIObjCalibrationBar(self.display_size, self.timeline)
+        yield UIObjFadeOut(self.display_size, self.timeline)
\ No newline at end of file
@@ -1,11 +1,16 @@
 import pygame
-import cv2
 from enum import Enum
 from math import cos
+from ui.screens.assets import load_image, image_size, render_text
 from ui.screens.constants import Constants
 from ui.screens.easings import ease_in_sine, ease_out_sine
+from ui.screens.layer import Layer
 from ui.screens.screen import Screen, ScreenStates
+from ui.screens.transform_cache import load_scales
 from ui.screens.ui_object import UIObject
+from ui.screens.video_cache import CachedVideo
+from ui.screens.video_decoder import VideoDecoder
+from wiimote.motion_detector import MotionDetector
 
 
 
@@ -15,24 +20,23 @@ from ui.screens.ui_object import UIObject
 
 
 class UIObjIntroFade(UIObject):
+    TRACKS_DIRTY_RECTS = True
+
     INIT_WAIT_LENGTH = 0.5
     FADE_LENGTH = 1.5
 
-    def __init__(self, display_size):
+    def __init__(self, display_size, timeline):
         super().__init__()
         self.surf = pygame.Surface(display_size)
         self.surf.fill('#ffffff')
-        self.time = 0
+        self.fade = timeline.tween(self.FADE_LENGTH, 255, 0, ease_in_sine, delay=self.INIT_WAIT_LENGTH,
+                                   events=[(UIObjTitle, Constants.EVENT_FADED_IN)])
 
     def update(self, dt, incoming_events, wm_state):
-        self.time += dt
-        if self.time >= self.INIT_WAIT_LENGTH:
-            progress = min((self.time - self.INIT_WAIT_LENGTH) / self.FADE_LENGTH, 1)
-            a = int(255 * (1 - ease_in_sine(progress)))
-            self.surf.set_alpha(a)
-            if progress >= 1:
-                self.is_complete = True
-                return [(UIObjTitle, Constants.EVENT_FADED_IN)]
+        if self.fade.started:
+            self.surf.set_alpha(int(self.fade.value))
+            self.mark_dirty()
+            self.is_complete = self.fade.done
         return []
 
     def draw(self, display):
@@ -41,26 +45,27 @@ class UIObjIntroFade(UIObject):
 ######################################################
 
 class UIObjDisconnectedFadeOut(UIObject):
+    TRACKS_DIRTY_RECTS = True
+    SUBSCRIBES_TO = (Constants.EVENT_WIIMOTE_DISCONNECTED,)
+
     FADE_LENGTH = 0.5
 
-    def __init__(self, display_size):
+    def __init__(self, display_size, timeline):
         super().__init__()
         self.surf = pygame.Surface(display_size)
         self.surf.fill('#ffffff')
         self.surf.set_alpha(0)
-        self.fading = False
-        self.time = 0
+        self.timeline = timeline
+        self.fade = None
 
     def update(self, dt, incoming_events, wm_state):
-        if self.fading:
-            self.time += dt
-            progress = min(self.time / self.FADE_LENGTH, 1)
-            a = int(255 * ease_out_sine(progress))
-            self.surf.set_alpha(a)
-            if progress >= 1:
+        if self.fade is not None:
+            self.surf.set_alpha(int(self.fade.value))
+            self.mark_dirty()
+            if self.fade.done:
                 return (ScreenStates.INTRO_CONNECT_SCREEN, Constants.EVENT_FROM_WHITE_SCREEN)
         elif Constants.EVENT_WIIMOTE_DISCONNECTED in incoming_events:
-            self.fading = True
+            self.fade = self.timeline.tween(self.FADE_LENGTH, 0, 255, ease_out_sine)
         return []
 
     def draw(self, display):
@@ -75,83 +80,72 @@ class UIObjWelcomeInStates(Enum):
     FADE_AWAY = 4
 
 class UIObjWelcomeIn(UIObject):
+    TRACKS_DIRTY_RECTS = True
+    SUBSCRIBES_TO = (Constants.EVENT_HOME_READY,)
+
     FADE_IN_LENGTH = 1.5
     FADE_IN_ALPHA_MAX = 200
 
     MIN_PAUSE_TIME = 4
-    PAUSE_ROT_THRESHOLD = 3
-    PAUSE_ROT_TIME = 2
+    PAUSE_STILL_THRESHOLD = MotionDetector.STILL_THRESHOLD
+    PAUSE_STILL_TIME = 2
 
     FADE_AWAY_LENGTH = 2
 
-    def __init__(self, display_size):
+    def __init__(self, display_size, timeline):
         super().__init__()
         self.state = UIObjWelcomeInStates.WAITING_FOR_ACTIVATION
+        self.timeline = timeline
 
         self.fade_surf = pygame.Surface(display_size).convert_alpha()
         self.fade_surf.fill('#000000')
         self.fade_surf.set_alpha(0)
 
-        font1 = pygame.font.Font('assets/fonts/contb.ttf', 104)
-        self.text1 = font1.render('WELCOME TO WUHU ISLAND!', True, '#ffffff').convert_alpha()
+        self.text1 = render_text('WELCOME TO WUHU ISLAND!', 104, '#ffffff')
         self.text1_pos = self.text1.get_rect(centerx=display_size[0] * 0.5, bottom=display_size[1] * 0.5 - 5)
-        font2 = pygame.font.Font('assets/fonts/contb.ttf', 48)
-        self.text2 = font2.render('Please leave the Wii Remote on the table', True, '#ffffff').convert_alpha()
+        self.text2 = render_text('Please leave the Wii Remote on the table', 48, '#ffffff')
         self.text2_pos = self.text2.get_rect(centerx=display_size[0] * 0.5, top=display_size[1] * 0.5 + 5)
         self.text_surf = pygame.Surface(display_size, pygame.SRCALPHA).convert_alpha()
         self.text_surf.blit(self.text1, self.text1_pos)
         self.text_surf.blit(self.text2, self.text2_pos)
         self.text_surf.set_alpha(0)
 
-        self.time = 0
+        self.fade = None
+        self.pause = None
 
-        self.last_wm_acc = None
-        self.acc_check_time = 0
+        self.motion = MotionDetector(still_threshold=self.PAUSE_STILL_THRESHOLD)
 
     def update(self, dt, incoming_events, wm_state):
         match self.state:
             case UIObjWelcomeInStates.WAITING_FOR_ACTIVATION:
                 if Constants.EVENT_HOME_READY in incoming_events:
+                    self.fade = self.timeline.tween(self.FADE_IN_LENGTH, 0, 1, ease_in_sine)
                     self.state = UIObjWelcomeInStates.FADING_IN
             case UIObjWelcomeInStates.FADING_IN:
-                self.time += dt
-                progress = min(self.time / self.FADE_IN_LENGTH, 1)
-                x = ease_in_sine(progress)
+                x = self.fade.value
                 self.fade_surf.set_alpha(int(self.FADE_IN_ALPHA_MAX * x))
                 self.text_surf.set_alpha(int(255 * x))
-                if progress >= 1:
-                    self.time = 0
+                self.mark_dirty()
+                if self.fade.done:
+                    self.pause = self.timeline.tween(self.MIN_PAUSE_TIME)
                     self.state = UIObjWelcomeInStates.PAUSING
             case UIObjWelcomeInStates.PAUSING:
-                self.time += dt
-
                 ready = False
                 if wm_state.connected:
-                    rot_delta = 0
-                    if self.last_wm_acc is not None:
-                        for i in range(len(wm_state.acc)):
-                            rot_delta += abs(wm_state.acc[i] - self.last_wm_acc[i])
-                    self.last_wm_acc = wm_state.acc
-
-                    if rot_delta < self.PAUSE_ROT_THRESHOLD:
-                        self.acc_check_time += dt
-                        if self.acc_check_time >= self.PAUSE_ROT_TIME:
-                            ready = True
-                    else:
-                        self.acc_check_time = 0
+                    self.motion.update(dt, wm_state)
+                    ready = self.motion.is_still_for(self.PAUSE_STILL_TIME)
                 else:
                     ready = True
 
-                if self.time >= self.MIN_PAUSE_TIME and ready:
-                    self.time = 0
+                if self.pause.done and ready:
+                    self.fade = self.timeline.tween(self.FADE_AWAY_LENGTH, 0, 1, ease_out_sine)
                     self.state = UIObjWelcomeInStates.FADE_AWAY
             case UIObjWelcomeInStates.FADE_AWAY:
-                self.time += dt
-                progress = min(self.time / self.FADE_AWAY_LENGTH, 1)
-                x = ease_out_sine(progress)
+                x = self.fade.value
                 self.fade_surf.set_alpha(int((255 - self.FADE_IN_ALPHA_MAX) * x + self.FADE_IN_ALPHA_MAX))
                 self.text_surf.set_alpha(int(255 * (1 - x)))
-                if progress >= 1:
+                self.mark_dirty()
+                if self.fade.done:
                     if wm_state.connected:
                         return (ScreenStates.INTRO_PICKUP_SCREEN, Constants.EVENT_FROM_BLACK_SCREEN)
                     else:
@@ -173,6 +167,9 @@ class UIObjTitleStates(Enum):
     FADING_OUT = 4
 
 class UIObjTitle(UIObject):
+    TRACKS_DIRTY_RECTS = True
+    SUBSCRIBES_TO = (Constants.EVENT_FADED_IN,)
+
     MOVE_TIME = 1.5
 
     PRESS_BTN_MOVE_SCALAR = 6
@@ -184,74 +181,83 @@ class UIObjTitle(UIObject):
     BTN_BALLOON_POP_TIME = 0.15
     BTN_BALLOON_POP_SCALAR = 0.3
 
+    POP_SCALE_STEPS = 16 # Frames cached per pop, which only lasts a few frames
+
     READY_TIME = 0.1
 
     FADE_OUT_TIME = 0.5
 
-    def __init__(self, display_size):
+    def __init__(self, display_size, timeline):
         super().__init__()
         self.state = UIObjTitleStates.WAITING_FOR_FADE
+        self.timeline = timeline
 
-        title_img = pygame.image.load('assets/images/home/wii-sports-resort-title.png').convert_alpha()
-        title_size = title_img.get_size()
+        title_img_file = 'assets/images/home/wii-sports-resort-title.png'
+        title_size = image_size(title_img_file)
         scale = display_size[0] / title_size[0]
         title_size = (int(title_size[0] * scale), int(title_size[1] * scale))
 
         self.alpha = 0
-        self.alpha_surf = pygame.Surface(title_size, pygame.SRCALPHA).convert_alpha()
-        self.title_img = pygame.transform.scale(title_img, title_size)
+        self.layer = Layer(title_size, self.alpha)
+        self.title_img = load_image(title_img_file, title_size)
         self.title_start_pos = display_size[0]
-        self.title_pos = self.alpha_surf.get_rect(left=display_size[0], bottom=display_size[1])
+        self.title_pos = self.title_img.get_rect(left=display_size[0], bottom=display_size[1])
+        self.layer.set('title', self.title_img)
 
-        self.swoop_time = 0
-        self.fade_out_time = 0
+        self.swoop = None
+        self.fade = None
 
-        press_btns_img = pygame.image.load('assets/images/home/press-a-and-b.png').convert_alpha()
-        press_btns_size = press_btns_img.get_size()
+        press_btns_img_file = 'assets/images/home/press-a-and-b.png'
+        press_btns_size = image_size(press_btns_img_file)
         self.press_btns_orig_size = (press_btns_size[0] * scale, press_btns_size[1] * scale)
-        self.press_btns_orig_img = pygame.transform.scale(press_btns_img, self.press_btns_orig_size)
-        self.press_btns_img = self.press_btns_orig_img.copy()
+        self.press_btns_orig_img = load_image(press_btns_img_file, self.press_btns_orig_size)
+        self.press_btns_img = self.press_btns_orig_img
+        press_btns_popped_size = (self.press_btns_orig_size[0], self.press_btns_orig_size[1] * (1 - self.PRESS_BTN_POP_SCALE_TO))
+        self.press_btns_scales = load_scales(press_btns_img_file, self.press_btns_orig_size, press_btns_popped_size,
+                                             self.POP_SCALE_STEPS, self.press_btns_orig_size).warmup()
         self.press_btns_anchor = (424 * scale, (276 * scale) + self.press_btns_orig_size[1]) # (Left, Bottom)
         self.press_btns_y_offset = 0
         self.press_btns_y_max_offset = self.PRESS_BTN_MOVE * scale
         self.press_btns_move_time = 0
         self.press_btns_pop_time = 0
 
-        a_img = pygame.image.load('assets/images/home/a-overlay.png').convert_alpha()
-        self.a_alpha_surf = pygame.Surface(title_size, pygame.SRCALPHA).convert_alpha()
-        self.a_alpha_surf.blit(pygame.transform.scale(a_img, title_size), (0,0))
-        self.a_alpha_surf.set_alpha(0)
-        self.a_alpha = 0
+        self.a_overlay = Layer(title_size, 0)
+        self.a_overlay.set('overlay', load_image('assets/images/home/a-overlay.png', title_size))
+        self.layer.set('a_overlay', self.a_overlay)
         self.a_pressed = False
         self.a_alpha_time = self.BTN_FADE_TIME
 
-        a_balloon = pygame.image.load('assets/images/home/a-balloon.png').convert_alpha()
-        a_balloon_invert = pygame.image.load('assets/images/home/a-balloon-invert.png').convert_alpha()
-        a_balloon_size = a_balloon.get_size()
+        a_balloon_file = 'assets/images/home/a-balloon.png'
+        a_balloon_invert_file = 'assets/images/home/a-balloon-invert.png'
+        a_balloon_size = image_size(a_balloon_file)
         self.a_balloon_orig_size = (a_balloon_size[0] * scale, a_balloon_size[1] * scale)
-        self.a_balloon = pygame.transform.scale(a_balloon, self.a_balloon_orig_size)
-        self.a_balloon_invert_orig = pygame.transform.scale(a_balloon_invert, self.a_balloon_orig_size)
-        self.a_balloon_invert = self.a_balloon_invert_orig.copy()
+        self.a_balloon = load_image(a_balloon_file, self.a_balloon_orig_size)
+        self.a_balloon_invert_orig = load_image(a_balloon_invert_file, self.a_balloon_orig_size)
+        self.a_balloon_invert = self.a_balloon_invert_orig
+        a_balloon_popped_size = (self.a_balloon_orig_size[0] * (1 + self.BTN_BALLOON_POP_SCALAR), self.a_balloon_orig_size[1] * (1 + self.BTN_BALLOON_POP_SCALAR))
+        self.a_balloon_scales = load_scales(a_balloon_invert_file, self.a_balloon_orig_size, a_balloon_popped_size,
+                                            self.POP_SCALE_STEPS, self.a_balloon_orig_size).warmup()
         self.a_balloon_anchor = (1404 * scale, 258 * scale)
         self.a_balloon_pos = self.a_balloon.get_rect(centerx=self.a_balloon_anchor[0], bottom=self.a_balloon_anchor[1])
         self.a_balloon_invert_pos = (self.a_balloon_pos[0], self.a_balloon_pos[1])
         self.a_balloon_pop_time = 0
 
-        b_img = pygame.image.load('assets/images/home/b-overlay.png').convert_alpha()
-        self.b_alpha_surf = pygame.Surface(title_size, pygame.SRCALPHA).convert_alpha()
-        self.b_alpha_surf.blit(pygame.transform.scale(b_img, title_size), (0,0))
-        self.b_alpha_surf.set_alpha(0)
-        self.b_alpha = 0
+        self.b_overlay = Layer(title_size, 0)
+        self.b_overlay.set('overlay', load_image('assets/images/home/b-overlay.png', title_size))
+        self.layer.set('b_overlay', self.b_overlay)
         self.b_pressed = False
         self.b_alpha_time = self.BTN_FADE_TIME
 
-        b_balloon = pygame.image.load('assets/images/home/b-balloon.png').convert_alpha()
-        b_balloon_invert = pygame.image.load('assets/images/home/b-balloon-invert.png').convert_alpha()
-        b_balloon_size = b_balloon.get_size()
+        b_balloon_file = 'assets/images/home/b-balloon.png'
+        b_balloon_invert_file = 'assets/images/home/b-balloon-invert.png'
+        b_balloon_size = image_size(b_balloon_file)
         self.b_balloon_orig_size = (b_balloon_size[0] * scale, b_balloon_size[1] * scale)
-        self.b_balloon = pygame.transform.scale(b_balloon, self.b_balloon_orig_size)
-        self.b_balloon_invert_orig = pygame.transform.scale(b_balloon_invert, self.b_balloon_orig_size)
-        self.b_balloon_invert = self.b_balloon_invert_orig.copy()
+        self.b_balloon = load_image(b_balloon_file, self.b_balloon_orig_size)
+        self.b_balloon_invert_orig = load_image(b_balloon_invert_file, self.b_balloon_orig_size)
+        self.b_balloon_invert = self.b_balloon_invert_orig
+        b_balloon_popped_size = (self.b_balloon_orig_size[0] * (1 + self.BTN_BALLOON_POP_SCALAR), self.b_balloon_orig_size[1] * (1 + self.BTN_BALLOON_POP_SCALAR))
+        self.b_balloon_scales = load_scales(b_balloon_invert_file, self.b_balloon_orig_size, b_balloon_popped_size,
+                                            self.POP_SCALE_STEPS, self.b_balloon_orig_size).warmup()
         self.b_balloon_anchor = (1394 * scale, 316 * scale)
         self.b_balloon_pos = self.b_balloon.get_rect(right=self.b_balloon_anchor[0], top=self.b_balloon_anchor[1])
         self.b_balloon_invert_pos = (self.b_balloon_pos[0], self.b_balloon_pos[1])
@@ -259,7 +265,35 @@ class UIObjTitle(UIObject):
 
         self.ready_time = 0
 
+        # Everything the bobbing press buttons can cover, relative to the title
+        self.press_btns_rect = pygame.Rect(self.press_btns_anchor[0], self.press_btns_anchor[1] - self.press_btns_orig_size[1],
+                                           self.press_btns_orig_size[0], self.press_btns_orig_size[1]).inflate(0, self.press_btns_y_max_offset * 2)
+
+    def get_btns_state(self):
+        return (self.a_pressed, self.a_alpha_time, self.a_balloon_pop_time, self.b_pressed, self.b_alpha_time, self.b_balloon_pop_time, self.press_btns_pop_time)
+
+    def get_title_rect(self):
+        return pygame.Rect((self.title_pos[0], self.title_pos[1]), self.layer.get_size())
+
     def update(self, dt, incoming_events, wm_state):
+        prev_state = self.state
+        prev_title_rect = self.get_title_rect()
+        prev_btns = self.get_btns_state()
+        new_events = self.update_title(dt, incoming_events, wm_state)
+
+        # The buttons and balloons only change on a press, the rest of the time just the
+        # press buttons bob up and down
+        if prev_state in (UIObjTitleStates.SWOOPING_IN, UIObjTitleStates.FADING_OUT):
+            self.mark_dirty(prev_title_rect)
+            self.mark_dirty(self.get_title_rect())
+        elif self.state == UIObjTitleStates.IDLE:
+            if prev_state != self.state or prev_btns != self.get_btns_state():
+                self.mark_dirty(self.get_title_rect())
+            else:
+                self.mark_dirty(self.press_btns_rect.move(self.title_pos[0], self.title_pos[1]))
+        return new_events
+
+    def update_title(self, dt, incoming_events, wm_state):
         if self.state != UIObjTitleStates.WAITING_FOR_FADE:
             self.press_btns_move_time += dt
             self.press_btns_y_offset = cos(self.press_btns_move_time * self.PRESS_BTN_MOVE_SCALAR) * self.press_btns_y_max_offset
@@ -267,14 +301,13 @@ class UIObjTitle(UIObject):
         match self.state:
             case UIObjTitleStates.WAITING_FOR_FADE:
                 if Constants.EVENT_FADED_IN in incoming_events:
+                    self.fade = self.timeline.tween(self.MOVE_TIME, 0, 255, ease_in_sine)
+                    self.swoop = self.timeline.tween(self.MOVE_TIME, self.title_start_pos, 0, ease_out_sine)
                     self.state = UIObjTitleStates.SWOOPING_IN
             case UIObjTitleStates.SWOOPING_IN:
-                self.swoop_time += dt
-                x = self.swoop_time / self.MOVE_TIME
-                self.alpha = ease_in_sine(x) * 255
-                new_pos_x = (1 - ease_out_sine(x)) * self.title_start_pos
-                self.title_pos = (new_pos_x, self.title_pos[1])
-                if x >= 1:
+                self.alpha = self.fade.value
+                self.title_pos = (self.swoop.value, self.title_pos[1])
+                if self.swoop.done:
                     self.state = UIObjTitleStates.IDLE
             case UIObjTitleStates.IDLE:
                 if not wm_state.connected:
@@ -288,13 +321,11 @@ class UIObjTitle(UIObject):
                     self.a_alpha_time += dt
                     x = min(self.a_alpha_time / self.BTN_FADE_TIME, 1)
                     alpha = (x if self.a_pressed else (1 - x)) * 255
-                    self.a_alpha_surf.set_alpha(alpha)
+                    self.a_overlay.set_alpha(alpha)
                 if self.a_pressed and self.a_balloon_pop_time < self.BTN_BALLOON_POP_TIME:
                     self.a_balloon_pop_time += dt
                     x = min(self.a_balloon_pop_time / self.BTN_BALLOON_POP_TIME, 1)
-                    scale = ((x if x < 0.5 else (1 - x)) * self.BTN_BALLOON_POP_SCALAR) + 1
-                    balloon_size = (self.a_balloon_orig_size[0] * scale, self.a_balloon_orig_size[1] * scale)
-                    self.a_balloon_invert = pygame.transform.scale(self.a_balloon_invert_orig.copy(), balloon_size)
+                    self.a_balloon_invert = self.a_balloon_scales.get(x if x < 0.5 else (1 - x))
                     self.a_balloon_invert_pos = self.a_balloon_invert.get_rect(centerx=self.a_balloon_anchor[0], bottom=self.a_balloon_anchor[1])
 
                 if (not self.b_pressed and wm_state.b_btn) or (self.b_pressed and not wm_state.b_btn):
@@ -305,36 +336,32 @@ class UIObjTitle(UIObject):
                     self.b_alpha_time += dt
                     x = min(self.b_alpha_time / self.BTN_FADE_TIME, 1)
                     alpha = (x if self.b_pressed else (1 - x)) * 255
-                    self.b_alpha_surf.set_alpha(alpha)
+                    self.b_overlay.set_alpha(alpha)
                 if self.b_pressed and self.b_balloon_pop_time < self.BTN_BALLOON_POP_TIME:
                     self.b_balloon_pop_time += dt
                     x = min(self.b_balloon_pop_time / self.BTN_BALLOON_POP_TIME, 1)
-                    scale = ((x if x < 0.5 else (1 - x)) * self.BTN_BALLOON_POP_SCALAR) + 1
-                    balloon_size = (self.b_balloon_orig_size[0] * scale, self.b_balloon_orig_size[1] * scale)
-                    self.b_balloon_invert = pygame.transform.scale(self.b_balloon_invert_orig.copy(), balloon_size)
+                    self.b_balloon_invert = self.b_balloon_scales.get(x if x < 0.5 else (1 - x))
                     self.b_balloon_invert_pos = self.b_balloon_invert.get_rect(right=self.b_balloon_anchor[0], top=self.b_balloon_anchor[1])
 
                 if self.a_pressed or self.b_pressed:
                     if self.press_btns_pop_time < self.PRESS_BTN_POP_TIME:
                         self.press_btns_pop_time += dt
                         x = min(self.press_btns_pop_time / self.PRESS_BTN_POP_TIME, 1)
-                        scale = 1 - ((x if x < 0.5 else (1 - x)) * self.PRESS_BTN_POP_SCALE_TO)
-                        press_btns_size = (self.press_btns_orig_size[0], self.press_btns_orig_size[1] * scale)
-                        self.press_btns_img = pygame.transform.scale(self.press_btns_orig_img.copy(), press_btns_size)
+                        self.press_btns_img = self.press_btns_scales.get(x if x < 0.5 else (1 - x))
                 elif self.press_btns_pop_time > 0:
                     self.press_btns_pop_time = 0
-                    self.press_btns_img = pygame.transform.scale(self.press_btns_orig_img.copy(), self.press_btns_orig_size)
+                    self.press_btns_img = self.press_btns_orig_img
 
                 if self.a_pressed and self.b_pressed:
                     self.ready_time += dt
                     if self.ready_time >= self.READY_TIME:
+                        self.fade = self.timeline.tween(self.FADE_OUT_TIME, 255, 0)
                         self.state = UIObjTitleStates.FADING_OUT
                 else:
                     self.ready_time = 0
             case UIObjTitleStates.FADING_OUT:
-                self.fade_out_time += dt
-                self.alpha = (1 - min(self.fade_out_time / self.FADE_OUT_TIME, 1)) * 255
-                if self.fade_out_time >= self.FADE_OUT_TIME:
+                self.alpha = self.fade.value
+                if self.fade.done:
                     self.is_complete = True
                     return [(UIObjWelcomeIn, Constants.EVENT_HOME_READY)]
         return []
@@ -343,57 +370,57 @@ class UIObjTitle(UIObject):
         if self.state == UIObjTitleStates.WAITING_FOR_FADE:
             return
 
-        if self.alpha > 0:
-            self.alpha_surf.fill((0, 0, 0, 0))
-            self.alpha_surf.blit(self.title_img, (0,0))
-            if self.a_alpha >= 0:
-                self.alpha_surf.blit(self.a_alpha_surf, (0,0))
-            if self.b_alpha >= 0:
-                self.alpha_surf.blit(self.b_alpha_surf, (0,0))
-            press_btns_pos = self.press_btns_img.get_rect(left=self.press_btns_anchor[0], bottom=self.press_btns_anchor[1] + self.press_btns_y_offset)
-            self.alpha_surf.blit(self.press_btns_img, press_btns_pos)
-            if self.a_pressed:
-                self.alpha_surf.blit(self.a_balloon_invert, self.a_balloon_invert_pos)
-            else:
-                self.alpha_surf.blit(self.a_balloon, self.a_balloon_pos)
-            if self.b_pressed:
-                self.alpha_surf.blit(self.b_balloon_invert, self.b_balloon_invert_pos)
-            else:
-                self.alpha_surf.blit(self.b_balloon, self.b_balloon_pos)
+        press_btns_pos = self.press_btns_img.get_rect(left=self.press_btns_anchor[0], bottom=self.press_btns_anchor[1] + self.press_btns_y_offset)
+        self.layer.set('press_btns', self.press_btns_img, press_btns_pos)
+        if self.a_pressed:
+            self.layer.set('a_balloon', self.a_balloon_invert, self.a_balloon_invert_pos)
+        else:
+            self.layer.set('a_balloon', self.a_balloon, self.a_balloon_pos)
+        if self.b_pressed:
+            self.layer.set('b_balloon', self.b_balloon_invert, self.b_balloon_invert_pos)
+        else:
+            self.layer.set('b_balloon', self.b_balloon, self.b_balloon_pos)
 
-            temp_surf = self.alpha_surf.copy()
-            temp_surf.set_alpha(self.alpha)
-            display.blit(temp_surf, self.title_pos)
+        self.layer.set_alpha(self.alpha)
+        self.layer.draw(display, self.title_pos)
 
 ######################################################
 
 class UIObjBackground(UIObject):
+    TRACKS_DIRTY_RECTS = True
+
     def __init__(self, display_size):
         super().__init__()
 
-        self.video = cv2.VideoCapture('assets/video/wuhu-island.webm')
-        self.can_show_video, video_image = self.video.read()
-        video_size = video_image.shape[1::-1]
-        video_x_scale = display_size[0] / video_size[0]
-        video_y_scale = display_size[1] / video_size[1]
-        video_scale = max(video_x_scale, video_y_scale)
-        self.video_size = (int(video_size[0] * video_scale), int(video_size[1] * video_scale))
-        self.video_pos = ((display_size[0] - self.video_size[0]) * 0.5, (display_size[1] - self.video_size[1]) * 0.5)
-
-        background_img = pygame.image.load('assets/images/home/wuhu-island.jpg').convert_alpha()
-        background_size = background_img.get_size()
+        # Play the baked frame cache if it's up to date, otherwise decode the video
+        self.video = CachedVideo.open(Constants.VIDEO_FILE, pygame.display.get_surface())
+        if self.video is None:
+            self.video = VideoDecoder(Constants.VIDEO_FILE, display_size)
+        self.video_pos = self.video.video_pos
+        self.video_surf = None
+        self.video_time = 0
+        self.can_show_video = False
+
+        background_img_file = 'assets/images/home/wuhu-island.jpg'
+        background_size = image_size(background_img_file)
         background_x_scale = display_size[0] / background_size[0]
         background_y_scale = display_size[1] / background_size[1]
         background_scale = max(background_x_scale, background_y_scale)
         background_size = (int(background_size[0] * background_scale), int(background_size[1] * background_scale))
-        self.background_img = pygame.transform.scale(background_img, background_size)
+        self.background_img = load_image(background_img_file, background_size)
         self.background_pos = self.background_img.get_rect(centerx=display_size[0] * 0.5, centery=display_size[1] * 0.5)
 
     def update(self, dt, incoming_events, wm_state):
-        self.can_show_video, video_image = self.video.read()
-        if self.can_show_video:
-            video_surf = pygame.image.frombuffer(video_image.tobytes(), video_image.shape[1::-1], 'BGR')
-            self.video_surf = pygame.transform.scale(video_surf, self.video_size)
+        # Keeps showing the last frame until the next one is due (or decoded)
+        self.video_time += dt
+        video_surf = self.video.get_frame(self.video_time)
+        if video_surf is not None:
+            self.video_surf = video_surf
+            self.mark_dirty()
+        can_show_video = self.video_surf is not None and not self.video.finished
+        if can_show_video != self.can_show_video:
+            self.can_show_video = can_show_video
+            self.mark_dirty()
         return []
 
     def draw(self, display):
@@ -402,6 +429,19 @@ class UIObjBackground(UIObject):
         else:
             display.blit(self.background_img, self.background_pos)
 
+    # Playback counters of the background video, for benchmarks and debugging
+    @property
+    def video_stats(self):
+        return {
+            'shown': self.video.frames_shown,
+            'dropped': self.video.frames_dropped,
+            'late': self.video.frames_late
+        }
+
+    def destroy(self):
+        self.video_surf = None
+        self.video.stop()
+
 
 
 ######################################################
@@ -418,12 +458,9 @@ class HomeScreen(Screen):
     def background_color(self):
         return '#000000'
 
-    def __init__(self, display, init_events):
-        super().__init__(display, init_events)
-        self.active_objs = [
-            UIObjBackground(self.display_size),
-            UIObjTitle(self.display_size),
-            UIObjIntroFade(self.display_size),
-            UIObjDisconnectedFadeOut(self.display_size),
-            UIObjWelcomeIn(self.display_size)
-        ]
\ No newline at end of file
+    def build_objs(self, init_events):
+        yield UIObjBackground(self.display_size)
+        yield UIObjTitle(self.display_size, self.timeline)
+        yield UIObjIntroFade(self.display_size, self.timeline)
+        yield UIObjDisconnectedFadeOut(self.display_size, self.timeline)
+        yield UIObjWelcomeIn(self.display_size, self.timeline)
\ No newline at end of file
@@ -1,8 +1,11 @@
 import pygame
 from enum import Enum
+from ui.screens.assets import load_image, image_size, render_text
 from ui.screens.constants import Constants
 from ui.screens.easings import ease_in_sine, ease_out_elastic
+from ui.screens.layer import Layer
 from ui.screens.screen import Screen, ScreenStates
+from ui.screens.transform_cache import load_scales
 from ui.screens.ui_object import UIObject
 
 
@@ -12,27 +15,26 @@ from ui.screens.ui_object import UIObject
 
 
 class UIObjIntroFade(UIObject):
+    TRACKS_DIRTY_RECTS = True
+
     INIT_WAIT_LENGTH = 0.25
     FADE_LENGTH = 1.5
 
-    def __init__(self, display_size, from_white_screen, from_black_screen):
+    def __init__(self, display_size, timeline, from_white_screen, from_black_screen):
         super().__init__()
         self.surf = pygame.Surface(display_size)
         color = '#525252'
         if from_white_screen: color = '#ffffff'
         if from_black_screen: color = '#000000'
         self.surf.fill(color)
-        self.time = 0
+        self.fade = timeline.tween(self.FADE_LENGTH, 255, 0, ease_in_sine, delay=self.INIT_WAIT_LENGTH,
+                                   events=[(UIObjConnectDialog, Constants.EVENT_FADED_IN)])
 
     def update(self, dt, incoming_events, wm_state):
-        self.time += dt
-        if self.time >= self.INIT_WAIT_LENGTH:
-            progress = min((self.time - self.INIT_WAIT_LENGTH) / self.FADE_LENGTH, 1)
-            a = int(255 * (1 - ease_in_sine(progress)))
-            self.surf.set_alpha(a)
-            if progress >= 1:
-                self.is_complete = True
-                return [(UIObjConnectDialog, Constants.EVENT_FADED_IN)]
+        if self.fade.started:
+            self.surf.set_alpha(int(self.fade.value))
+            self.mark_dirty()
+            self.is_complete = self.fade.done
         return []
 
     def draw(self, display):
@@ -48,46 +50,55 @@ class ConnectDialogStates(Enum):
     FADING_OUT = 5
 
 class UIObjConnectDialog(UIObject):
+    TRACKS_DIRTY_RECTS = True
+    SUBSCRIBES_TO = (Constants.EVENT_FADED_IN,)
+
     FADE_IN_TIME = 0.5
     FADE_OUT_TIME = 1
     CONNECTED_BOUNCE_TIME = 0.75
     CONNECTED_TIME_OFFSET = 0.5
+    CONNECTED_SCALE_STEPS = 45
 
-    def __init__(self, display_size, from_dialog):
+    def __init__(self, display_size, timeline, from_dialog):
         super().__init__()
         self.state = ConnectDialogStates.FADING_IN if from_dialog else ConnectDialogStates.WAITING_FOR_FADE
+        self.timeline = timeline
 
-        dialog_img = pygame.image.load(Constants.DIALOG_IMG_FILE).convert_alpha()
-        dialog_size = dialog_img.get_size()
+        dialog_size = image_size(Constants.DIALOG_IMG_FILE)
         x_scale = (display_size[0] - (Constants.DIALOG_OFFSET * 2)) / dialog_size[0]
         y_scale = (display_size[1] - (Constants.DIALOG_OFFSET * 2)) / dialog_size[1]
         scale = min(x_scale, y_scale)
         dialog_size = (int(dialog_size[0] * scale), int(dialog_size[1] * scale))
         self.dialog_pos = ((display_size[0] - dialog_size[0]) / 2, (display_size[1] - dialog_size[1]) / 2)
-        self.dialog_img = pygame.transform.scale(dialog_img, dialog_size)
+        self.dialog_rect = pygame.Rect(self.dialog_pos, dialog_size)
+        self.dialog_img = load_image(Constants.DIALOG_IMG_FILE, dialog_size)
 
         self.alpha = 0 if from_dialog else 255
-        self.alpha_time = 0
-        self.alpha_surf = pygame.Surface(dialog_size, pygame.SRCALPHA)
-        self.alpha_surf.convert()
+        self.fade = timeline.tween(self.FADE_IN_TIME, 0, 255) if from_dialog else None
+        self.layer = Layer(dialog_size, self.alpha)
 
-        press_connect_img = pygame.image.load('assets/images/intro-connecting/press-to-connect_upscaled.png').convert_alpha()
-        press_connect_size = press_connect_img.get_size()
+        press_connect_img_file = 'assets/images/intro-connecting/press-to-connect_upscaled.png'
+        press_connect_size = image_size(press_connect_img_file)
         press_connect_size = (int(press_connect_size[0] * scale * 0.25), int(press_connect_size[1] * scale * 0.25))
         press_connect_img_offset = (339, 41.5)
         self.press_connect_pos = (press_connect_img_offset[0] * scale, press_connect_img_offset[1] * scale)
-        self.press_connect_img_orig = pygame.transform.scale(press_connect_img, press_connect_size)
+        self.press_connect_img_orig = load_image(press_connect_img_file, press_connect_size)
+        self.layer.set('press_connect', self.press_connect_img_orig, self.press_connect_pos)
 
         font_size = int(46 * scale)
-        font = pygame.font.Font('assets/fonts/contb.ttf', font_size)
-        self.text = font.render('Connect the Wiimote by pressing 1+2 on the remote.', True, '#444444')
+        self.text = render_text('Connect the Wiimote by pressing 1+2 on the remote.', font_size, '#444444')
         self.text_pos = self.text.get_rect(centerx=dialog_size[0] * 0.5, centery=dialog_size[1] * 0.7)
+        self.layer.set('text', self.text, self.text_pos)
 
-        self.connected_text = font.render('CONNECTED', True, '#4fbed1')
+        self.connected_text = render_text('CONNECTED', font_size, '#4fbed1')
         self.connected_text_size = self.connected_text.get_size()
         self.connected_text_pos = self.connected_text.get_rect(centerx=dialog_size[0] * 0.5, centery=(dialog_size[1] * 0.7) + font_size)
+        self.connected_text_scales = load_scales(('CONNECTED', font_size, '#4fbed1'), (self.connected_text_size[0], 0), self.connected_text_size,
+                                                 self.CONNECTED_SCALE_STEPS, image=self.connected_text).warmup()
         self.connected_text_scale_y = 0
-        self.connected_time = 0
+        self.bounce = None
+        self.connected_hold = None
+        self.layer.set('connected_text', None, self.connected_text_pos)
 
     def update(self, dt, incoming_events, wm_state):
         match self.state:
@@ -95,43 +106,41 @@ class UIObjConnectDialog(UIObject):
                 if Constants.EVENT_FADED_IN in incoming_events:
                     self.state = ConnectDialogStates.IDLE
             case ConnectDialogStates.FADING_IN:
-                self.alpha_time += dt
-                self.alpha = min((self.alpha_time / self.FADE_IN_TIME) * 255, 255)
-                if self.alpha == 255:
+                self.alpha = self.fade.value
+                if self.fade.done:
                     self.state = ConnectDialogStates.IDLE
             case ConnectDialogStates.IDLE:
                 if wm_state.connected:
+                    self.bounce = self.timeline.tween(self.CONNECTED_BOUNCE_TIME, 0, 1, ease_out_elastic)
+                    self.connected_hold = self.timeline.tween(self.CONNECTED_BOUNCE_TIME + self.CONNECTED_TIME_OFFSET)
                     self.state = ConnectDialogStates.CONNECTED
             case ConnectDialogStates.CONNECTED:
-                self.connected_time += dt
-                if self.connected_time <= self.CONNECTED_BOUNCE_TIME:
-                    self.connected_text_scale_y = ease_out_elastic(self.connected_time / self.CONNECTED_BOUNCE_TIME)
-                    self.connected_text_copy = pygame.transform.scale(self.connected_text, (self.connected_text_size[0], self.connected_text_size[1] * self.connected_text_scale_y))
+                if not self.bounce.done:
+                    self.connected_text_scale_y = self.bounce.value
+                    self.connected_text_copy = self.connected_text_scales.get(self.connected_text_scale_y)
+                    self.layer.set('connected_text', self.connected_text_copy, self.connected_text_pos)
                 else:
                     if self.connected_text_scale_y != 1:
                         self.connected_text_scale_y = 1
-                        self.connected_text = pygame.transform.scale(self.connected_text, self.connected_text_size)
-                    if self.connected_time >= self.CONNECTED_BOUNCE_TIME + self.CONNECTED_TIME_OFFSET:
+                        self.layer.set('connected_text', self.connected_text, self.connected_text_pos)
+                    if self.connected_hold.done:
+                        self.fade = self.timeline.tween(self.FADE_OUT_TIME, 255, 0)
                         self.state = ConnectDialogStates.FADING_OUT
             case ConnectDialogStates.FADING_OUT:
-                self.alpha_time += dt
-                self.alpha = max(((self.FADE_OUT_TIME - self.alpha_time) / self.FADE_OUT_TIME) * 255, 0)
-                if self.alpha == 0:
+                self.alpha = self.fade.value
+                if self.fade.done:
                     return ScreenStates.CALIBRATION_SCREEN
+
+        # Only the fades and the CONNECTED bounce change anything on screen
+        if self.state not in (ConnectDialogStates.WAITING_FOR_FADE, ConnectDialogStates.IDLE):
+            self.mark_dirty(self.dialog_rect)
         return []
 
     def draw(self, display):
         display.blit(self.dialog_img, self.dialog_pos)
 
-        if self.alpha >= 0:
-            self.alpha_surf.fill((0, 0, 0, 0))
-            self.alpha_surf.blit(self.press_connect_img_orig, self.press_connect_pos)
-            self.alpha_surf.blit(self.text, self.text_pos)
-            if self.connected_text_scale_y > 0:
-                self.alpha_surf.blit(self.connected_text_copy, self.connected_text_pos)
-            temp_surf = self.alpha_surf.copy()
-            temp_surf.set_alpha(self.alpha)
-            display.blit(temp_surf, self.dialog_pos)
+        self.layer.set_alpha(self.alpha)
+        self.layer.draw(display, self.dialog_pos)
 
 
 
@@ -149,14 +158,10 @@ class IntroConnectScreen(Screen):
     def background_color(self):
         return '#525252'
 
-    def __init__(self, display, init_events):
-        super().__init__(display, init_events)
-
+    def build_objs(self, init_events):
         from_dialog = Constants.EVENT_FROM_DIALOG in init_events
         from_white_screen = Constants.EVENT_FROM_WHITE_SCREEN in init_events
         from_black_screen = Constants.EVENT_FROM_BLACK_SCREEN in init_events
-        self.active_objs = [
-            UIObjConnectDialog(self.display_size, from_dialog),
-        ]
+        yield UIObjConnectDialog(self.display_size, self.timeline, from_dialog)
         if not from_dialog:
-            self.active_objs += [UIObjIntroFade(self.display_size, from_white_screen, from_black_screen)]
\ No newline at end of file
+            yield UIObjIntroFade(self.display_size, self.timeline, from_white_screen, from_black_screen)
\ No newline at end of file
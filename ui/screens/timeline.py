@@ -0,0 +1,140 @@
+import numpy as np
+from ui.screens.easings import ARRAY_EASINGS, ease_none
+
+# Every running tween of a screen lives in a slot of a few parallel arrays, and the screen
+# advances them all in one batched step at the start of each frame. Objects declare a tween
+# and read its value instead of keeping their own timers.
+#   tween = timeline.tween(1.5, 255, 0, ease_in_sine, delay=0.25)
+#   ... tween.value, tween.started, tween.done
+# When a tween finishes, its on_complete callback is called and its events, a list of
+# (UIObject class, event) like update() returns, are delivered to those objects that frame.
+
+class Tween:
+    def __init__(self, timeline, index, end, on_complete, events):
+        self.timeline = timeline
+        self.index = index
+        self.end = end
+        self.on_complete = on_complete
+        self.events = events
+
+    @property
+    def value(self):
+        if self.index is None:
+            return self.end
+        return float(self.timeline.values[self.index])
+
+    # Linear progress from 0 to 1, before easing
+    @property
+    def progress(self):
+        if self.index is None:
+            return 1
+        return float(self.timeline.progress[self.index])
+
+    # False while still waiting out its delay
+    @property
+    def started(self):
+        if self.index is None:
+            return True
+        return bool(self.timeline.elapsed[self.index] >= self.timeline.delay[self.index])
+
+    @property
+    def done(self):
+        return self.index is None
+
+    # Stops the tween where it is, without completing it
+    def cancel(self):
+        if self.index is not None:
+            self.end = self.value
+            self.timeline.release(self.index)
+
+class Timeline:
+    INITIAL_CAPACITY = 16
+
+    def __init__(self, capacity=INITIAL_CAPACITY):
+        self.tweens = []
+        self.free = []
+        self.easings = []
+        self.elapsed = np.zeros(0)
+        self.delay = np.zeros(0)
+        self.duration = np.zeros(0)
+        self.start = np.zeros(0)
+        self.change = np.zeros(0)
+        self.easing_ids = np.zeros(0, np.int32)
+        self.active = np.zeros(0, bool)
+        self.progress = np.zeros(0)
+        self.values = np.zeros(0)
+        self.grow(capacity)
+
+    def grow(self, capacity):
+        old_capacity = len(self.tweens)
+        for name in ('elapsed', 'delay', 'duration', 'start', 'change', 'easing_ids', 'active', 'progress', 'values'):
+            array = getattr(self, name)
+            grown = np.zeros(capacity, array.dtype)
+            grown[:old_capacity] = array
+            setattr(self, name, grown)
+        self.tweens += [None] * (capacity - old_capacity)
+        self.free += range(capacity - 1, old_capacity - 1, -1)
+
+    def tween(self, duration, start=0, end=1, easing=ease_none, delay=0, on_complete=None, events=None):
+        if not self.free:
+            self.grow(len(self.tweens) * 2)
+        if easing not in self.easings:
+            self.easings.append(easing)
+
+        i = self.free.pop()
+        self.elapsed[i] = 0
+        self.delay[i] = delay
+        self.duration[i] = duration
+        self.start[i] = start
+        self.change[i] = end - start
+        self.easing_ids[i] = self.easings.index(easing)
+        self.active[i] = True
+        self.progress[i] = 0
+        self.values[i] = start
+        tween = Tween(self, i, end, on_complete, events)
+        self.tweens[i] = tween
+        return tween
+
+    def release(self, index):
+        self.tweens[index].index = None
+        self.tweens[index] = None
+        self.active[index] = False
+        self.free.append(index)
+
+    # Whether any tween is still running (or waiting out its delay)
+    def is_running(self):
+        return bool(self.active.any())
+
+    # Advances every tween by dt and returns the events of the ones that finished
+    def update(self, dt):
+        active = self.active
+        if not active.any():
+            return []
+
+        self.elapsed[active] += dt
+        running = self.elapsed - self.delay
+        with np.errstate(divide='ignore', invalid='ignore'):
+            progress = np.where(self.duration > 0, running / self.duration, 1)
+        np.clip(progress, 0, 1, out=progress)
+        self.progress[active] = progress[active]
+
+        eased = np.zeros_like(progress)
+        easing_ids = self.easing_ids
+        for easing_id in np.unique(easing_ids[active]):
+            group = active & (easing_ids == easing_id)
+            eased[group] = ARRAY_EASINGS[self.easings[easing_id]](progress[group])
+        self.values[active] = self.start[active] + self.change[active] * eased[active]
+
+        events = []
+        for i in np.flatnonzero(active & (running >= self.duration)).tolist():
+            tween = self.tweens[i]
+            self.release(i)
+            if tween.events is not None:
+                events += tween.events
+            if tween.on_complete is not None:
+                tween.on_complete()
+        return events
+
+    def clear(self):
+        for i in np.flatnonzero(self.active).tolist():
+            self.release(i)
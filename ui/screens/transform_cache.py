@@ -0,0 +1,105 @@
+import pygame
+from ui.screens.assets import AssetCache, asset_cache, load_image
+
+# Caches of transformed copies of an image, for objects that animate a sprite every frame.
+# Transform parameters are quantized so each distinct step is only rendered once. Like
+# everything from the asset cache, the returned surfaces are shared: don't draw onto them.
+
+class RotationCache:
+    STEP = 1 # Degrees
+    MAX_BYTES = 32 * 1024 * 1024
+
+    def __init__(self, image, step=STEP, max_bytes=MAX_BYTES):
+        self.image = image
+        self.step = step
+        self.steps = max(int(round(360 / step)), 1)
+        self.frames = AssetCache(max_bytes)
+
+    def quantize(self, angle):
+        return int(round(angle / self.step)) % self.steps
+
+    # The image rotated counterclockwise by angle (to the nearest step), rendered on first use
+    def get(self, angle):
+        index = self.quantize(angle)
+        surf = self.frames.get(index)
+        if surf is None:
+            surf = pygame.transform.rotate(self.image, index * self.step)
+            self.frames.put(index, surf)
+        return surf
+
+    # Renders every angle up front instead of on first use
+    def prerender(self):
+        for index in range(self.steps):
+            self.get(index * self.step)
+
+# Screens are rebuilt on every transition, so rotation caches are kept per image
+rotation_caches = {}
+
+def load_rotations(path, size=None, step=RotationCache.STEP):
+    if size is not None:
+        size = (int(size[0]), int(size[1]))
+    key = (path, size, step)
+    cache = rotation_caches.get(key)
+    if cache is None:
+        cache = RotationCache(load_image(path, size), step)
+        rotation_caches[key] = cache
+    return cache
+
+# Frames of an image scaled from start_size to end_size, indexed by (eased) progress, for
+# animations whose sizes are fixed by constant easings and durations. Progress outside 0 - 1
+# (e.g. an elastic overshoot) works too, those frames are just never warmed up.
+# Frames are kept in `cache` under (key, index), by default a cache of their own. load_scales()
+# keeps them in the shared asset cache instead, where they count against its byte budget and
+# evicted frames are just rendered again
+class ScaleCache:
+    STEPS = 30
+    MAX_BYTES = 128 * 1024 * 1024
+
+    def __init__(self, image, start_size, end_size, steps=STEPS, max_bytes=MAX_BYTES, cache=None, key=None):
+        self.image = image
+        self.start_size = start_size
+        self.end_size = end_size
+        self.steps = steps
+        self.frames = cache if cache is not None else AssetCache(max_bytes)
+        self.key = key
+
+    def quantize(self, progress):
+        return int(round(progress * self.steps))
+
+    def size_at(self, index):
+        x = index / self.steps
+        return (max(int((self.end_size[0] - self.start_size[0]) * x + self.start_size[0]), 0),
+                max(int((self.end_size[1] - self.start_size[1]) * x + self.start_size[1]), 0))
+
+    def get(self, progress):
+        index = self.quantize(progress)
+        surf = self.frames.get((self.key, index))
+        if surf is None:
+            surf = pygame.transform.scale(self.image, self.size_at(index))
+            self.frames.put((self.key, index), surf)
+        return surf
+
+    # Renders every frame from start_size to end_size up front instead of on first use
+    def warmup(self):
+        for index in range(self.steps + 1):
+            self.get(index / self.steps)
+        return self
+
+scale_caches = {}
+
+# source_size is the size of the image that is scaled, the image's own size if None.
+# image scales that surface instead of loading path (e.g. rendered text), path is then any
+# hashable name that tells it apart
+def load_scales(path, start_size, end_size, steps=ScaleCache.STEPS, source_size=None, image=None):
+    start_size = (int(start_size[0]), int(start_size[1]))
+    end_size = (int(end_size[0]), int(end_size[1]))
+    if source_size is not None:
+        source_size = (int(source_size[0]), int(source_size[1]))
+    key = ('scales', path, start_size, end_size, steps, source_size)
+    cache = scale_caches.get(key)
+    if cache is None:
+        if image is None:
+            image = load_image(path, source_size)
+        cache = ScaleCache(image, start_size, end_size, steps, cache=asset_cache, key=key)
+        scale_caches[key] = cache
+    return cache
@@ -1,21 +1,51 @@
+import pygame
 from ui.screens.constants import Constants
 
 class UIObject:
+    # Objects that set this report what they change each frame through mark_dirty(). Anything
+    # else is assumed to change the whole display every frame
+    TRACKS_DIRTY_RECTS = False
+
+    # Event IDs this object receives through the screen's event bus
+    SUBSCRIBES_TO = ()
+
     def __init__(self):
         self.is_complete = False
-        pass
+        self.dirty_rects = []
+        self.dirty_all = False
+        self.subscription = None
+        # Slot (1 based) of the Wiimote whose state update() receives
+        self.player = 1
 
-    # Returns a list of outgoing events
+    # incoming_ui_events is an EventQueue, check it with `Constants.EVENT_... in incoming_ui_events`
+    # Returns a list of outgoing (UIObject class, event) pairs
     def update(self, dt, incoming_ui_events, wm_state):
         return []
 
     def draw(self, display):
         pass
 
+    # rect is anything pygame.Rect accepts, or None when the whole display changed (fades, video)
+    def mark_dirty(self, rect=None):
+        if rect is None:
+            self.dirty_all = True
+        else:
+            self.dirty_rects.append(pygame.Rect(rect))
+
+    # Returns the display areas changed since the last frame, or None to redraw everything
+    def get_dirty_rects(self):
+        if not self.TRACKS_DIRTY_RECTS or self.dirty_all:
+            return None
+        return self.dirty_rects
+
+    def clear_dirty_rects(self):
+        self.dirty_rects.clear()
+        self.dirty_all = False
+
+    # Called once the object is no longer used, to release threads or other resources
+    def destroy(self):
+        pass
+
+    # Only sees keys if the object subscribes to Constants.EVENT_KEYDOWN
     def get_keydown_in_events(self, events, expected_key):
-        for event in events:
-            if event.find(Constants.EVENT_KEYDOWN) == 0:
-                key = int(event[len(Constants.EVENT_KEYDOWN):])
-                if key == expected_key:
-                    return True
-        return False
\ No newline at end of file
+        return events.has(Constants.EVENT_KEYDOWN, expected_key)
\ No newline at end of file
@@ -0,0 +1,160 @@
+import mmap
+import os
+import struct
+import sys
+import pygame
+from ui.screens.video_decoder import cover_size
+
+# Raw, memory-mapped cache of video frames that are already scaled to cover the display and
+# stored in the display's channel order, so playback maps each frame straight into a surface
+# without decoding or scaling anything. Bake it once with:
+#   python -m ui.screens.video_cache [video file]
+# The header records the source file's size and mtime and the display size it was baked for, so
+# a changed video or display just makes the cache invalid (and playback falls back to decoding).
+
+def cache_file_for(video_file):
+    return os.path.splitext(video_file)[0] + '.frames'
+
+# Frames keep the display's channel order but drop its padding byte; 24 bit frames in the
+# display's order blit nearly as fast as native ones and take a quarter less space
+def display_pixel_format(display):
+    return 'RGB' if display.get_masks()[0] == 0xff else 'BGR'
+
+class VideoFrameCache:
+    MAGIC = b'PWTEVID1'
+    # magic, source size, source mtime, display w, display h, frame w, frame h, pixel format, fps, frame count
+    HEADER_LAYOUT = struct.Struct('<8sQQIIII8sdI')
+    HEADER_SIZE = 4096 # A page, so the first frame starts page aligned (the rest follow back to back)
+
+    def __init__(self, cache_file):
+        self.file = open(cache_file, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.map)
+        header = self.HEADER_LAYOUT.unpack_from(self.map, 0)
+        _, _, _, _, _, frame_w, frame_h, pixel_format, self.fps, self.frame_count = header
+        self.frame_size = (frame_w, frame_h)
+        self.pixel_format = pixel_format.rstrip(b'\0').decode()
+        self.frame_bytes = frame_w * frame_h * len(self.pixel_format)
+
+    # Returns the cache if cache_file matches video_file and the display, otherwise None. A cache
+    # that is shorter or longer than its header says (e.g. truncated by a full disk) doesn't
+    # match either, baking again replaces it
+    @classmethod
+    def open(cls, cache_file, video_file, display_size, pixel_format):
+        try:
+            with open(cache_file, 'rb') as f:
+                header = cls.HEADER_LAYOUT.unpack(f.read(cls.HEADER_LAYOUT.size))
+                file_size = os.fstat(f.fileno()).st_size
+            source_stat = os.stat(video_file)
+        except (OSError, struct.error):
+            return None
+        expected = (cls.MAGIC, source_stat.st_size, source_stat.st_mtime_ns, display_size[0], display_size[1])
+        if header[:5] != expected or header[7].rstrip(b'\0').decode() != pixel_format or header[9] == 0:
+            return None
+        _, _, _, _, _, frame_w, frame_h, _, _, frame_count = header
+        if file_size != cls.HEADER_SIZE + frame_count * frame_w * frame_h * len(pixel_format):
+            print(f'{cache_file} is {file_size} bytes, not what its header describes. Bake it again with: python -m ui.screens.video_cache')
+            return None
+        return cls(cache_file)
+
+    # Surface backed directly by the mapped file, valid until close()
+    def frame(self, index):
+        offset = self.HEADER_SIZE + index * self.frame_bytes
+        return pygame.image.frombuffer(self.view[offset:offset + self.frame_bytes], self.frame_size, self.pixel_format)
+
+    def close(self):
+        try:
+            self.view.release()
+            self.map.close()
+        except BufferError:
+            pass # A frame surface is still alive, the mapping goes away with it
+        self.file.close()
+
+    @classmethod
+    def bake(cls, video_file, cache_file, display_size, pixel_format):
+        import cv2
+
+        video = cv2.VideoCapture(video_file)
+        if not video.isOpened():
+            raise RuntimeError(f'Could not open {video_file}')
+        source_stat = os.stat(video_file)
+        video_size = (int(video.get(cv2.CAP_PROP_FRAME_WIDTH)), int(video.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        frame_size = cover_size(video_size, display_size)
+        fps = video.get(cv2.CAP_PROP_FPS)
+
+        # Written under a temporary name and renamed at the end, so a half-baked cache never
+        # looks valid
+        temp_file = cache_file + '.tmp'
+        frame_count = 0
+        with open(temp_file, 'wb') as f:
+            f.write(bytes(cls.HEADER_SIZE))
+            while True:
+                can_read, video_image = video.read()
+                if not can_read:
+                    break
+                video_image = cv2.resize(video_image, frame_size, interpolation=cv2.INTER_NEAREST)
+                if pixel_format == 'RGB':
+                    video_image = cv2.cvtColor(video_image, cv2.COLOR_BGR2RGB)
+                f.write(video_image.tobytes())
+                frame_count += 1
+            f.seek(0)
+            f.write(cls.HEADER_LAYOUT.pack(cls.MAGIC, source_stat.st_size, source_stat.st_mtime_ns,
+                                           display_size[0], display_size[1], frame_size[0], frame_size[1],
+                                           pixel_format.encode(), fps, frame_count))
+        video.release()
+        os.replace(temp_file, cache_file)
+        return frame_count
+
+# Plays a baked cache with the same interface as VideoDecoder. Any frame can be mapped
+# instantly, so pacing is just picking the frame index for the playback time (wrapping around
+# to loop) and frames are never late
+class CachedVideo:
+    DEFAULT_FPS = 30
+
+    def __init__(self, cache, display_size):
+        self.cache = cache
+        self.video_size = cache.frame_size
+        self.video_pos = ((display_size[0] - self.video_size[0]) * 0.5, (display_size[1] - self.video_size[1]) * 0.5)
+        self.fps = cache.fps or self.DEFAULT_FPS
+        self.finished = cache.frame_count == 0
+
+        self.start_time = None
+        self.shown_index = -1
+        self.frames_shown = 0
+        self.frames_dropped = 0
+        self.frames_late = 0
+
+    @classmethod
+    def open(cls, video_file, display):
+        display_size = display.get_size()
+        cache = VideoFrameCache.open(cache_file_for(video_file), video_file, display_size, display_pixel_format(display))
+        return cls(cache, display_size) if cache is not None else None
+
+    def get_frame(self, playback_time):
+        if self.finished:
+            return None
+        if self.start_time is None:
+            self.start_time = playback_time
+        index = int((playback_time - self.start_time) * self.fps)
+        if index <= self.shown_index:
+            return None
+        if self.shown_index >= 0:
+            self.frames_dropped += index - self.shown_index - 1
+        self.shown_index = index
+        self.frames_shown += 1
+        return self.cache.frame(index % self.cache.frame_count)
+
+    def stop(self):
+        self.cache.close()
+
+
+if __name__ == '__main__':
+    from ui.screens.constants import Constants
+
+    video_file = sys.argv[1] if len(sys.argv) > 1 else Constants.VIDEO_FILE
+    pygame.init()
+    display = pygame.display.set_mode(Constants.DISPLAY_SIZE, pygame.HIDDEN)
+    pixel_format = display_pixel_format(display)
+    frame_count = VideoFrameCache.bake(video_file, cache_file_for(video_file), Constants.DISPLAY_SIZE, pixel_format)
+    print(f'Baked {frame_count} frames of {video_file} for {Constants.DISPLAY_SIZE[0]}x{Constants.DISPLAY_SIZE[1]} ({pixel_format})')
+    pygame.quit()
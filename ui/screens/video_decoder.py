@@ -0,0 +1,135 @@
+import atexit
+import pygame
+import threading
+from queue import Queue, Empty, Full
+
+# Size to scale video_size to so it covers all of display_size, keeping its aspect ratio
+def cover_size(video_size, display_size):
+    video_x_scale = display_size[0] / video_size[0]
+    video_y_scale = display_size[1] / video_size[1]
+    video_scale = max(video_x_scale, video_y_scale)
+    return (int(video_size[0] * video_scale), int(video_size[1] * video_scale))
+
+# Decodes and scales video frames on a worker thread into a small queue of ready-to-blit
+# surfaces, so the main loop only ever blits. The size is chosen to cover display_size.
+# Frames carry their presentation time and keep counting up across loops: at the end of the
+# file the worker rewinds and carries on, so the first frames of the next loop are already
+# queued by the time playback reaches the loop point.
+class VideoDecoder:
+    # Decoders whose worker is still running. cv2 aborts the process if the interpreter shuts
+    # down in the middle of a read, so they're waited for at exit (see join_workers)
+    running = set()
+
+    QUEUE_SIZE = 4
+    PUT_TIMEOUT = 0.1
+    DEFAULT_FPS = 30
+
+    def __init__(self, video_file, display_size):
+        import cv2 # Slow to import, and not needed at all when the baked frame cache is used
+        self.video = cv2.VideoCapture(video_file)
+        video_size = (int(self.video.get(cv2.CAP_PROP_FRAME_WIDTH)), int(self.video.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        self.finished = not self.video.isOpened() or video_size[0] == 0 or video_size[1] == 0
+        self.video_size = display_size if self.finished else cover_size(video_size, display_size)
+        self.video_pos = ((display_size[0] - self.video_size[0]) * 0.5, (display_size[1] - self.video_size[1]) * 0.5)
+        self.fps = self.video.get(cv2.CAP_PROP_FPS) or self.DEFAULT_FPS
+        self.frame_time = 1 / self.fps
+
+        self.start_time = None
+        self.next_frame = None
+        self.shown_pts = None
+        self.late_pts = None
+        self.frames_shown = 0
+        self.frames_dropped = 0
+        self.frames_late = 0
+
+        self.frames = Queue(maxsize=self.QUEUE_SIZE)
+        # Set by stop(). The worker notices it between frames and cleans up after itself, so
+        # stopping never waits on it
+        self.stopping = threading.Event()
+        self.decoding = not self.finished
+        self.thread = None
+        if self.decoding:
+            self.thread = threading.Thread(target=self.decode_frames, daemon=True)
+            self.running.add(self)
+            self.thread.start()
+
+    def decode_frames(self):
+        import cv2
+        frame_index = 0
+        while not self.stopping.is_set():
+            can_read, video_image = self.video.read()
+            if not can_read and frame_index > 0:
+                self.video.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                can_read, video_image = self.video.read()
+            if not can_read:
+                break
+            pts = frame_index * self.frame_time
+            frame_index += 1
+            # cv2 releases the GIL while resizing, so scale before handing the pixels to pygame
+            video_image = cv2.resize(video_image, self.video_size, interpolation=cv2.INTER_NEAREST)
+            try:
+                video_surf = pygame.image.frombuffer(video_image.tobytes(), self.video_size, 'BGR').convert()
+            except pygame.error:
+                break # The display was closed under us after stop()
+            while not self.stopping.is_set():
+                try:
+                    self.frames.put((pts, video_surf), timeout=self.PUT_TIMEOUT)
+                    break
+                except Full:
+                    pass
+        self.decoding = False
+        self.video.release()
+        self.running.discard(self)
+
+    # Returns the frame due at playback_time (seconds, any origin), or None if the frame on screen
+    # should stay up. Frames that are overtaken before being shown are dropped; a due frame that
+    # isn't decoded yet counts as late. Never blocks
+    def get_frame(self, playback_time):
+        frame = None
+        while True:
+            if self.next_frame is None:
+                done_decoding = not self.decoding
+                try:
+                    self.next_frame = self.frames.get_nowait()
+                except Empty:
+                    if done_decoding:
+                        self.finished = True
+                    elif self.shown_pts is not None:
+                        due_pts = self.shown_pts + self.frame_time
+                        if due_pts <= playback_time - self.start_time and self.late_pts != due_pts:
+                            self.late_pts = due_pts
+                            self.frames_late += 1
+                    break
+
+            pts, video_surf = self.next_frame
+            if self.start_time is None:
+                self.start_time = playback_time - pts
+            if pts > playback_time - self.start_time:
+                break
+            if frame is not None:
+                self.frames_dropped += 1
+            frame = video_surf
+            self.shown_pts = pts
+            self.next_frame = None
+
+        if frame is not None:
+            self.frames_shown += 1
+        return frame
+
+    # Returns straight away: screens are destroyed inside the transition frame. Emptying the
+    # queue wakes a worker blocked in put(), which then sees stopping and exits
+    def stop(self):
+        self.stopping.set()
+        self.next_frame = None
+        while True:
+            try:
+                self.frames.get_nowait()
+            except Empty:
+                break
+
+@atexit.register
+def join_workers(timeout=1):
+    for decoder in list(VideoDecoder.running):
+        decoder.stop()
+    for decoder in list(VideoDecoder.running):
+        decoder.thread.join(timeout)
@@ -1,88 +1,289 @@
+import importlib
 import pygame
+import time
 from collections.abc import Sequence
-from random import random
+from ui.screens.assets import render_text
 from ui.screens.constants import Constants
+from ui.screens.frame_governor import FrameGovernor
+from ui.screens.profiler import FrameProfiler
 from ui.screens.screen import ScreenStates
-from ui.screens.screen_states.intro_connect_screen import IntroConnectScreen
-from ui.screens.screen_states.intro_pickup_screen import IntroPickupScreen
-from ui.screens.screen_states.calibration_screen import CalibrationScreen
-from ui.screens.screen_states.home_screen import HomeScreen
+from wiimote.wiimote_state import WiimoteState
 
 class UIRunner:
+    # (module, class) of each screen. Modules are only imported once their screen is first built,
+    # so startup doesn't wait on screens (and their dependencies) that aren't shown yet
     SCREEN_STATES = {
-        ScreenStates.INTRO_CONNECT_SCREEN: IntroConnectScreen,
-        ScreenStates.INTRO_PICKUP_SCREEN: IntroPickupScreen,
-        ScreenStates.CALIBRATION_SCREEN: CalibrationScreen,
-        ScreenStates.HOME_SCREEN: HomeScreen
+        ScreenStates.INTRO_CONNECT_SCREEN: ('ui.screens.screen_states.intro_connect_screen', 'IntroConnectScreen'),
+        ScreenStates.INTRO_PICKUP_SCREEN: ('ui.screens.screen_states.intro_pickup_screen', 'IntroPickupScreen'),
+        ScreenStates.CALIBRATION_SCREEN: ('ui.screens.screen_states.calibration_screen', 'CalibrationScreen'),
+        ScreenStates.HOME_SCREEN: ('ui.screens.screen_states.home_screen', 'HomeScreen')
     }
+    FIRST_SCREEN = ScreenStates.HOME_SCREEN
+
+    SPLASH_TEXT = 'Press Wii to Enter'
+    SPLASH_FONT_SIZE = 48
+
+    # Screens (and their init events) that each screen can hand off to, most likely first
+    SCREEN_TRANSITIONS = {
+        ScreenStates.INTRO_CONNECT_SCREEN: [
+            (ScreenStates.CALIBRATION_SCREEN, ())
+        ],
+        ScreenStates.INTRO_PICKUP_SCREEN: [
+            (ScreenStates.CALIBRATION_SCREEN, ()),
+            (ScreenStates.INTRO_CONNECT_SCREEN, (Constants.EVENT_FROM_DIALOG,))
+        ],
+        ScreenStates.CALIBRATION_SCREEN: [
+            (ScreenStates.HOME_SCREEN, ()),
+            (ScreenStates.INTRO_CONNECT_SCREEN, (Constants.EVENT_FROM_DIALOG,)),
+            (ScreenStates.INTRO_CONNECT_SCREEN, (Constants.EVENT_FROM_WHITE_SCREEN,))
+        ],
+        ScreenStates.HOME_SCREEN: [
+            (ScreenStates.INTRO_PICKUP_SCREEN, (Constants.EVENT_FROM_BLACK_SCREEN,)),
+            (ScreenStates.INTRO_CONNECT_SCREEN, (Constants.EVENT_FROM_WHITE_SCREEN,)),
+            (ScreenStates.INTRO_CONNECT_SCREEN, (Constants.EVENT_FROM_BLACK_SCREEN,))
+        ]
+    }
+
+    # Successor screens are preloaded one build step (creating the screen, or one of its objects)
+    # per frame, when that step's time on its last run fits in what the frame has left of
+    # FRAME_BUDGET. Steps that were never timed, or that take too long for any frame (opening the
+    # home screen's video), run on a frame that took less than PRELOAD_FRAME_BUDGET or while the
+    # frame governor is idle: one slow frame in the background instead of in the transition
+    FRAME_BUDGET = 0.015 # Of the 1/60 s a frame gets, leaving some slack for the clock
+    PRELOAD_FRAME_BUDGET = 0.008
+
+    # profile: time every object and the rest of the frame, F3 toggles an overlay of the results.
+    # profile_csv: also append the results to this CSV file every few seconds
+    # adaptive_fps: drop to a low frame rate while nothing moves, see FrameGovernor
+    def __init__(self, preload_screens=True, log_transitions=False, profile=False, profile_csv=None, adaptive_fps=True):
+        # (phase, time.monotonic()) of each startup step, up to the first frame
+        self.startup_phases = [('ui_runner', time.monotonic())]
 
-    def __init__(self):
         # pygame setup
         pygame.init()
 
         # self.display = pygame.display.set_mode(flags=pygame.FULLSCREEN)
-        self.display = pygame.display.set_mode((1720, 880))
+        self.display = pygame.display.set_mode(Constants.DISPLAY_SIZE)
         pygame.display.set_caption('Press Wii to Enter')
         pygame.mouse.set_visible(False)
+        self.startup_phases.append(('display', time.monotonic()))
+        self.draw_splash()
+        self.startup_phases.append(('splash', time.monotonic()))
         self.clock = pygame.time.Clock()
         self.dt = 0
         self.pygame_events = []
 
-        # self.wm_acc_test = [150, 0, 75]
-        # self.increasing = [False, False, False]
-        # self.increasing_time = [0, 0, 0]
-        # self.wm_acc_test_enabled = True
+        self.preload_screens = preload_screens
+        self.log_transitions = log_transitions
+        self.preloaded_screens = {}
+        # ((state, events), step) -> seconds that build step took the last time it ran
+        self.build_step_times = {}
+        # (from state, to state, seconds of work in the transition frame, was preloaded)
+        self.transition_frame_times = []
 
-        self.curr_screen = self.SCREEN_STATES[ScreenStates.HOME_SCREEN](self.display, [])
+        self.profiler = FrameProfiler(csv_path=profile_csv) if profile or profile_csv is not None else None
+        self.overlay_rect = None
+        self.governor = FrameGovernor() if adaptive_fps else None
 
-    def update(self, wm_state):
-        pygame_events = []
-        for event in self.pygame_events:
-            if event.type == pygame.KEYDOWN:
-                pygame_events += [Constants.EVENT_KEYDOWN + str(event.key)]
-                # if event.key == pygame.K_q:
-                #     if not self.wm_acc_test_enabled:
-                #         wm_state.connected = False
-                #     else:
-                #         self.wm_acc_test_enabled = False
-
-        # if self.wm_acc_test_enabled:
-        #     for i in range(len(self.wm_acc_test)):
-        #         if self.increasing_time[i] <= 0:
-        #             self.increasing[i] = random() < 0.5
-        #             self.increasing_time[i] = random() * 1
-        #         self.wm_acc_test[i] += self.dt * (1 if self.increasing[i] else -1) * 20
-        #         self.wm_acc_test[i] = max(min(self.wm_acc_test[i], 255), 0)
-        #         self.increasing_time[i] -= self.dt
-        #     new_state = (int(self.wm_acc_test[0]), int(self.wm_acc_test[1]), int(self.wm_acc_test[2]))
-        #     wm_state.acc = new_state
-        # print(wm_state.acc)
-
-        new_screen = self.curr_screen.update(self.dt, pygame_events, wm_state)
-
-        self.display.fill(self.curr_screen.background_color)
-        self.curr_screen.draw()
+        # The first screen is built by start(), so the splash can show (and the Wiimote runner
+        # start searching) while it loads
+        self.screen_classes = {}
+        self.curr_screen = None
+
+    # Something to look at while the first screen loads, drawn without any assets but the font
+    def draw_splash(self):
+        self.display.fill('black')
+        text = render_text(self.SPLASH_TEXT, self.SPLASH_FONT_SIZE, '#444444')
+        self.display.blit(text, text.get_rect(center=self.display.get_rect().center))
+        pygame.display.update()
+
+    def get_screen_class(self, state):
+        screen_class = self.screen_classes.get(state)
+        if screen_class is None:
+            module_name, class_name = self.SCREEN_STATES[state]
+            screen_class = getattr(importlib.import_module(module_name), class_name)
+            self.screen_classes[state] = screen_class
+        return screen_class
+
+    # Runs the next build step of the screen for key, creating it if screen is None, and times it.
+    # Returns the screen and whether it has steps left
+    def build_step(self, key, screen=None):
+        start = time.perf_counter()
+        if screen is None:
+            state, events = key
+            screen = self.get_screen_class(state)(self.display, list(events), build=False)
+            step, more = 0, True
+        else:
+            step = screen.build_steps + 1
+            more = screen.build_step()
+        self.build_step_times[(key, step)] = time.perf_counter() - start
+        return screen, more
+
+    def build_screen(self, state, events, screen=None):
+        key = (state, tuple(events))
+        more = True
+        while more:
+            screen, more = self.build_step(key, screen)
+        return screen
+
+    # Builds the first screen, if it isn't yet. Called by the first update()
+    def start(self):
+        if self.curr_screen is not None:
+            return
+        self.curr_screen = self.build_screen(self.FIRST_SCREEN, ())
+        self.curr_screen.profiler = self.profiler
+        self.startup_phases.append(('first_screen', time.monotonic()))
+        # The first frame's dt shouldn't include loading the screen
+        self.clock.tick()
+
+    # wm_states: a WiimoteState, or one per player slot as WiimoteRunner.poll_players() returns
+    def update(self, wm_states):
+        if isinstance(wm_states, WiimoteState):
+            wm_states = (wm_states,)
+        if self.curr_screen is None:
+            self.start()
+        frame_start = time.perf_counter()
+
+        profiler = self.profiler
+        if profiler is not None and profiler.handle_events(self.pygame_events):
+            self.curr_screen.redraw_all = True
+
+        new_screen = self.curr_screen.update(self.dt, self.pygame_events, wm_states)
+
+        dirty_rects = self.curr_screen.get_dirty_rects()
+        changed = dirty_rects is None or len(dirty_rects) > 0 or self.curr_screen.timeline.is_running()
+        if dirty_rects is None:
+            fill_start = time.perf_counter()
+            self.display.fill(self.curr_screen.background_color)
+            if profiler is not None:
+                profiler.add('runner', 'fill', time.perf_counter() - fill_start)
+            self.curr_screen.draw()
+        else:
+            # Repaint every layer, clipped to each changed area
+            for rect in dirty_rects:
+                fill_start = time.perf_counter()
+                self.display.set_clip(rect)
+                self.display.fill(self.curr_screen.background_color, rect)
+                if profiler is not None:
+                    profiler.add('runner', 'fill', time.perf_counter() - fill_start)
+                self.curr_screen.draw()
+            self.display.set_clip(None)
 
         self.curr_screen.clean()
 
+        if profiler is not None:
+            dirty_rects = self.draw_profiler_overlay(dirty_rects)
+
         # flip() the display to put your work on screen
         # pygame.display.flip()
-        pygame.display.update()
+        update_start = time.perf_counter()
+        if dirty_rects is None:
+            pygame.display.update()
+        elif len(dirty_rects) > 0:
+            pygame.display.update(dirty_rects)
+        update_end = time.perf_counter()
+
+        handoff = None
+        if new_screen is not None:
+            self.change_screen(new_screen, frame_start)
+            handoff = 'change_screen'
+        elif self.preload_screens:
+            if self.preload_next_screen(update_end - frame_start):
+                handoff = 'preload'
+        work_end = time.perf_counter()
 
-        # limits FPS to 60
+        # limits FPS to 60, or less while nothing moves
         # dt is delta time in seconds since last frame, used for framerate-
         # independent physics.
-        self.dt = self.clock.tick(60) / 1000
+        if self.governor is None:
+            self.dt = self.clock.tick(60) / 1000
+        else:
+            self.governor.end_frame(changed or new_screen is not None, self.pygame_events, wm_states, update_end - frame_start)
+            self.dt = self.governor.wait(self.clock) / 1000
+        if self.startup_phases[-1][0] == 'first_screen':
+            self.startup_phases.append(('first_frame', time.monotonic()))
 
-        if new_screen is not None:
-            events = []
-            if not isinstance(new_screen, str) and isinstance(new_screen, Sequence):
-                if not isinstance(new_screen[1], str) and isinstance(new_screen[1], Sequence):
-                    events = new_screen[1]
-                else:
-                    events = [new_screen[1]]
-                new_screen = new_screen[0]
-            self.curr_screen = self.SCREEN_STATES[new_screen](self.display, events)
+        if profiler is not None:
+            profiler.add('runner', 'display_update', update_end - update_start)
+            if handoff is not None:
+                profiler.add('runner', handoff, work_end - update_end)
+            profiler.add('runner', 'frame_work', work_end - frame_start)
+            profiler.add('runner', 'clock_wait', time.perf_counter() - work_end)
+            profiler.end_frame()
+
+    # The frame rate currently aimed for
+    @property
+    def frame_rate(self):
+        return self.governor.fps if self.governor is not None else 60
+
+    # Draws the overlay over the frame and returns the areas to update with it. The overlay is
+    # opaque, so nothing under it needs repainting unless it shrinks or is hidden
+    def draw_profiler_overlay(self, dirty_rects):
+        start = time.perf_counter()
+        overlay_rect = self.profiler.draw_overlay(self.display, self.clock.get_fps())
+        if overlay_rect is not None:
+            if self.overlay_rect is not None and not overlay_rect.contains(self.overlay_rect):
+                self.curr_screen.redraw_all = True
+            if dirty_rects is not None:
+                dirty_rects = dirty_rects + [overlay_rect]
+        self.overlay_rect = overlay_rect
+        self.profiler.add('runner', 'overlay', time.perf_counter() - start)
+        return dirty_rects
+
+    def parse_new_screen(self, new_screen):
+        events = ()
+        if not isinstance(new_screen, str) and isinstance(new_screen, Sequence):
+            if not isinstance(new_screen[1], str) and isinstance(new_screen[1], Sequence):
+                events = tuple(new_screen[1])
+            else:
+                events = (new_screen[1],)
+            new_screen = new_screen[0]
+        return new_screen, events
+
+    def change_screen(self, new_screen, frame_start):
+        prev_state = self.curr_screen.screen_state
+        new_state, events = self.parse_new_screen(new_screen)
+
+        screen = self.preloaded_screens.pop((new_state, events), None)
+        preloaded = screen is not None and screen.built
+        if not preloaded:
+            screen = self.build_screen(new_state, events, screen)
+        self.curr_screen.destroy()
+        self.curr_screen = screen
+        self.curr_screen.profiler = self.profiler
+
+        # Keep whatever was already built that can still follow the new screen
+        successors = self.SCREEN_TRANSITIONS[new_state]
+        for key in list(self.preloaded_screens.keys()):
+            if key not in successors:
+                self.preloaded_screens.pop(key).destroy()
+
+        frame_time = time.perf_counter() - frame_start
+        self.transition_frame_times += [(prev_state, new_state, frame_time, preloaded)]
+        if self.log_transitions:
+            print(f'Transition {prev_state.name} -> {new_state.name} took {frame_time * 1000:.1f} ms ({"preloaded" if preloaded else "built"})')
+
+    # Runs at most one build step of a likely successor screen per frame, if it fits (see
+    # FRAME_BUDGET). frame_work is the time the frame took so far. Returns whether a step ran
+    def preload_next_screen(self, frame_work):
+        for key in self.SCREEN_TRANSITIONS[self.curr_screen.screen_state]:
+            screen = self.preloaded_screens.get(key)
+            if screen is not None and screen.built:
+                continue
+            step_time = self.build_step_times.get((key, 0 if screen is None else screen.build_steps + 1))
+            if step_time is not None and frame_work + step_time <= self.FRAME_BUDGET:
+                fits = True
+            elif step_time is not None and self.PRELOAD_FRAME_BUDGET + step_time <= self.FRAME_BUDGET:
+                fits = False # Wait for a lighter frame
+            else:
+                # Never timed, or too slow for any frame: it would cost the transition frame as
+                # much, so it runs on a frame that has the time to spare
+                fits = frame_work < self.PRELOAD_FRAME_BUDGET or (self.governor is not None and self.governor.is_idle)
+            if not fits:
+                return False
+            self.preloaded_screens[key], _ = self.build_step(key, screen)
+            return True
+        return False
 
     def is_running(self):
         # poll for events
@@ -97,4 +298,10 @@ class UIRunner:
         return True
 
     def quit(self):
+        if self.profiler is not None:
+            self.profiler.close()
+        if self.curr_screen is not None:
+            self.curr_screen.destroy()
+        for screen in self.preloaded_screens.values():
+            screen.destroy()
         pygame.quit()
@@ -0,0 +1,168 @@
+import threading
+from bisect import bisect_left
+from enum import Enum
+from wiimote.wiimote_state import WiimoteSharedBlock
+
+class ConnectionStates(Enum):
+    DISCOVERING = 1 # The handler is searching for a remote
+    CONNECTING = 2 # A remote connected, waiting for its first report
+    CONNECTED = 3 # Reports are arriving
+    STALLED = 4 # Connected, but no report for a while. Restarted if it doesn't recover
+    BACKOFF = 5 # The handler was stopped, waiting before starting a new one
+
+# Counts durations into fixed buckets, so it can be read at any time without keeping samples
+class LatencyHistogram:
+    BOUNDS = (0.25, 0.5, 1, 2, 4, 8, 16, 32, 64) # Upper bounds in seconds, plus one bucket above
+
+    def __init__(self, bounds=BOUNDS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, seconds):
+        self.counts[bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    # Upper bound of the bucket holding the given fraction of the samples (inf past the last)
+    def percentile(self, fraction):
+        if self.count == 0:
+            return None
+        seen = 0
+        for bound, count in zip(self.bounds + (float('inf'),), self.counts):
+            seen += count
+            if seen >= fraction * self.count:
+                return bound
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else None,
+            'max': self.max if self.count else None,
+            'p50': self.percentile(0.5),
+            'p90': self.percentile(0.9),
+            'buckets': list(zip(self.bounds + (float('inf'),), self.counts))
+        }
+
+# Decides when the handler process is started and stopped, from the status and sample count
+# in the shared block. A remote that isn't found keeps the same handler searching, only errors
+# and stalls restart it, and every consecutive failure doubles the wait before the next start.
+#   action = watchdog.update(time.monotonic(), status, count)
+class ConnectionWatchdog:
+    ACTION_START_HANDLER = 1
+    ACTION_STOP_HANDLER = 2
+
+    STALL_TIMEOUT = 0.5 # Seconds without a new sample before the connection counts as stalled
+    RESPONSE_TIMEOUT = 1.0 # ... and before the handler is restarted
+    BACKOFF_INITIAL = 0.5
+    BACKOFF_MAX = 30
+    BACKOFF_RESET_TIME = 10 # Staying connected this long forgets earlier failures
+
+    def __init__(self, now):
+        self.lock = threading.Lock()
+        self.state = ConnectionStates.BACKOFF
+        self.state_since = now
+        self.backoff_until = now # Start the first handler straight away
+        self.failures = 0
+        self.last_count = None
+        self.last_sample_time = now
+        self.connected_since = None
+        self.lost_time = None
+        self.start_time = now
+
+        self.first_connect = None
+        self.reconnect_times = LatencyHistogram()
+        self.state_seconds = {state: 0 for state in ConnectionStates}
+        self.restarts = 0
+        self.stalls = 0
+        self.errors = 0
+
+    def set_state(self, state, now):
+        self.state_seconds[self.state] += now - self.state_since
+        self.state = state
+        self.state_since = now
+
+    # Stops the handler and waits out the backoff before starting a new one
+    def fail(self, now):
+        self.failures += 1
+        self.restarts += 1
+        if self.lost_time is None and self.connected_since is not None:
+            self.lost_time = self.last_sample_time
+        self.connected_since = None
+        self.backoff_until = now + self.backoff_delay()
+        self.set_state(ConnectionStates.BACKOFF, now)
+        return self.ACTION_STOP_HANDLER
+
+    def backoff_delay(self):
+        return min(self.BACKOFF_INITIAL * 2 ** (self.failures - 1), self.BACKOFF_MAX)
+
+    def update(self, now, status, count):
+        with self.lock:
+            return self.step(now, status, count)
+
+    def step(self, now, status, count):
+        new_sample = count != self.last_count
+        self.last_count = count
+        if new_sample:
+            self.last_sample_time = now
+        state = self.state
+
+        if state == ConnectionStates.BACKOFF:
+            if now >= self.backoff_until:
+                self.set_state(ConnectionStates.DISCOVERING, now)
+                return self.ACTION_START_HANDLER
+            return None
+
+        if status == WiimoteSharedBlock.STATUS_ERROR:
+            self.errors += 1
+            return self.fail(now)
+
+        if state == ConnectionStates.DISCOVERING:
+            if status == WiimoteSharedBlock.STATUS_CONNECTED:
+                self.set_state(ConnectionStates.CONNECTING, now)
+        elif state == ConnectionStates.CONNECTING:
+            if new_sample:
+                self.set_state(ConnectionStates.CONNECTED, now)
+                self.connected_since = now
+                if self.first_connect is None:
+                    self.first_connect = now - self.start_time
+                if self.lost_time is not None:
+                    self.reconnect_times.record(now - self.lost_time)
+                    self.lost_time = None
+            elif now - self.state_since > self.RESPONSE_TIMEOUT:
+                return self.fail(now)
+        elif state == ConnectionStates.CONNECTED:
+            if status != WiimoteSharedBlock.STATUS_CONNECTED:
+                return self.fail(now)
+            if now - self.last_sample_time > self.STALL_TIMEOUT:
+                self.stalls += 1
+                self.set_state(ConnectionStates.STALLED, now)
+            elif self.failures > 0 and now - self.connected_since >= self.BACKOFF_RESET_TIME:
+                self.failures = 0
+        elif state == ConnectionStates.STALLED:
+            if new_sample:
+                self.set_state(ConnectionStates.CONNECTED, now)
+            elif status != WiimoteSharedBlock.STATUS_CONNECTED or now - self.last_sample_time > self.RESPONSE_TIMEOUT:
+                return self.fail(now)
+        return None
+
+    # A consistent copy of the state and metrics, safe to call from any thread
+    def metrics(self, now):
+        with self.lock:
+            state_seconds = dict(self.state_seconds)
+            state_seconds[self.state] += now - self.state_since
+            return {
+                'state': self.state.name,
+                'state_for': now - self.state_since,
+                'failures': self.failures,
+                'next_backoff': min(self.BACKOFF_INITIAL * 2 ** self.failures, self.BACKOFF_MAX),
+                'restarts': self.restarts,
+                'stalls': self.stalls,
+                'errors': self.errors,
+                'first_connect': self.first_connect,
+                'reconnect_times': self.reconnect_times.snapshot(),
+                'state_seconds': {state.name: seconds for state, seconds in state_seconds.items()}
+            }
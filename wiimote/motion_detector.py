@@ -0,0 +1,166 @@
+from enum import Enum
+from math import exp, sqrt
+
+class MotionEvents(Enum):
+    STILL = 1
+    PICKED_UP = 2
+    SHAKEN = 3
+
+# Streaming stillness / pickup / shake detection over the samples in a WiimoteState's history.
+# Every sample is an O(1) update of time-weighted EWMAs, so results depend on the samples'
+# timestamps and not on how often update() is called. Deviations are measured between a short
+# and a long running mean, which averages out the sensor's per-sample noise (a couple of counts
+# per axis on a remote lying on a table) while real movement shows up within a few samples.
+#   activity: EWMA of the summed absolute deviation of each axis' short mean from its long mean
+#   magnitude deviation: how far the short mean of |acc| is from its long mean (gravity shifts
+#     when picked up)
+# Thresholds are in accelerometer counts, checked against still traces with up to 3 counts of
+# noise per axis (see tests/test_motion_detector.py)
+class MotionDetector:
+    MEAN_TIME_CONSTANT = 0.5
+    FAST_TIME_CONSTANT = 0.05
+    ACTIVITY_TIME_CONSTANT = 0.1
+
+    STILL_THRESHOLD = 4
+    PICKUP_THRESHOLD = 3
+    PICKUP_MIN_TIME = 0.05 # Seconds |acc| has to stay away from its mean before PICKED_UP fires
+    PICKUP_REARM_TIME = 0.5 # ... and settled back near it before PICKED_UP can fire again
+    SHAKE_THRESHOLD = 40
+
+    # Gaps longer than this (e.g. a reconnect, or switching from held readings to real samples)
+    # count as this long, so they can't fake seconds of stillness in one sample
+    MAX_SAMPLE_GAP = 0.5
+
+    def __init__(self, still_time=None, still_threshold=STILL_THRESHOLD, pickup_threshold=PICKUP_THRESHOLD,
+                 shake_threshold=SHAKE_THRESHOLD, pickup_min_time=PICKUP_MIN_TIME):
+        self.still_time = still_time
+        self.still_threshold = still_threshold
+        self.pickup_threshold = pickup_threshold
+        self.pickup_min_time = pickup_min_time
+        self.shake_threshold = shake_threshold
+        self.reset()
+
+    def reset(self):
+        self.count = None
+        self.last_time = None
+        self.last_acc = None
+        self.mean = None
+        self.mag_mean = 0
+        self.fast = None
+        self.fast_mag = 0
+        self.activity = 0
+        self.still_duration = 0
+        self.pickup_duration = 0
+        self.settled_duration = 0
+        self.travel = 0
+
+        self.still_reported = False
+        self.picked_up_armed = True
+        self.shaken_armed = True
+        self.events = []
+
+    @property
+    def is_still(self):
+        return self.activity < self.still_threshold
+
+    # True while |acc| is away from its running mean, i.e. between PICKED_UP and settling again
+    @property
+    def is_picked_up(self):
+        return not self.picked_up_armed
+
+    def is_still_for(self, seconds):
+        return self.still_duration >= seconds
+
+    # Returns and clears how far the acc vector has moved (sum of |delta| per axis) since last call
+    def take_travel(self):
+        travel = self.travel
+        self.travel = 0
+        return travel
+
+    # Feeds every sample that arrived since the last call and returns the events they raised.
+    # If nothing arrived, the current reading is fed as one sample dt after the last one, so
+    # stillness still accumulates and states without a history still work
+    def update(self, dt, wm_state):
+        self.events.clear()
+        history = wm_state.history
+        if self.count is None:
+            # Start from the newest sample, anything older belongs to whoever ran before us
+            self.count = max(history.count - 1, 0)
+        if history.count > self.count:
+            times, acc, _ = history.since(self.count)
+            self.count = history.count
+            for t, a in zip(times.tolist(), acc.tolist()):
+                self.add_sample(t, a)
+        else:
+            self.add_sample(0 if self.last_time is None else self.last_time + dt, wm_state.acc)
+        return self.events
+
+    def add_sample(self, t, acc):
+        x, y, z = acc
+        mag = sqrt(x * x + y * y + z * z)
+        if self.mean is None:
+            self.mean = [x, y, z]
+            self.mag_mean = mag
+            self.fast = [x, y, z]
+            self.fast_mag = mag
+            self.last_time = t
+            self.last_acc = (x, y, z)
+            return
+
+        dt = min(max(t - self.last_time, 0), self.MAX_SAMPLE_GAP)
+        lx, ly, lz = self.last_acc
+        self.travel += abs(x - lx) + abs(y - ly) + abs(z - lz)
+        self.last_time = t
+        self.last_acc = (x, y, z)
+
+        fast = self.fast
+        k = 1 - exp(-dt / self.FAST_TIME_CONSTANT)
+        fast[0] += (x - fast[0]) * k
+        fast[1] += (y - fast[1]) * k
+        fast[2] += (z - fast[2]) * k
+        self.fast_mag += (mag - self.fast_mag) * k
+
+        mean = self.mean
+        k = 1 - exp(-dt / self.MEAN_TIME_CONSTANT)
+        mean[0] += (fast[0] - mean[0]) * k
+        mean[1] += (fast[1] - mean[1]) * k
+        mean[2] += (fast[2] - mean[2]) * k
+        mag_deviation = abs(self.fast_mag - self.mag_mean)
+        self.mag_mean += (self.fast_mag - self.mag_mean) * k
+
+        deviation = abs(fast[0] - mean[0]) + abs(fast[1] - mean[1]) + abs(fast[2] - mean[2])
+        self.activity += (deviation - self.activity) * (1 - exp(-dt / self.ACTIVITY_TIME_CONSTANT))
+
+        if self.activity < self.still_threshold:
+            self.still_duration += dt
+            if self.still_time is not None and not self.still_reported and self.still_duration >= self.still_time:
+                self.still_reported = True
+                self.events.append(MotionEvents.STILL)
+        else:
+            self.still_duration = 0
+            self.still_reported = False
+
+        # Edge triggered once the deviation has lasted pickup_min_time, so a single noisy sample
+        # can't fire it. Re-armed once the reading has stayed below half the threshold for
+        # PICKUP_REARM_TIME, so the dip between lifting the remote and stopping it isn't a second pickup
+        if mag_deviation > self.pickup_threshold:
+            self.pickup_duration += dt
+            self.settled_duration = 0
+            if self.picked_up_armed and self.pickup_duration >= self.pickup_min_time:
+                self.picked_up_armed = False
+                self.events.append(MotionEvents.PICKED_UP)
+        else:
+            self.pickup_duration = 0
+            if mag_deviation < self.pickup_threshold * 0.5:
+                self.settled_duration += dt
+                if self.settled_duration >= self.PICKUP_REARM_TIME:
+                    self.picked_up_armed = True
+            else:
+                self.settled_duration = 0
+
+        if self.activity > self.shake_threshold:
+            if self.shaken_armed:
+                self.shaken_armed = False
+                self.events.append(MotionEvents.SHAKEN)
+        elif self.activity < self.shake_threshold * 0.5:
+            self.shaken_armed = True
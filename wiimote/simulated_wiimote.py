@@ -0,0 +1,202 @@
+import random
+import threading
+import time
+from math import sin, pi
+from wiimote.wiimote_state import BTN_A, BTN_B
+
+# A stand-in for the cwiid module, for running without Bluetooth:
+#   WiimoteRunner(backend=SimulatedBackend(rate=1000, motion=RandomWalkMotion()))
+#   WiimoteRunner(backend=SimulatedBackend(motion=ShakeMotion), players=4)
+# The simulated remote sends reports at `rate` Hz generated by a motion profile, and can drop
+# reports, hang or disconnect on a schedule to exercise the runner's watchdog. The handler
+# process is forked with its own copy of the backend, so every reconnect starts the schedule over.
+
+STILL_ACC = (120, 130, 150)
+
+# Motion profiles: sample(t) returns (acc, buttons) t seconds after connecting
+
+class StillMotion:
+    def __init__(self, acc=STILL_ACC, noise=1, buttons=0):
+        self.acc = acc
+        self.noise = noise
+        self.buttons = buttons
+        self.random = random.Random(0)
+
+    def sample(self, t):
+        return tuple(axis + self.random.randint(-self.noise, self.noise) for axis in self.acc), self.buttons
+
+# Each axis drifts up or down at `speed` per second, changing direction at random intervals
+class RandomWalkMotion:
+    def __init__(self, acc=STILL_ACC, speed=20, max_turn_time=1, seed=0):
+        self.acc = list(acc)
+        self.speed = speed
+        self.max_turn_time = max_turn_time
+        self.random = random.Random(seed)
+        self.increasing = [False] * 3
+        self.turn_time = [0] * 3
+        self.last_t = 0
+
+    def sample(self, t):
+        dt = t - self.last_t
+        self.last_t = t
+        for i in range(3):
+            if t >= self.turn_time[i]:
+                self.increasing[i] = self.random.random() < 0.5
+                self.turn_time[i] = t + self.random.random() * self.max_turn_time
+            self.acc[i] += dt * (1 if self.increasing[i] else -1) * self.speed
+            self.acc[i] = max(min(self.acc[i], 255), 0)
+        return (int(self.acc[0]), int(self.acc[1]), int(self.acc[2])), 0
+
+class ShakeMotion:
+    def __init__(self, acc=STILL_ACC, amplitude=40, frequency=5, buttons=0):
+        self.acc = acc
+        self.amplitude = amplitude
+        self.frequency = frequency
+        self.buttons = buttons
+
+    def sample(self, t):
+        offset = int(self.amplitude * sin(2 * pi * self.frequency * t))
+        return (self.acc[0] + offset, self.acc[1] - offset // 2, self.acc[2]), self.buttons
+
+# Plays (seconds, motion) segments in order, looping when loop is set or holding the last one
+class ScriptedMotion:
+    def __init__(self, segments, loop=True):
+        self.segments = segments
+        self.loop = loop
+        self.length = sum(seconds for seconds, _ in segments)
+
+    def sample(self, t):
+        if self.loop:
+            t %= self.length
+        for seconds, motion in self.segments:
+            if t < seconds:
+                return motion.sample(t)
+            t -= seconds
+        return self.segments[-1][1].sample(self.segments[-1][0])
+
+# Someone walking up to the door: press A+B on the home screen, pick the remote up, then hold it
+# still for calibration
+def session_motion():
+    return ScriptedMotion([
+        (5, StillMotion()),
+        (1, StillMotion(buttons=BTN_A | BTN_B)),
+        (9.5, StillMotion()),
+        (0.5, ShakeMotion()),
+        (10, StillMotion())
+    ])
+
+MOTION_PROFILES = {
+    'still': StillMotion,
+    'random': RandomWalkMotion,
+    'shake': ShakeMotion,
+    'session': session_motion
+}
+
+class SimulatedWiimote:
+    def __init__(self, backend):
+        self.backend = backend
+        self.motion = backend.motion_factory() if callable(backend.motion_factory) else backend.motion_factory
+        self.random = random.Random(backend.seed)
+        self.led = 0
+        self.rpt_mode = 0
+        self.mesg_callback = None
+        self.connect_time = time.monotonic()
+        acc, buttons = self.motion.sample(0)
+        self.state = {'acc': acc, 'buttons': buttons}
+        self.closed = threading.Event()
+        self.report_thread = None
+
+    def elapsed(self):
+        return time.monotonic() - self.connect_time
+
+    def is_hung(self, t):
+        return self.backend.hang_after is not None and t >= self.backend.hang_after
+
+    def is_disconnected(self, t):
+        return self.backend.disconnect_after is not None and t >= self.backend.disconnect_after
+
+    # Polling mode: blocks forever once hung, like the real remote when the connection drops
+    def request_status(self):
+        t = self.elapsed()
+        if self.is_hung(t):
+            self.closed.wait()
+        if self.is_disconnected(t) or self.closed.is_set():
+            raise RuntimeError('Error requesting status')
+        acc, buttons = self.motion.sample(t)
+        self.state = {'acc': acc, 'buttons': buttons}
+
+    def enable(self, flag):
+        if flag & self.backend.FLAG_MESG_IFC and self.report_thread is None:
+            self.report_thread = threading.Thread(target=self.send_reports, daemon=True)
+            self.report_thread.start()
+
+    # Sends reports on a fixed schedule. When the thread falls behind, reports are sent back to
+    # back until it catches up, each with its scheduled timestamp
+    def send_reports(self):
+        backend = self.backend
+        period = 1 / backend.rate
+        next_time = self.connect_time
+        while not self.closed.is_set():
+            now = time.monotonic()
+            if next_time > now:
+                time.sleep(next_time - now)
+            t = next_time - self.connect_time
+            next_time += period
+
+            if self.is_disconnected(t):
+                self.mesg_callback([(backend.MESG_ERROR, backend.ERROR_DISCONNECT)], next_time - period)
+                return
+            if self.is_hung(t):
+                self.closed.wait() # The remote goes silent, the runner's watchdog has to notice
+                return
+            if backend.drop_rate > 0 and self.random.random() < backend.drop_rate:
+                continue
+
+            acc, buttons = self.motion.sample(t)
+            self.state = {'acc': acc, 'buttons': buttons}
+            if self.mesg_callback is not None:
+                self.mesg_callback([(backend.MESG_BTN, buttons), (backend.MESG_ACC, acc)], next_time - period)
+
+    def close(self):
+        self.closed.set()
+
+class SimulatedBackend:
+    # The cwiid constants the handler uses, with cwiid's values
+    RPT_BTN = 0x02
+    RPT_ACC = 0x04
+    MESG_BTN = 1
+    MESG_ACC = 2
+    MESG_ERROR = 8
+    FLAG_MESG_IFC = 0x01
+    ERROR_DISCONNECT = 1
+    BTN_A = BTN_A
+    BTN_B = BTN_B
+
+    MAX_RATE = 2000 # Hz
+
+    # rate: reports per second. motion: a motion profile, or a function making a fresh one per
+    #   connection. drop_rate: share of reports that never arrive
+    # hang_after / disconnect_after: seconds after connecting until the remote goes silent (and
+    #   request_status() blocks) / reports a disconnect. None never does
+    # connect_delay: seconds every handler searches before the remote connects
+    def __init__(self, rate=100, motion=StillMotion, drop_rate=0, hang_after=None, disconnect_after=None, connect_delay=0, seed=0):
+        if not 0 < rate <= self.MAX_RATE:
+            raise ValueError(f'rate must be between 0 and {self.MAX_RATE} Hz')
+        self.rate = rate
+        self.motion_factory = motion
+        self.drop_rate = drop_rate
+        self.hang_after = hang_after
+        self.disconnect_after = disconnect_after
+        self.connect_delay = connect_delay
+        self.seed = seed
+        self.first_attempt = None
+
+    # Like cwiid.Wiimote(), raises RuntimeError while no remote is found. Every handler process
+    # has its own copy of the backend, so each player slot gets its own independent remote
+    def Wiimote(self, bdaddr=None):
+        now = time.monotonic()
+        if self.first_attempt is None:
+            self.first_attempt = now
+        if now - self.first_attempt < self.connect_delay:
+            raise RuntimeError('Error opening wiimote connection')
+        return SimulatedWiimote(self)
@@ -1,13 +1,36 @@
-import cwiid
+import threading
 import time
+from wiimote.wiimote_state import WiimoteSharedBlock
+
+# LED bits (cwiid.LED1_ON = 1 ... LED4_ON = 8) showing the player slot, like the Wii does.
+# Past four players the slot is shown in binary
+def player_leds(player):
+    return 1 << (player - 1) if player <= 4 else player & 0x0F
+
+# Runs in its own process and writes every sample straight into shared_block.
+# backend is anything shaped like the cwiid module (Wiimote plus the RPT_/MESG_ constants),
+# so a stub module can stand in for the real remote.
+# player lights that player's LED, address connects to that remote only (None takes any)
+def wiimote_handler(shared_block, callback_mode=True, backend=None, player=1, address=None):
+    if backend is None:
+        import cwiid as backend
+
+    # cwiid calls on_message from its own thread, so writes to the block are serialized here
+    write_lock = threading.Lock()
+    def write_sample(status, buttons, acc):
+        with write_lock:
+            shared_block.write(status, buttons, acc, time.monotonic())
+
+    def write_status(status):
+        with write_lock:
+            shared_block.write_status(status, time.monotonic())
 
-def wiimote_handler(q):
     def try_connect():
         try:
-            wiimote = cwiid.Wiimote()
+            wiimote = backend.Wiimote(address) if address is not None else backend.Wiimote()
             if wiimote:
-                wiimote.led = 1
-                wiimote.rpt_mode = cwiid.RPT_BTN | cwiid.RPT_ACC
+                wiimote.led = player_leds(player)
+                wiimote.rpt_mode = backend.RPT_BTN | backend.RPT_ACC
                 return wiimote
         except RuntimeError:
             pass
@@ -19,25 +42,50 @@ def wiimote_handler(q):
         except RuntimeError as e:
             return {'wiimote_error': e}
 
+    # Called on cwiid's own thread for every report the remote sends (~100 Hz)
+    latest_state = {'acc': (0, 0, 0), 'buttons': 0}
+    wiimote_error = threading.Event()
+    def on_message(mesg_list, timestamp=None):
+        for mesg in mesg_list:
+            if mesg[0] == backend.MESG_BTN:
+                latest_state['buttons'] = mesg[1]
+            elif mesg[0] == backend.MESG_ACC:
+                latest_state['acc'] = mesg[1]
+            elif mesg[0] == backend.MESG_ERROR:
+                wiimote_error.set()
+                return
+        write_sample(WiimoteSharedBlock.STATUS_CONNECTED, latest_state['buttons'], latest_state['acc'])
+
     wm = None
     try:
         while True:
             if not wm:
                 wm = try_connect()
                 if wm:
-                    q.put(True)
+                    latest_state['acc'] = wm.state.get('acc', (0, 0, 0))
+                    latest_state['buttons'] = wm.state.get('buttons', 0)
+                    write_sample(WiimoteSharedBlock.STATUS_CONNECTED, latest_state['buttons'], latest_state['acc'])
+                    if callback_mode:
+                        wm.mesg_callback = on_message
+                        wm.enable(backend.FLAG_MESG_IFC)
+            elif callback_mode:
+                # Reports arrive through on_message, this thread only has to wait for an error
+                if wiimote_error.wait(0.5):
+                    break
+                continue
             else:
                 wm_state = try_get_state(wm)
-                q.put(wm_state)
+                if 'wiimote_error' in wm_state:
+                    break
+                write_sample(WiimoteSharedBlock.STATUS_CONNECTED, wm_state['buttons'], wm_state['acc'])
 
             time.sleep(0.1)
 
     except KeyboardInterrupt:
         pass
-    except Exception as e:
-        q.put({'wiimote_error': str(e)})
+    except Exception:
         pass
 
     if wm:
         wm.close()
-    q.put({'wiimote_error': -1})
+    write_status(WiimoteSharedBlock.STATUS_ERROR)
@@ -0,0 +1,227 @@
+import struct
+import time
+from wiimote.wiimote_state import WiimoteSharedBlock, WiimoteState
+
+# Recordings of the raw Wiimote stream, for reproducing problems without a remote.
+#
+# A file is the magic followed by records, and is only ever appended to: every recorder that
+# opens it starts a new session, and a record cut off by a crash just ends the last session.
+# Each record is a tag byte and its fields, numbers are LEB128 varints:
+#   SESSION  start timestamp (float64), wall clock time (float64)
+#   STATUS   time delta, status
+#   SAMPLE   time delta, acc x/y/z deltas (zigzag)
+#   SAMPLE_BUTTONS  like SAMPLE, then the full button bitmask
+# Time deltas are in TIME_UNIT steps since the previous record of the session, acc deltas are
+# from the previous sample. At ~100 Hz that is about 5 bytes a sample, ~15 MB a day.
+
+MAGIC = b'PWTEWM\x01\n'
+TIME_UNIT = 0.0001 # Seconds
+
+RECORD_SESSION = 1
+RECORD_STATUS = 2
+RECORD_SAMPLE = 3
+RECORD_SAMPLE_BUTTONS = 4
+
+SESSION_LAYOUT = struct.Struct('<dd')
+
+def write_varint(out, value):
+    while value > 0x7f:
+        out.append(value & 0x7f | 0x80)
+        value >>= 7
+    out.append(value)
+
+def read_varint(data, pos):
+    value = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+def zigzag(value):
+    return value << 1 if value >= 0 else (-value << 1) - 1
+
+def unzigzag(value):
+    return value >> 1 if not value & 1 else -(value >> 1) - 1
+
+class WiimoteRecorder:
+    FLUSH_INTERVAL = 1 # Seconds
+
+    def __init__(self, path):
+        self.file = open(path, 'ab')
+        if self.file.tell() == 0:
+            self.file.write(MAGIC)
+        self.out = bytearray()
+        self.last_flush = time.monotonic()
+
+        self.count = None
+        self.status = None
+        self.time_units = None
+        self.acc = (0, 0, 0)
+        self.buttons = 0
+
+    def start_session(self, timestamp):
+        self.out.append(RECORD_SESSION)
+        self.out += SESSION_LAYOUT.pack(timestamp, time.time())
+        self.time_units = int(round(timestamp / TIME_UNIT))
+        self.acc = (0, 0, 0)
+        self.buttons = 0
+
+    def write_time(self, timestamp):
+        units = int(round(timestamp / TIME_UNIT))
+        write_varint(self.out, max(units - self.time_units, 0))
+        self.time_units = max(units, self.time_units)
+
+    def write_status(self, status, timestamp):
+        self.out.append(RECORD_STATUS)
+        self.write_time(timestamp)
+        self.out.append(status)
+        self.status = status
+
+    def write_sample(self, timestamp, acc, buttons):
+        out = self.out
+        out.append(RECORD_SAMPLE if buttons == self.buttons else RECORD_SAMPLE_BUTTONS)
+        self.write_time(timestamp)
+        for axis, last in zip(acc, self.acc):
+            write_varint(out, zigzag(axis - last))
+        if buttons != self.buttons:
+            write_varint(out, buttons)
+            self.buttons = buttons
+        self.acc = acc
+
+    # Records whatever wm_state received since the last call. Call after every refresh()
+    def record(self, wm_state):
+        now = time.monotonic()
+        history = wm_state.history
+        if self.count is None:
+            # Start from the current sample, so the first deltas have something to go from
+            self.count = max(history.count - 1, 0)
+            times, _, _ = history.since(self.count)
+            self.start_session(min(times[0], now) if len(times) > 0 else now)
+
+        if history.count > self.count:
+            times, acc, buttons = history.since(self.count)
+            for timestamp, sample_acc, sample_buttons in zip(times.tolist(), acc.tolist(), buttons.tolist()):
+                self.write_sample(timestamp, tuple(sample_acc), sample_buttons)
+            self.count = history.count
+        # Status changes are only seen when polled, after samples that can be older than the poll.
+        # They're stamped with the latest recorded sample so no later sample goes back in time
+        if wm_state.status != self.status:
+            self.write_status(wm_state.status, self.time_units * TIME_UNIT)
+
+        if now - self.last_flush >= self.FLUSH_INTERVAL:
+            self.flush()
+            self.last_flush = now
+
+    def flush(self):
+        self.file.write(self.out)
+        self.file.flush()
+        self.out.clear()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+# Yields the records of a recording as (RECORD_SESSION, start timestamp, wall time),
+# (RECORD_STATUS, timestamp, status) and (RECORD_SAMPLE, timestamp, acc, buttons)
+def read_recording(path):
+    with open(path, 'rb') as file:
+        data = file.read()
+    if not data.startswith(MAGIC):
+        raise ValueError(f'{path} is not a Wiimote recording')
+
+    pos = len(MAGIC)
+    time_units = 0
+    acc = (0, 0, 0)
+    buttons = 0
+    try:
+        while pos < len(data):
+            tag = data[pos]
+            pos += 1
+            if tag == RECORD_SESSION:
+                start, wall_time = SESSION_LAYOUT.unpack_from(data, pos)
+                pos += SESSION_LAYOUT.size
+                time_units = int(round(start / TIME_UNIT))
+                acc = (0, 0, 0)
+                buttons = 0
+                yield RECORD_SESSION, start, wall_time
+                continue
+
+            delta, pos = read_varint(data, pos)
+            time_units += delta
+            if tag == RECORD_STATUS:
+                status = data[pos]
+                pos += 1
+                yield RECORD_STATUS, time_units * TIME_UNIT, status
+            elif tag == RECORD_SAMPLE or tag == RECORD_SAMPLE_BUTTONS:
+                x, pos = read_varint(data, pos)
+                y, pos = read_varint(data, pos)
+                z, pos = read_varint(data, pos)
+                acc = (acc[0] + unzigzag(x), acc[1] + unzigzag(y), acc[2] + unzigzag(z))
+                if tag == RECORD_SAMPLE_BUTTONS:
+                    buttons, pos = read_varint(data, pos)
+                yield RECORD_SAMPLE, time_units * TIME_UNIT, acc, buttons
+            else:
+                raise ValueError(f'Unknown record {tag} at byte {pos - 1} of {path}')
+    except (IndexError, struct.error):
+        pass # The recorder was stopped mid-record
+
+# Plays a recording back into a WiimoteState in place of a WiimoteRunner, at speed times real
+# time. Sessions are played back to back, and the pushed timestamps stay continuous across
+# them so motion detection sees one stream. Records are decoded as they're played.
+class WiimoteReplay:
+    def __init__(self, path, speed=1, loop=False):
+        self.path = path
+        self.speed = speed
+        self.loop = loop
+        self.wm_state = WiimoteState()
+        self.records = read_recording(path)
+        self.record = next(self.records, None)
+        self.start_time = None
+        self.replay_time = 0 # Recording time played so far, with the gaps between sessions removed
+        self.offset = 0 # Added to the recorded timestamps of the current session
+
+    @property
+    def finished(self):
+        return self.record is None
+
+    def poll(self):
+        now = time.monotonic()
+        if self.start_time is None:
+            self.start_time = now
+        target = (now - self.start_time) * self.speed
+
+        wm_state = self.wm_state
+        while self.record is not None:
+            record = self.record
+            if record[0] == RECORD_SESSION:
+                # The next session picks up right where the last one ended
+                self.offset = self.replay_time - record[1]
+            else:
+                # Never behind the last one: rounding in the offset can put the first record of
+                # a session a hair before the end of the one before
+                timestamp = max(record[1] + self.offset, self.replay_time)
+                if timestamp > target:
+                    break
+                self.replay_time = timestamp
+                if record[0] == RECORD_STATUS:
+                    wm_state.status = record[2]
+                    wm_state.connected = record[2] == WiimoteSharedBlock.STATUS_CONNECTED
+                else:
+                    wm_state.push_sample(record[2], record[3], timestamp)
+
+            self.record = next(self.records, None)
+            if self.record is None and self.loop:
+                self.records = read_recording(self.path)
+                self.record = next(self.records, None)
+        return wm_state
+
+    # A recording holds one remote, played back as player 1
+    def poll_players(self):
+        return [self.poll()]
+
+    def on_exit(self):
+        pass
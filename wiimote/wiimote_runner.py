@@ -1,65 +1,160 @@
 import threading
 import time
-from multiprocessing import Process, Queue, set_start_method
+from multiprocessing import get_context
 import os, signal
-import cwiid
-from wiimote.wiimote_state import WiimoteState
+from wiimote.connection_watchdog import ConnectionStates, ConnectionWatchdog
+from wiimote.wiimote_state import WiimoteState, WiimoteSharedBlock
 from wiimote.wiimote_handler import wiimote_handler
+from wiimote.wiimote_recording import WiimoteRecorder
 
-class WiimoteRunner:
-    def __init__(self):
-        self.running = True
-        self.wm_state = WiimoteState()
+# Everything kept for one remote: its shared block and state, the handler process connected to
+# it and the watchdog deciding when that handler restarts. Nothing is shared between remotes,
+# so one that hangs or drops out never holds up the others' samples.
+class WiimoteWorker:
+    STOP_TIMEOUT = 0.5 # Seconds the handler gets to close the remote before it's terminated
+
+    def __init__(self, runner, player, address=None, record_path=None):
+        self.runner = runner
+        self.player = player
+        self.address = address
+        self.name = 'Wiimote' if runner.players == 1 else f'Wiimote {player}'
+        self.recorder = WiimoteRecorder(record_path) if record_path is not None else None
 
-        set_start_method('fork') # Note! This will only work on Mac/Linux!
+        # The handler process writes samples into the shared block and the UI thread reads them
+        # through poll(), so the watchdog thread never touches the data itself
+        self.shared_block = WiimoteSharedBlock()
+        self.wm_state = WiimoteState(self.shared_block)
+        self.wm_process = None
+        self.watchdog = ConnectionWatchdog(time.monotonic())
 
-        self.polling_thread = threading.Thread(target=self.start_polling)
-        self.polling_thread.start()
+    def poll(self):
+        self.wm_state.refresh()
+        if self.recorder is not None:
+            self.recorder.record(self.wm_state)
+        return self.wm_state
 
     def kick_off_handler(self):
-        self.wm_queue = Queue()
-        self.wm_process = Process(target=wiimote_handler, args=(self.wm_queue,))
+        runner = self.runner
+        self.wm_process = runner.mp_context.Process(
+            target=wiimote_handler,
+            args=(self.shared_block, runner.callback_mode, runner.backend, self.player, self.address))
         self.wm_process.start()
 
-    def terminate_handler(self):
-        self.wm_state.reset()
-        os.kill(self.wm_process.pid, signal.SIGINT)
-        self.wm_process.terminate()
+    # Asks the handler to close the remote, and only kills it if it's stuck (e.g. in a hung call)
+    def stop_handler(self):
+        if self.wm_process is None:
+            return
+        if self.wm_process.is_alive():
+            os.kill(self.wm_process.pid, signal.SIGINT)
+            self.wm_process.join(self.STOP_TIMEOUT)
+            if self.wm_process.is_alive():
+                self.wm_process.terminate()
         self.wm_process.join()
+        self.wm_process = None
+
+    def terminate_handler(self):
+        self.stop_handler()
+        self.shared_block.write(WiimoteSharedBlock.STATUS_SEARCHING, 0, (0, 0, 0), time.monotonic(), sample=False)
+
+    # One watchdog step: starts and restarts the handler as the connection watchdog decides
+    def check(self):
+        watchdog = self.watchdog
+        _, data = self.shared_block.read()
+        status, count = data[0], data[6]
+        if self.wm_process is not None and not self.wm_process.is_alive():
+            status = WiimoteSharedBlock.STATUS_ERROR # Died without saying so
+
+        prev_state = watchdog.state
+        action = watchdog.update(time.monotonic(), status, count)
+        if action == ConnectionWatchdog.ACTION_START_HANDLER:
+            self.kick_off_handler()
+        elif action == ConnectionWatchdog.ACTION_STOP_HANDLER:
+            print(f'Lost the {self.name} ({prev_state.name.lower()}), trying again in {watchdog.backoff_until - time.monotonic():.1f} s...')
+            self.terminate_handler()
+        elif watchdog.state == ConnectionStates.CONNECTED and prev_state == ConnectionStates.CONNECTING:
+            print(f'Connected to {self.name}!')
+
+    def close(self):
+        self.stop_handler()
+        if self.recorder is not None:
+            self.recorder.close()
+        self.shared_block.close(unlink=True)
+
+class WiimoteRunner:
+    WATCHDOG_INTERVAL = 0.1
+
+    # callback_mode: the handler forwards every report from cwiid's message callback instead of
+    #   polling request_status() at 10 Hz
+    # backend: a cwiid-like module to use instead of cwiid (e.g. a stub in tests)
+    # record_path: append everything the remote sends to this recording (see WiimoteReplay).
+    #   With more than one player, each remote gets its own file (see player_record_path)
+    # players: how many remotes to connect, one handler process each. Player slots start at 1
+    # addresses: Bluetooth address of the remote for each slot. Without them every handler takes
+    #   whichever remote it finds first, so the slots are only stable within a session
+    def __init__(self, callback_mode=True, backend=None, record_path=None, players=1, addresses=None):
+        if players < 1:
+            raise ValueError('players must be at least 1')
+        if addresses is not None and len(addresses) != players:
+            raise ValueError('addresses needs one address per player')
+        self.backend = backend
+        self.callback_mode = callback_mode
+        self.players = players
+
+        self.running = True
+        # A fork context instead of set_start_method() so more than one runner can be made, e.g. in tests
+        self.mp_context = get_context('fork') # Note! This will only work on Mac/Linux!
+        self.workers = [
+            WiimoteWorker(self, player,
+                          addresses[player - 1] if addresses is not None else None,
+                          self.player_record_path(record_path, player) if record_path is not None else None)
+            for player in range(1, players + 1)
+        ]
+        self.wm_states = [worker.wm_state for worker in self.workers]
+        self.wm_state = self.wm_states[0]
+
+        # One thread watches every remote, the handlers do the per-report work in their own processes
+        self.watchdog_thread = threading.Thread(target=self.start_watchdog)
+        self.watchdog_thread.start()
+
+    # session.wmrec records player 1 to session.wmrec, player 2 to session-p2.wmrec and so on
+    @staticmethod
+    def player_record_path(path, player):
+        if player == 1:
+            return path
+        root, ext = os.path.splitext(path)
+        return f'{root}-p{player}{ext}'
+
+    # Refreshes every remote and returns player 1's state
+    def poll(self):
+        for worker in self.workers:
+            worker.poll()
+        return self.wm_state
+
+    # Refreshes every remote and returns their states by player slot (index 0 is player 1)
+    def poll_players(self):
+        for worker in self.workers:
+            worker.poll()
+        return self.wm_states
+
+    @property
+    def connection_state(self):
+        return self.workers[0].watchdog.state
+
+    def get_connection_state(self, player=1):
+        return self.workers[player - 1].watchdog.state
 
-    def start_polling(self):
-        self.kick_off_handler()
+    # Connection state, restart counts and time-to-reconnect histogram, see ConnectionWatchdog
+    def get_metrics(self, player=1):
+        return self.workers[player - 1].watchdog.metrics(time.monotonic())
 
+    def start_watchdog(self):
         while self.running:
-            time.sleep(0.1)
-
-            try:
-                # If we're not connected, keep polling the queue until we get a connection
-                if not self.wm_state.connected:
-                    try:
-                        connected = self.wm_queue.get_nowait()
-                        if connected == True:
-                            print('Connected to Wiimote!')
-                            self.wm_state.connected = True
-                        else:
-                            continue
-                    except Exception:
-                        continue
-
-                # Once we have a connection, try to get the state with a timeout
-                state = self.wm_queue.get(timeout=1.0)
-                if 'wiimote_error' in state:
-                    raise state['wiimote_error']
-                else:
-                    self.wm_state.acc = state['acc']
-                    self.wm_state.a_btn = state['buttons'] & cwiid.BTN_A > 0
-                    self.wm_state.b_btn = state['buttons'] & cwiid.BTN_B > 0
-            except Exception:
-                print('No response from Wiimote, killing process and trying again...')
-                self.terminate_handler()
-                self.kick_off_handler()
+            for worker in self.workers:
+                worker.check()
+            time.sleep(self.WATCHDOG_INTERVAL)
 
     def on_exit(self):
         self.running = False
-        self.polling_thread.join()
-        os.kill(self.wm_process.pid, signal.SIGINT)
\ No newline at end of file
+        self.watchdog_thread.join()
+        for worker in self.workers:
+            worker.close()
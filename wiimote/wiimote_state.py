@@ -1,12 +1,181 @@
-class WiimoteState:
+import struct
+import numpy as np
+from multiprocessing import shared_memory
+
+# Button bits as reported by the remote (the same values as cwiid.BTN_*)
+BTN_A = 0x0008
+BTN_B = 0x0004
+
+# Fixed-size history of timestamped samples, laid out over any writable buffer so it can live in
+# shared memory. Every sample is written twice, at i and i + capacity, which keeps any run of up
+# to `capacity` consecutive samples contiguous: windows are plain numpy views, never copies.
+# Readers only see samples up to `count`, which the owner of the history advances.
+class WiimoteHistory:
+    CAPACITY = 1024 # ~10 seconds of reports at 100 Hz
+    # Reads stop this many samples short of the capacity. The writer doesn't wait for readers:
+    # every sample it writes after a reader's snapshot of `count` overwrites the oldest slot, so
+    # a read reaching back `capacity` samples could change (or tear) under the reader. This
+    # leaves room for the samples that arrive while a frame uses its views, ~0.6 s at 100 Hz
+    WRITE_MARGIN = 64
+
+    def __init__(self, buf=None, capacity=CAPACITY):
+        if buf is None:
+            buf = bytearray(self.nbytes(capacity))
+        self.capacity = capacity
+        self.max_read = max(capacity - self.WRITE_MARGIN, capacity // 2)
+        self.count = 0
+        self.times = np.ndarray((capacity * 2,), np.float64, buf, 0)
+        self.acc = np.ndarray((capacity * 2, 3), np.int16, buf, capacity * 16)
+        self.buttons = np.ndarray((capacity * 2,), np.uint16, buf, capacity * 28)
+
+    @staticmethod
+    def nbytes(capacity=CAPACITY):
+        return capacity * 2 * (8 + 6 + 2)
+
+    # Writes sample number `index` (0 based). Does not publish it, that's up to the owner
+    def write(self, index, timestamp, acc, buttons):
+        i = index % self.capacity
+        for j in (i, i + self.capacity):
+            self.times[j] = timestamp
+            self.acc[j] = acc
+            self.buttons[j] = buttons
+
+    # Returns (times, acc, buttons) views of the last n published samples, oldest first. At most
+    # max_read of them, capacity - WRITE_MARGIN unless the history is tiny
+    def last(self, n):
+        n = min(n, self.count, self.max_read)
+        end = (self.count - 1) % self.capacity + self.capacity + 1
+        return self.times[end - n:end], self.acc[end - n:end], self.buttons[end - n:end]
+
+    # Samples published after sample count `count` (capped to what the buffer still holds)
+    def since(self, count):
+        return self.last(self.count - count)
+
+    # Samples no older than `seconds` before the newest one (as far back as last() reaches)
+    def window(self, seconds):
+        times, acc, buttons = self.last(self.capacity)
+        if len(times) == 0:
+            return times, acc, buttons
+        start = np.searchsorted(times, times[-1] - seconds)
+        return times[start:], acc[start:], buttons[start:]
+
+    def release(self):
+        self.times = self.acc = self.buttons = None
+
+# Fixed-layout block shared between the handler process (the only writer) and the UI thread.
+# Writes are guarded by a sequence lock: the sequence number is odd while a write is in
+# progress, so the reader retries until it sees the same even number before and after reading.
+class WiimoteSharedBlock:
+    STATUS_SEARCHING = 0
+    STATUS_CONNECTED = 1
+    STATUS_ERROR = 2
+
+    SEQ_LAYOUT = struct.Struct('<Q')
+    # status, buttons, acc x, acc y, acc z, timestamp, history sample count
+    DATA_LAYOUT = struct.Struct('<BH3HdQ')
+    DATA_OFFSET = SEQ_LAYOUT.size
+    HISTORY_OFFSET = 64
+    SIZE = HISTORY_OFFSET + WiimoteHistory.nbytes()
+
+    MAX_READ_RETRIES = 1000
+
     def __init__(self):
+        self.shm = shared_memory.SharedMemory(create=True, size=self.SIZE)
+        self.buf = self.shm.buf
+        self.SEQ_LAYOUT.pack_into(self.buf, 0, 0)
+        self.DATA_LAYOUT.pack_into(self.buf, self.DATA_OFFSET, self.STATUS_SEARCHING, 0, 0, 0, 0, 0, 0)
+        self.history = WiimoteHistory(self.buf[self.HISTORY_OFFSET:])
+
+    # sample=False only changes the status and leaves the history alone
+    def write(self, status, buttons, acc, timestamp, sample=True):
+        seq = self.SEQ_LAYOUT.unpack_from(self.buf, 0)[0]
+        seq += seq & 1 # A writer killed mid-write leaves an odd sequence number behind
+        count = self.DATA_LAYOUT.unpack_from(self.buf, self.DATA_OFFSET)[6]
+        if sample:
+            # The slot being written is only published below. Until the writer gets
+            # WRITE_MARGIN samples ahead of a reader it only overwrites slots older than any
+            # read reaches, so the history doesn't need to be inside the sequence lock
+            self.history.write(count, timestamp, acc, buttons)
+            count += 1
+        self.SEQ_LAYOUT.pack_into(self.buf, 0, seq + 1)
+        self.DATA_LAYOUT.pack_into(self.buf, self.DATA_OFFSET, status, buttons, acc[0], acc[1], acc[2], timestamp, count)
+        self.SEQ_LAYOUT.pack_into(self.buf, 0, seq + 2)
+
+    def write_status(self, status, timestamp):
+        _, buttons, x, y, z, _, _ = self.DATA_LAYOUT.unpack_from(self.buf, self.DATA_OFFSET)
+        self.write(status, buttons, (x, y, z), timestamp, sample=False)
+
+    # Returns (write count, (status, buttons, x, y, z, timestamp, history sample count))
+    def read(self):
+        for _ in range(self.MAX_READ_RETRIES):
+            seq = self.SEQ_LAYOUT.unpack_from(self.buf, 0)[0]
+            if seq & 1:
+                continue
+            data = self.DATA_LAYOUT.unpack_from(self.buf, self.DATA_OFFSET)
+            if self.SEQ_LAYOUT.unpack_from(self.buf, 0)[0] == seq:
+                return seq >> 1, data
+        # The writer died mid-write, the runner will reset the block once it restarts the handler
+        return seq >> 1, self.DATA_LAYOUT.unpack_from(self.buf, self.DATA_OFFSET)
+
+    def close(self, unlink=False):
+        self.history.release()
+        self.buf = None
+        try:
+            self.shm.close()
+        except BufferError:
+            pass # Someone still holds a history view, the mapping goes away with the process
+        if unlink:
+            self.shm.unlink()
+
+class WiimoteState:
+    def __init__(self, shared_block=None):
+        self.shared_block = shared_block
+        self.history = shared_block.history if shared_block is not None else WiimoteHistory()
         self.reset()
 
     def reset(self):
+        self.status = WiimoteSharedBlock.STATUS_SEARCHING
         self.connected = False
         self.acc = (0, 0, 0)
+        self.buttons = 0
         self.a_btn = False
         self.b_btn = False
+        self.seq = 0
+        self.timestamp = 0
+
+    # Takes a snapshot of the shared block, if there is one. Call once per frame from the UI thread
+    def refresh(self):
+        if self.shared_block is None:
+            return
+        self.seq, (status, buttons, x, y, z, timestamp, count) = self.shared_block.read()
+        self.status = status
+        self.connected = status == WiimoteSharedBlock.STATUS_CONNECTED
+        self.acc = (x, y, z)
+        self.set_buttons(buttons)
+        self.timestamp = timestamp
+        self.history.count = count
+
+    # The latest (status, buttons, acc) without taking a snapshot, e.g. to check for input
+    # between frames. States that aren't backed by a shared block return what they hold
+    def peek(self):
+        if self.shared_block is None:
+            return self.status, self.buttons, self.acc
+        _, (status, buttons, x, y, z, _, _) = self.shared_block.read()
+        return status, buttons, (x, y, z)
+
+    # Feeds a sample directly, for states that aren't backed by a handler process
+    def push_sample(self, acc, buttons, timestamp):
+        self.history.write(self.history.count, timestamp, acc, buttons)
+        self.history.count += 1
+        self.seq += 1
+        self.acc = tuple(acc)
+        self.set_buttons(buttons)
+        self.timestamp = timestamp
+
+    def set_buttons(self, buttons):
+        self.buttons = buttons
+        self.a_btn = buttons & BTN_A > 0
+        self.b_btn = buttons & BTN_B > 0
 
     def as_dict(self):
         return {
@@ -14,4 +183,4 @@ class WiimoteState:
             'acc': self.acc,
             'a_btn': self.a_btn,
             'b_btn': self.b_btn
-        }
\ No newline at end of file
+        }